@@ -0,0 +1,86 @@
+"""
+Cost of rendering an advanced (`?commands advanced`) command listing,
+with and without cached command signatures.
+
+Usage:
+    python -m benchmarks.bench_help [--commands N] [--number N] [--repeat N]
+"""
+import argparse
+import asyncio
+import timeit
+from types import SimpleNamespace
+from typing import Optional
+
+from discord.ext import commands
+
+from dgvgkbot.bot import DiscordBot
+from dgvgkbot.cogs.base_cog import BaseCog
+from dgvgkbot.utils.patching.commands import clear_signature_cache
+
+
+def make_cog(bot: DiscordBot, n_commands: int) -> BaseCog:
+    class BenchCog(BaseCog):
+        """Benchmark commands."""
+
+    cog = BenchCog(bot)
+    for i in range(n_commands):
+        async def callback(self, ctx: commands.Context, target: str, amount: int=1,
+                           reason: Optional[str]=None, *rest: str, silent: bool=False) -> None:
+            """Does something.
+
+            Parameters
+            ----------
+            target : `str`
+                Something
+            """
+        command = commands.Command(callback, name=f"command{i}", aliases=[f"c{i}"])
+        command.cog = cog
+        bot.add_command(command)
+    return cog
+
+
+def make_ctx(bot: DiscordBot) -> commands.Context:
+    message = SimpleNamespace(
+        author=SimpleNamespace(id=1),
+        channel=SimpleNamespace(id=1),
+        guild=None,
+        _state=None,
+    )
+    return commands.Context(message=message, bot=bot, prefix=bot.command_prefix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    bot = DiscordBot(command_prefix="?")
+    bot.config = {"users": {"owner_id": 0}}
+    cog = make_cog(bot, args.commands)
+    ctx = make_ctx(bot)
+
+    def render() -> str:
+        return loop.run_until_complete(cog._render_cog_commands(ctx, advanced=True))
+
+    def render_uncached() -> str:
+        clear_signature_cache()
+        return render()
+
+    render() # Warm up check result cache
+
+    def bench(func) -> float:
+        return min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number * 1000
+
+    before = bench(render_uncached)
+    after = bench(render)
+    print(f"Advanced listing of {args.commands} commands")
+    print(f"{'uncached signatures':<22}{before:>8.3f} ms")
+    print(f"{'cached signatures':<22}{after:>8.3f} ms")
+    print(f"{'speedup':<22}{before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Load/dump timings of every available JSON backend on realistic bot files.
+
+Usage:
+    python -m benchmarks.bench_json [--number N] [--repeat N]
+"""
+import argparse
+import random
+import timeit
+from typing import Any, Callable, Dict
+
+from dgvgkbot.utils import jsoncodec
+
+
+def make_trusted(n_guilds: int=1000, n_members: int=25, n_roles: int=5) -> dict:
+    """Trusted members and roles, in the format used by `utils.access_control`."""
+    rng = random.Random(0)
+    snowflake = lambda: rng.randrange(10**17, 10**18)
+    return {
+        str(snowflake()): {
+            "members": [snowflake() for _ in range(n_members)],
+            "roles": [snowflake() for _ in range(n_roles)],
+        }
+        for _ in range(n_guilds)
+    }
+
+
+def make_blacklist(n_users: int=5000) -> list:
+    """Blacklisted user IDs."""
+    rng = random.Random(1)
+    return [rng.randrange(10**17, 10**18) for _ in range(n_users)]
+
+
+def make_poi(n_locations: int=500) -> dict:
+    """Minecraft points of interest, in the format of `minecraft/poi.json`."""
+    rng = random.Random(2)
+    words = ["magma", "ravine", "home", "nether", "portal", "village",
+             "stronghold", "mesa", "farm", "mine", "spawner", "temple"]
+    return {
+        f"{' '.join(rng.sample(words, 2))} {i}": [
+            rng.randint(-30000, 30000), rng.randint(0, 255), rng.randint(-30000, 30000)
+        ]
+        for i in range(n_locations)
+    }
+
+
+DATASETS: Dict[str, Callable[[], Any]] = {
+    "trusted": make_trusted,
+    "blacklist": make_blacklist,
+    "poi": make_poi,
+}
+
+
+def bench(func: Callable[[], Any], number: int, repeat: int) -> float:
+    """Best time per call in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    header = f"{'backend':<8} {'file':<10} {'mode':<8} {'size':>9} {'dump (us)':>11} {'load (us)':>11}"
+    print(header)
+    print("-" * len(header))
+
+    datasets = {name: factory() for name, factory in DATASETS.items()}
+    for backend in jsoncodec.available_backends():
+        jsoncodec.set_backend(backend)
+        for name, obj in datasets.items():
+            for compact in (False, True):
+                data = jsoncodec.dumpb(obj, compact=compact)
+                t_dump = bench(lambda: jsoncodec.dumpb(obj, compact=compact), args.number, args.repeat)
+                t_load = bench(lambda: jsoncodec.loads(data), args.number, args.repeat)
+                mode = "compact" if compact else "indent"
+                print(f"{backend:<8} {name:<10} {mode:<8} {len(data):>9} {t_dump:>11.1f} {t_load:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,4 +12,29 @@ CREATE TABLE IF NOT EXISTS "poi" (
 	"z"	REAL NOT NULL,
 	PRIMARY KEY("name")
 );
+CREATE TABLE IF NOT EXISTS "rehost" (
+	"hash"	TEXT NOT NULL,
+	"attachment_url"	TEXT NOT NULL,
+	"size"	INTEGER NOT NULL,
+	"created"	REAL NOT NULL,
+	"last_used"	REAL NOT NULL,
+	PRIMARY KEY("hash")
+);
+CREATE TABLE IF NOT EXISTS "rehost_url" (
+	"url"	TEXT NOT NULL,
+	"hash"	TEXT NOT NULL,
+	PRIMARY KEY("url")
+);
+CREATE TABLE IF NOT EXISTS "user" (
+	"id"	INTEGER NOT NULL,
+	"name"	TEXT,
+	"discriminator"	TEXT,
+	"avatar"	TEXT,
+	"bot"	INTEGER NOT NULL DEFAULT 0,
+	"fetched"	REAL NOT NULL,
+	PRIMARY KEY("id")
+);
+CREATE INDEX IF NOT EXISTS "rehost_last_used" ON "rehost" ("last_used");
+CREATE INDEX IF NOT EXISTS "rehost_url_hash" ON "rehost_url" ("hash");
+CREATE INDEX IF NOT EXISTS "user_fetched" ON "user" ("fetched");
 COMMIT;
@@ -1,4 +1,5 @@
 import sys
+from collections import defaultdict
 from contextlib import suppress
 from typing import List, Optional, Dict, Any
 
@@ -6,11 +7,15 @@ with suppress(ImportError):
     import uvloop
     uvloop.install()
 
+import discord
 from discord.ext.commands import Bot, Cog, Command
 
 from .cogs import COGS
 from .config import load
-from .utils.patching.commands import patch_command_signature
+from .utils import access_control, blacklist, downloads, errorreport, http, members, outbox, paginator, sessions, users
+from .utils.checks import not_blacklisted
+from .utils.help import HelpCache, HelpIndex
+from .utils.patching.commands import clear_signature_cache, patch_command_signature
 from .db import init_db, DatabaseConnection
 
 patch_command_signature(Command)
@@ -19,6 +24,90 @@ class DiscordBot(Bot):
     db: DatabaseConnection
     config: Dict[str, Any]
 
+    def __init__(self, *args, **kwargs) -> None:
+        # Commands are added during Bot.__init__, so these must exist first
+        self._cog_commands: Optional[Dict[Cog, List[Command]]] = None
+        self._help_index: Optional[HelpIndex] = None
+        self.help_cache = HelpCache()
+
+        super().__init__(*args, **kwargs)
+        # Global checks run before arguments are converted
+        self.add_check(not_blacklisted)
+
+    def add_command(self, command: Command) -> None:
+        super().add_command(command)
+        self._on_commands_changed()
+
+    def remove_command(self, name: str) -> Optional[Command]:
+        command = super().remove_command(name)
+        self._on_commands_changed()
+        return command
+
+    def add_cog(self, cog: Cog) -> None:
+        super().add_cog(cog)
+        self._on_commands_changed()
+
+    def remove_cog(self, name: str) -> None:
+        super().remove_cog(name)
+        self._on_commands_changed()
+
+    def _on_commands_changed(self) -> None:
+        """Drops everything derived from the set of registered commands.
+        Called when commands are added or removed, which includes loading
+        and unloading cogs."""
+        self._cog_commands = None
+        self._help_index = None
+        self.help_cache.clear()
+        clear_signature_cache()
+
+    @property
+    def help_index(self) -> HelpIndex:
+        """Lookup index of command and category names used by help commands."""
+        if self._help_index is None:
+            self._help_index = HelpIndex(self)
+        return self._help_index
+
+    def get_cog_commands(self, cog: Cog) -> List[Command]:
+        """Returns top-level commands belonging to a cog.
+
+        Commands are indexed by cog the first time this is called after
+        a command has been added or removed.
+        """
+        if self._cog_commands is None:
+            index = defaultdict(list)
+            for command in self.commands:
+                index[command.cog].append(command)
+            self._cog_commands = dict(index)
+        return self._cog_commands.get(cog, [])
+
+    # Keep member name indexes up to date (see `utils.members`).
+    # Member events are only received with the members intent.
+
+    async def on_member_join(self, member: discord.Member) -> None:
+        members.add_member(member)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        if before.nick != after.nick:
+            members.add_member(after)
+
+    async def on_member_remove(self, member: discord.Member) -> None:
+        members.remove_member(member)
+
+    async def on_user_update(self, before: discord.User, after: discord.User) -> None:
+        if before.name != after.name or before.discriminator != after.discriminator:
+            members.update_user(after)
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        members.remove_guild(guild)
+
+    async def close(self) -> None:
+        paginator.close()
+        await errorreport.close()
+        await outbox.close()
+        await super().close()
+        await http.close()
+        await sessions.close()
+
     def set_db(self, db: DatabaseConnection) -> None:
         """Sets the `db` attribute of bot to an instance of `db.DatabaseConnection`"""
         self.db = db
@@ -33,9 +122,20 @@ def run(config_path: str="config.yml", *, cogs: Optional[List[Cog]]=None) -> Non
     cogs.extend(COGS)
     
     # Bot setup
-    bot = DiscordBot(command_prefix="?", description="De Gode Venners Gamingkrok Bot", pm_help=False)
-    bot.set_config(load())
+    config = load()
+    # The members intent must also be enabled for the bot in the developer portal
+    intents = discord.Intents.default()
+    intents.members = config["discord"].get("members_intent", False)
+    bot = DiscordBot(command_prefix="?", description="De Gode Venners Gamingkrok Bot", pm_help=False, intents=intents)
+    bot.set_config(config)
     bot.set_db(init_db(bot))
+    access_control.setup(bot.config["paths"]["trustedfile"])
+    blacklist.setup(bot.config["paths"]["blacklistfile"])
+    http.setup(**bot.config.get("http", {}))
+    downloads.setup(**bot.config["downloads"].get("governor", {}))
+    sessions.setup(**bot.config.get("sessions", {}))
+    errorreport.setup(**bot.config.get("errors", {}))
+    users.setup(**bot.config.get("user_cache", {}))
 
     # Add cogs
     for cog in cogs:
@@ -3,6 +3,7 @@ import inspect
 import os
 from pathlib import Path
 from collections import namedtuple
+from contextlib import suppress
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from functools import partial
@@ -12,6 +13,8 @@ import discord
 from discord.ext import commands
 
 from .base_cog import BaseCog, EmbedField
+from ..utils.access_control import get_trusted_roles, remove_trusted_role
+from ..utils.broadcast import Broadcast
 from ..utils.checks import admins_only
 from ..utils.exceptions import CommandError
 
@@ -77,6 +80,12 @@ class AdminCog(BaseCog):
         """Called when bot leaves a guild."""
         await self.send_log(f"Left guild {guild.name}", channel_id=self.bot.config["channels"]["history"])
 
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        """Untrusts deleted roles."""
+        if role.id in get_trusted_roles(role.guild.id):
+            remove_trusted_role(role.guild.id, role.id, exist_ok=True)
+
     async def _change_activity(self, activity: str) -> None:
         ac = discord.Game(activity)
         await self.bot.change_presence(activity=ac)
@@ -128,6 +137,9 @@ class AdminCog(BaseCog):
         """
         Attempts to send text message to every server the bot
         is a member of.
+
+        Progress is shown by editing a status message, followed by
+        a summary of guilds the message could not be delivered to.
         
         Parameters
         ----------
@@ -137,14 +149,22 @@ class AdminCog(BaseCog):
             String to send.
         """
         msg = " ".join(msg)
-        guilds = self.bot.guilds
-        for guild in guilds:
-            channel = guild.text_channels[0]
-            try:
-                await channel.send(msg)
-            except:
-                # CBA spamming log channel with every message attempt
-                print(f"Failed to send message to guild {guild.name}")
+        if not msg:
+            raise CommandError("A message is required!")
+
+        bc = Broadcast(self.bot.guilds, msg)
+        status = await ctx.send(bc.format_progress())
+
+        async def on_progress(bc: Broadcast) -> None:
+            with suppress(discord.HTTPException):
+                await status.edit(content=bc.format_progress())
+
+        await bc.run(on_progress)
+        await self.send_embed_message(ctx, "Broadcast summary", bc.format_summary())
+        await self.send_log(
+            f"Broadcast to {bc.total} guilds: {len(bc.delivered)} delivered, "
+            f"{len(bc.failed)} failed, {len(bc.skipped)} skipped"
+        )
 
     @commands.group(name="log", aliases=["logs"])
     async def log(self, ctx: commands.Context) -> None:
@@ -181,7 +201,8 @@ class AdminCog(BaseCog):
     async def post_log(self, ctx: commands.Context, log_name: str=None, encoding: str="utf-8") -> None:
         """Print a log file in its entirety."""
         log = self.get_log_file(log_name)
-        await self.read_send_file(ctx, log, encoding=encoding)
+        # Newest entries are at the end of the file
+        await self.read_send_file(ctx, log, encoding=encoding, tail=True)
 
     @log.command(name="tail")
     async def post_log_tail(self, ctx: commands.Context, log_name: str=None, lines: int=5, encoding="utf8") -> None:
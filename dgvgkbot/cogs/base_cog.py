@@ -1,19 +1,20 @@
+import asyncio
 import hashlib
 import io
 import os.path
 import traceback
 from asyncio import TimeoutError
-from collections import namedtuple
+from collections import OrderedDict, deque, namedtuple
 from datetime import datetime, timedelta
+from functools import partial
 from io import BytesIO
 from pathlib import Path
-from typing import (Any, Callable, Iterable, Iterator, List, Mapping, Optional,
-                    Tuple, Union)
+from typing import (Any, AsyncContextManager, AsyncIterator, Awaitable, BinaryIO, Callable, Iterable, Iterator,
+                    List, Mapping, Optional, Tuple, Union)
 from urllib.parse import urlparse, urlsplit
 
 import aiohttp
 import discord
-import psutil
 from aiofile import AIOFile
 from discord import Embed
 from discord.ext import commands
@@ -23,10 +24,16 @@ from ..utils.exceptions import (VJEMMIE_EXCEPTIONS, BotPermissionError,
                                 CategoryError, CommandError, FileSizeError,
                                 FileTypeError, InvalidVoiceChannel,
                                 NoContextException)
+from ..utils.checkcache import can_run
+from ..utils.downloads import download
 from ..utils.experimental import get_ctx
-from ..utils.http import get
+from ..utils import errorreport, outbox
+from ..utils.http import SingleFlight, get
+from ..utils.outbox import Priority
+from ..utils.paginator import MAX_PAGES, Paginator
+from ..utils.sessions import get_session, guild_session
 from ..utils.time import format_time
-from ..utils.users import get_user
+from ..utils.users import resolve_users
 from ..utils.voting import NotEnoughVotes
 
 md_formats = ['asciidoc', 'autohotkey', 'bash',
@@ -66,6 +73,29 @@ IGNORE_EXCEPTION = [
     TimeoutError
 ]
 
+
+# Default limits of the rehosted image cache.
+# Overridden by the `rehost` section of the config.
+REHOST_MAX_AGE = 86400 # Seconds
+REHOST_MAX_ENTRIES = 10_000
+
+# Uploads in progress, by content hash
+_REHOST_UPLOADS: SingleFlight[str] = SingleFlight(lambda url: url)
+
+
+def _hash_file(f: BinaryIO, chunk_size: int=65536) -> Tuple[str, int]:
+    """Returns SHA-256 hex digest and size of the remaining contents
+    of file `f`, without changing its position."""
+    pos = f.tell()
+    h = hashlib.sha256()
+    size = 0
+    for chunk in iter(partial(f.read, chunk_size), b""):
+        h.update(chunk)
+        size += len(chunk)
+    f.seek(pos)
+    return h.hexdigest(), size
+
+
 class BaseCog(commands.Cog):
     """Base Cog from which all other cogs are subclassed."""
 
@@ -79,6 +109,7 @@ class BaseCog(commands.Cog):
     CHAR_LIMIT = 1800
     EMBED_CHAR_LIMIT = 1000
     EMBED_FILL_CHAR = "\xa0"
+    EMBED_PROTOTYPES_MAX_SIZE = 256
 
     # Style info for help categories
     EMOJI = ":question:"
@@ -92,6 +123,8 @@ class BaseCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        # Embeds with static parts resolved. See `BaseCog.get_embed()`
+        self._embed_prototypes: "OrderedDict[tuple, discord.Embed]" = OrderedDict()
         self.setup()
 
     def setup(self, default_factory: Callable=dict) -> None:
@@ -331,26 +364,38 @@ class BaseCog(commands.Cog):
         discord.Embed
             A Discord embed object that can be sent to a text channel
         """
-        # Create embed object.
-        # Timestamp must be specified on object instantiation
-        opts = {"timestamp":datetime.now()} if timestamp else {}
-        embed = discord.Embed(title=title, description=description, **opts)
+        # The author and color are shared by most embeds of a cog, and are
+        # resolved once and copied for subsequent embeds. Everything else
+        # tends to differ between embeds, and is added to the copy.
+        key = (author, author_url, author_icon, color)
+        try:
+            hash(key)
+        except TypeError: # Unhashable color
+            key = None
+
+        prototype = self._embed_prototypes.get(key) if key else None
+        if prototype is None:
+            prototype = await self._make_embed_prototype(
+                author=author,
+                author_url=author_url,
+                author_icon=author_icon,
+                color=color
+            )
+            if key:
+                self._embed_prototypes[key] = prototype
+                if len(self._embed_prototypes) > self.EMBED_PROTOTYPES_MAX_SIZE:
+                    self._embed_prototypes.popitem(last=False)
+        else:
+            self._embed_prototypes.move_to_end(key)
+
+        embed = prototype.copy()
+        if title is not Embed.Empty:
+            embed.title = str(title)
+        if description is not Embed.Empty:
+            embed.description = str(description)
+        if timestamp:
+            embed.timestamp = datetime.now()
 
-        # Add author details
-        if author:
-            if await self.is_img_url(author_icon):
-                icon_url = author_icon
-            else:
-                icon_url = Embed.Empty
-            embed.set_author(name=author,
-                             url=author_url,
-                             icon_url=icon_url)
-        # Add footer
-        if footer and ctx:
-            embed.set_footer(text=f"Requested by {ctx.message.author.name}",
-                             icon_url=ctx.message.author.avatar_url)
-        # TODO: footer==True fails silently if ctx==None, throw exception
-        
         # Add embed fields
         if fields:
             for field in fields:
@@ -372,6 +417,34 @@ class BaseCog(commands.Cog):
         if thumbnail_url and await self.is_img_url(thumbnail_url):
             embed.set_thumbnail(url=thumbnail_url)
 
+        # Add footer
+        if footer and ctx:
+            embed.set_footer(text=f"Requested by {ctx.message.author.name}",
+                             icon_url=ctx.message.author.avatar_url)
+        # TODO: footer==True fails silently if ctx==None, throw exception
+
+        return embed
+
+    async def _make_embed_prototype(self,
+                                    *,
+                                    author: Optional[str],
+                                    author_url: str,
+                                    author_icon: str,
+                                    color: Optional[Union[str, int, discord.Color]]
+                                    ) -> discord.Embed:
+        """Constructs the static parts of an embed for `BaseCog.get_embed()`."""
+        embed = discord.Embed()
+
+        # Add author details
+        if author:
+            if await self.is_img_url(author_icon):
+                icon_url = author_icon
+            else:
+                icon_url = Embed.Empty
+            embed.set_author(name=author,
+                             url=author_url,
+                             icon_url=icon_url)
+
         # Add color to embed
         if color:
             if not isinstance(color, discord.Color):
@@ -423,14 +496,18 @@ class BaseCog(commands.Cog):
             channel_id = self.bot.config["channels"]["logs"]
 
         try:
-            await self.send_text_message(msg, channel_id=channel_id)
+            await self.send_text_message(msg, channel_id=channel_id, priority=Priority.LOG)
         except discord.Forbidden:
             print(f"Insufficient permissions for channel {channel_id}.")
         except discord.HTTPException:
             print(f"Failed to send message to channel {channel_id}.")
 
     async def log_error(self, ctx: commands.Context, error_msg: str=None) -> None:
-        """Logs command exception to log channel
+        """Logs command exception to log channel.
+
+        Errors are not sent immediately. Repeated errors are counted
+        and reported periodically by `utils.errorreport`, with
+        the full traceback attached as a file.
         
         Parameters
         ----------
@@ -444,16 +521,18 @@ class BaseCog(commands.Cog):
         if not error_msg:
             error_msg = traceback.format_exc()
         
-        # Send traceback
-        await self.send_text_message(error_msg, channel_id=self.bot.config["channels"]["errors"])
+        channel = self.bot.get_channel(self.bot.config["channels"]["errors"])
+        if not channel:
+            print(f"Unable to log error:\n{error_msg}")
+            return
 
-        # Send message that caused error
-        cause_of_error = f"Message that caused error: {ctx.author.name}: {ctx.message.content}" if ctx else ""
-        await self.send_text_message(cause_of_error, channel_id=self.bot.config["channels"]["errors"])
+        # Message that caused error
+        cause_of_error = f"{ctx.author.name}: {ctx.message.content}" if ctx else None
+        errorreport.report(channel, error_msg, cause_of_error)
 
     async def warn_owner(self, message: str) -> None:
         channel = self.bot.get_channel(self.bot.config["channels"]["logs"])
-        await channel.send(f"{self.bot.config['users']['mention']} {message}")
+        await outbox.send(channel, f"{self.bot.config['users']['mention']} {message}")
 
     async def _handle_error(self, ctx: commands.Context, error: Exception) -> None:
         # Show user original error message of these exception types
@@ -495,8 +574,44 @@ class BaseCog(commands.Cog):
             await self.log_error(ctx, traceback_msg) # Send entire exception traceback to log channel
 
     async def get_aiohttp_session(self, ctx: commands.Context) -> aiohttp.ClientSession:
-        """Retrieves per-guild aiohttp.ClientSession session object. 
-        Session is created for the guild if it has no active sessions.
+        """Retrieves the bot's shared aiohttp.ClientSession session object.
+
+        The session is shared by all guilds, and must not be closed.
+        Requests made with it do not hold a request slot of the invoking
+        guild. Prefer `BaseCog.aiohttp_session()`, which does.
+
+        Parameters
+        ----------
+        ctx : `commands.Context`
+            Discord context
+
+        Raises
+        ------
+        `PermissionError`
+            Raised if downloads are disabled in `config.py`
+
+        Returns
+        -------
+        `aiohttp.ClientSession`
+            Shared aiohttp session
+        """
+        if not self.bot.config["downloads"]["allowed"]:
+            raise BotPermissionError("Downloads are not allowed for this bot!")
+        return get_session()
+
+    def aiohttp_session(self, ctx: commands.Context) -> AsyncContextManager[aiohttp.ClientSession]:
+        """Retrieves the bot's shared aiohttp.ClientSession session object
+        for the duration of an `async with` block.
+
+        The block holds one of the invoking guild's request slots
+        (see `utils.sessions.guild_slot()`) to limit the number
+        of concurrent requests per guild.
+
+        Example
+        -------
+        >>> async with self.aiohttp_session(ctx) as session:
+        ...     async with session.get(url) as resp:
+        ...         ...
         
         Parameters
         ----------
@@ -510,39 +625,43 @@ class BaseCog(commands.Cog):
         
         Returns
         -------
-        `aiohttp.ClientSession`
-            aiohttp session for guild
+        `AsyncContextManager[aiohttp.ClientSession]`
+            Shared aiohttp session
         """
 
         # Check if downloads are enabled in config.
         if not self.bot.config["downloads"]["allowed"]:
             raise BotPermissionError("Downloads are not allowed for this bot!")
 
-        # Add bot attribute keeping track of aiohttp ClientSession objects
-        if not hasattr(self.bot, "sessions"):
-            self.bot.sessions = {}
-
-        # Get client session for ctx.guild
-        session = self.bot.sessions.get(ctx.guild.id)
+        return guild_session(ctx.guild.id if ctx.guild else None)
 
-        # Create persistent client session for guild if none exists
-        if not session:
-            session = aiohttp.ClientSession()
-            self.bot.sessions[ctx.guild.id] = session
-
-        return session
-
-    async def download_from_url(self, ctx: commands.Context, url: str) -> io.BytesIO:
-        """Downloads the contents of URL `url` and returns an `io.BytesIO` object.
+    async def download_from_url(self,
+                                ctx: commands.Context,
+                                url: str,
+                                category: Optional[str]=None
+                                ) -> BinaryIO:
+        """Downloads the contents of URL `url` and returns a file-like object.
+
+        The download is streamed to a temporary file, and aborted as soon
+        as it exceeds the configured maximum download size, or as soon
+        as its MIME type is found not to be of category `category`
+        (e.g. "image").
         
         Returns
         -------
-        `io.BytesIO`
-            The downloaded contents of the URL
+        `BinaryIO`
+            The downloaded contents of the URL. Can be passed
+            directly to `discord.File`, but must be closed by the caller.
         """
-        # Check if host responds
+        max_size = self.bot.config["downloads"]["max_size"]
         try:
-            resp = await get(url)
+            return await download(
+                url,
+                max_size,
+                guild_id=ctx.guild.id if ctx.guild else None,
+                user_id=ctx.message.author.id,
+                category=category,
+            )
         except ConnectError:
             raise discord.DiscordException(
                 "No response from destination host. "
@@ -553,23 +672,9 @@ class BaseCog(commands.Cog):
                 f"Failed to download from `{url}`. "
                 "Connection timed out."
         )
-
-        # Check content size
-        content_length = int(resp.headers["Content-Length"])
-        if content_length > self.bot.config["downloads"]["max_size"]:
+        except FileSizeError:
             raise FileSizeError(f"File exceeds maximum limit of {self.MAX_DL_SIZE_FMT}")
 
-        # Check available RAM
-        # TODO: Should keep track of ALL downloads. 
-        # We might start several large downloads concurrently this way
-        if content_length * 2 > psutil.virtual_memory().available:
-            raise MemoryError(f"Not enough memory to download file!")
-
-        # Download content
-        data = await resp.aread()
-
-        return io.BytesIO(data)
-
     async def rehost_image_to_discord(self, ctx: commands.Context, image_url: str) -> discord.Message:
         """Downloads an image file from url `image_url` and uploads it to a
         Discord text channel.
@@ -589,27 +694,24 @@ class BaseCog(commands.Cog):
         channel = self.bot.get_channel(self.bot.config["channels"]["images"])
 
         # Check if url has an image extension
-        file_name, ext = await self.get_filename_extension_from_url(image_url)
-        if ext.lower() not in self.IMAGE_EXTENSIONS:
-            raise FileTypeError("Attempted to upload a non-image file")
-
-        # Get file-like bytes stream (io.BytesIO)
-        file_bytes = await self.download_from_url(ctx, image_url)
+        filename = await self._get_image_filename(image_url)
 
-        # Upload image
-        f = discord.File(file_bytes, f"{file_name}.{ext}")
-        msg = await channel.send(file=f)
+        # Get file-like bytes stream
+        with await self.download_from_url(ctx, image_url, "image") as file_bytes:
+            # Upload image
+            f = discord.File(file_bytes, filename)
+            msg = await channel.send(file=f)
 
         # Return message referencing image
         return msg
 
-    async def upload_bytes_obj_to_discord(self, data: io.BytesIO, filename: str) -> discord.Message:
-        """Uploads a file-like io.BytesIO stream as a 
-        Discord file attachment
+    async def upload_bytes_obj_to_discord(self, data: BinaryIO, filename: str) -> discord.Message:
+        """Uploads a file-like byte stream as a 
+        Discord file attachment. `data` is closed afterwards.
         
         Parameters
         ----------
-        data : `io.BytesIO`
+        data : `BinaryIO`
             File-like byte stream
         
         filename : `str`
@@ -624,45 +726,146 @@ class BaseCog(commands.Cog):
 
         channel = self.bot.get_channel(self.bot.config["channels"]["images"])
 
-        f = discord.File(data, filename)
-        msg = await channel.send(file=f)
+        with data:
+            f = discord.File(data, filename)
+            msg = await channel.send(file=f)
 
         return msg # Could do return await.channel.send(), but I think this is more self documenting
 
+    async def _get_image_filename(self, image_url: str) -> str:
+        file_name, ext = await self.get_filename_extension_from_url(image_url)
+        if ext.lower() not in self.IMAGE_EXTENSIONS:
+            raise FileTypeError("Attempted to upload a non-image file")
+        return f"{file_name}{ext}"
+
+    async def get_rehosted_image_url(self, ctx: commands.Context, image_url: str) -> str:
+        """Cached version of `BaseCog.rehost_image_to_discord()`.
+
+        Returns the attachment URL of the rehosted image instead of
+        the message it was uploaded in. Skips both download and upload
+        if the URL has already been rehosted.
+        """
+        max_age, _ = self._get_rehost_limits()
+        url = await self.bot.db.get_rehost_by_url(image_url, max_age)
+        if url:
+            return url
+
+        filename = await self._get_image_filename(image_url)
+        data = await self.download_from_url(ctx, image_url, "image")
+        return await self._rehost_file(data, filename, source_url=image_url)
+
+    async def get_uploaded_image_url(self, data: BinaryIO, filename: str) -> str:
+        """Cached version of `BaseCog.upload_bytes_obj_to_discord()`.
+
+        Returns the attachment URL of the uploaded file instead of
+        the message it was uploaded in. Skips the upload if a file with
+        identical contents has already been uploaded.
+        """
+        return await self._rehost_file(data, filename)
+
+    def _get_rehost_limits(self) -> Tuple[float, int]:
+        cfg = self.bot.config.get("rehost", {})
+        return (
+            cfg.get("max_age", REHOST_MAX_AGE),
+            cfg.get("max_entries", REHOST_MAX_ENTRIES)
+        )
+
+    async def _rehost_file(self,
+                           data: BinaryIO,
+                           filename: str,
+                           source_url: Optional[str]=None
+                           ) -> str:
+        """Uploads `data` to the images channel, unless a file with
+        identical contents has already been uploaded.
+        `data` is closed in either case.
+
+        Files with identical contents being rehosted at the same time
+        (e.g. several first-time rehosts of the same URL) are only
+        uploaded once."""
+        max_age, max_entries = self._get_rehost_limits()
+        uploading = False
+
+        def upload() -> Awaitable[str]:
+            nonlocal uploading
+            uploading = True # Closed by the upload, which can outlive this call
+            return self._upload_rehost(data, filename, digest, size, max_age, max_entries)
+
+        try:
+            digest, size = await self.bot.loop.run_in_executor(None, _hash_file, data)
+            url = await self.bot.db.get_rehost_by_hash(digest, max_age)
+            if not url:
+                url = await _REHOST_UPLOADS.run(digest, upload)
+        finally:
+            if not uploading:
+                data.close()
+
+        if source_url:
+            await self.bot.db.add_rehost_url(source_url, digest)
+        return url
+
+    async def _upload_rehost(self,
+                             data: BinaryIO,
+                             filename: str,
+                             digest: str,
+                             size: int,
+                             max_age: float,
+                             max_entries: int
+                             ) -> str:
+        msg = await self.upload_bytes_obj_to_discord(data, filename)
+        url = msg.attachments[0].url
+        await self.bot.db.save_rehost(digest, url, size)
+        await self.bot.db.prune_rehosts(max_age, max_entries)
+        return url
+
     async def _get_cog_commands(self, ctx: commands.Context, advanced: bool=False) -> str:
-        """Sends an embed listing all commands belonging the cog.
+        """Returns the cog's command listing for the invoker of `ctx`.
 
-        The method compiles a list of commands defined by the invoking cog,
-        after which the list elements are string-formatted and added to
-        an embed sent to the Discord channel `ctx.message.author.channel`.
+        The listing of every command of the cog is rendered by
+        `BaseCog._render_cog_commands()` and cached until commands are added
+        or removed. Commands the invoker cannot run are left out every time
+        the listing is served.
+        """
+        listing = await self.bot.help_cache.get_or_render(
+            ("cog", self.cog_name, advanced),
+            partial(self._render_cog_commands, advanced)
+        )
+        invokable = set(await self.get_invokable_commands(ctx))
+        out_str = "\n".join(text for command, text in listing if command in invokable)
 
-        NOTE
-        ----
-        This method should only be invoked through a bot command. 
-        Argument `ctx` is required to have the `message.author.channel`
-        attribute.
+        if advanced and out_str:
+            # Add command signature legend string if advanced output is enabled
+            out_str = self.SIGNATURE_HELP + out_str
+
+        return out_str
+
+    async def _render_cog_commands(self, advanced: bool=False) -> List[Tuple[commands.Command, str]]:
+        """Creates a listing of all commands belonging the cog.
+
+        The method compiles a list of commands defined by the invoking cog,
+        after which each command and its subcommands are string-formatted
+        and joined by newlines. The listing does not depend on who can run
+        the commands.
 
         Parameters
         ----------
-        ctx : `commands.Context`
-            Discord Context object
         advanced : `bool`, optional
             Defines whether the command listing should display calling
             signatures or not. (the default is False, which ommits signatures)
+
+        Returns
+        -------
+        `List[Tuple[commands.Command, str]]`
+            Listing of each command, sorted by command name.
         """
         # Get commands for current cog
         # NOTE: Replace with walk_commands() to get subcommands?
-        commands_ = await self.get_invokable_commands(ctx)
+        commands_ = [cmd for cmd in self.bot.get_cog_commands(self) if not cmd.hidden]
         commands_ = sorted(commands_, key=lambda cmd: cmd.name)
 
         # Get commands as string of command names + descriptions, separated by newlines
-        out = []
+        listing = []
         for command in commands_:
-
-            # Skip commands that fail for current context or are hidden
-            if not await command.can_run(ctx) or command.hidden or not command.enabled:
-                continue
-
+            out = []
             group = False
 
             if isinstance(command, commands.Group):
@@ -698,13 +901,9 @@ class BaseCog(commands.Cog):
 
                 out.append(f"`{indent}{prefix}{cmd_name}{padding}:` {doc}")
 
-        out_str = "\n".join(out)
+            listing.append((command, "\n".join(out)))
 
-        if advanced and out_str:
-            # Add command signature legend string if advanced output is enabled
-            out_str = self.SIGNATURE_HELP + out_str
-
-        return out_str
+        return listing
 
     async def send_cog_commands(self, ctx: commands.Context, advanced: bool=False) -> None:
         out = await self._get_cog_commands(ctx, advanced)
@@ -716,11 +915,17 @@ class BaseCog(commands.Cog):
                                 text: str,
                                 ctx: Optional[commands.Context]=None,
                                 *,
-                                channel_id: Optional[int]=None) -> None:
+                                channel_id: Optional[int]=None,
+                                priority: Optional[Priority]=None) -> None:
         """
         Sends an arbitrarily long string as one or more messages to a channel.
         String is split into multiple messages if length of string exceeds 
         Discord text message character limit.
+
+        Messages are sent through the outbox (see `utils.outbox`). A string
+        that fits in a single message may be merged with other small messages
+        queued for the same channel. The chunks of a split string are never
+        merged, so the string is sent exactly as given.
         
         Parameters
         ----------
@@ -730,6 +935,9 @@ class BaseCog(commands.Cog):
             String to post to channel
         channel_id : `Optional[int]`, optional
             Optional channel ID if target channel is not part of the context.
+        priority : `Optional[Priority]`, optional
+            Outbox priority. Defaults to `Priority.REPLY` if `ctx`
+            is given, otherwise `Priority.NORMAL`.
         """
         # Obtain channel
         if ctx:
@@ -739,12 +947,19 @@ class BaseCog(commands.Cog):
         else:
             raise discord.DiscordException('"ctx" or "channel_id" must be specified')
 
+        if priority is None:
+            priority = Priority.REPLY if ctx else Priority.NORMAL
+
         # Split string into chunks
         chunks = await self._split_string_to_chunks(text)
 
-        # Send chunked messages
-        for chunk in chunks:
-            await channel.send(chunk)
+        # Queue all chunks at once, so they are sent in order.
+        # Merging the chunks again would insert separators into the text.
+        coalesce = len(chunks) == 1
+        await asyncio.gather(*[
+            outbox.send(channel, chunk, priority=priority, coalesce=coalesce)
+            for chunk in chunks
+        ])
 
     async def _split_string_to_chunks(self, text: str, limit: int=None) -> List[str]:
         """Splits a string into (default: 1800) char long chunks."""
@@ -762,39 +977,51 @@ class BaseCog(commands.Cog):
         """
         if not limit or limit > self.EMBED_CHAR_LIMIT:
             limit = self.EMBED_CHAR_LIMIT
-        
+        return list(self._iter_string_by_lines(text, limit, strict))
+
+    def _iter_string_by_lines(self, text: str, limit: int, strict: bool=False) -> Iterator[str]:
+        """Generator version of `BaseCog._split_string_by_lines()`.
+
+        Chunks are yielded as soon as they are complete. Lines whose length
+        exceeds `limit` are split into `limit`-sized pieces, unless `strict`
+        is True, in which case an exception is raised.
+        """
         if len(text) < limit: # no need to split
-            return [text]
-        
-        chunk = "" # Lines in a chunk
+            yield text
+            return
+
+        lines: List[str] = [] # Lines in current chunk
         chunk_len = 0 # Size of current chunk
-        chunks = []
-        
+
         for line in text.splitlines(keepends=True):
             line_len = len(line)
-            
+
             # Handle lines whose length exceeds limit
             if line_len > limit:
                 if strict:
                     raise discord.DiscordException(
                         "Unable to split string. Line length exceeds limit!"
                     )
-                else: # Fall back on _split_string_to_chunks()
-                    return await self._split_string_to_chunks(text, limit)
-            
-            if chunk_len + line_len > limit:
-                chunks.append(chunk)
-                chunk = ""
+                if lines:
+                    yield "".join(lines)
+                for i in range(0, line_len - limit, limit):
+                    yield line[i:i+limit]
+                # Remainder of line starts the next chunk
+                line = line[(line_len - 1) // limit * limit:]
+                lines = []
                 chunk_len = 0
-            
-            chunk += line
+                line_len = len(line)
+
+            elif chunk_len + line_len > limit:
+                yield "".join(lines)
+                lines = []
+                chunk_len = 0
+
+            lines.append(line)
             chunk_len += line_len
-        
-        else:
-            if chunk:
-                chunks.append(chunk)
-        
-        return chunks
+
+        if lines:
+            yield "".join(lines)
 
     async def send_embed_message(self,
                                  ctx: commands.Context,
@@ -803,13 +1030,16 @@ class BaseCog(commands.Cog):
                                  limit: int=None,
                                  message_text: str=None,
                                  footer: bool=True,
-                                 keep_title: bool=False,
                                  channel: commands.TextChannelConverter=None,
                                  **kwargs
                                  ) -> None:
         """Splits a string into <=1024 char chunks and creates an
         embed object from each chunk, which are then sent to 
-        ctx.channel.
+        ctx.channel as pages of a single message. The pages are
+        turned with reactions. See `utils.paginator`.
+
+        The first page is sent as soon as it is built, while
+        the rest of the pages are still being built.
         
         Parameters
         ----------
@@ -824,71 +1054,90 @@ class BaseCog(commands.Cog):
         message_text : str, optional
             Message text displayed above embeds.
         footer : bool, optional
-            Display footer on last embed
-        keep_title : bool, optional
-            Display title on every embed, by default False
+            Display footer on every page
         channel : commands.TextChannelConverter, optional
             Channel to post message to, by default ctx.message.author.channel
         """
-        embeds = await self._make_embed_message(ctx, title, description, limit, message_text, footer, keep_title, **kwargs)
-
-        # Send each embed object to ctx.channel
-        if channel:
-            ctx = channel
+        pages = self._iter_embed_pages(ctx, title, description, limit, footer, **kwargs)
+        paginator = Paginator([await pages.__anext__()], user_id=ctx.message.author.id)
+        await paginator.start(self.bot, channel or ctx, message_text, more=pages)
 
-        for embed in embeds:
-            # Add message text to first message
-            if embed == embeds[0]:
-                await ctx.send(content=message_text, embed=embed)
-            else:
-                await ctx.send(embed=embed)
-
-    async def _make_embed_message(self,
-                                  ctx: commands.Context,
-                                  title: str,
-                                  description: str,
-                                  limit: int=None,
-                                  message_text: str=None,
-                                  footer: bool=True,
-                                  keep_title: bool=False,
-                                  **kwargs
+    async def _make_embed_pages(self,
+                                ctx: commands.Context,
+                                title: str,
+                                description: str,
+                                limit: int=None,
+                                footer: bool=True,
+                                **kwargs
                                 ) -> List[discord.Embed]:
-        # Split text by line
+        """List version of `BaseCog._iter_embed_pages()`."""
+        return [
+            page async for page in
+            self._iter_embed_pages(ctx, title, description, limit, footer, **kwargs)
+        ]
+
+    async def _iter_embed_pages(self,
+                                ctx: commands.Context,
+                                title: str,
+                                description: str,
+                                limit: int=None,
+                                footer: bool=True,
+                                *,
+                                code_block: bool=False,
+                                tail: bool=False,
+                                **kwargs
+                                ) -> AsyncIterator[discord.Embed]:
+        """Splits `description` by lines into at most `paginator.MAX_PAGES`
+        embeds, each with the title and footer, and yields each embed as
+        soon as it is built. Text that does not fit is cut off from the end,
+        or from the start if `tail` is True. The last pages are only known
+        once all of the text is split, so `tail` delays the first page.
+        """
         if not limit or limit > self.EMBED_CHAR_LIMIT:
             limit = self.EMBED_CHAR_LIMIT
 
-        text_fields = await self._split_string_by_lines(description, limit)
-        
-        if len(text_fields) > 1:
-            t = title if keep_title else Embed.Empty
-            embeds = [
-                # Include header but no footer on first message
-                await self.get_embed(ctx, title=title, description=field, footer=False, **kwargs)
-                if text_fields[0] == field else
-                # Include footer but no header on last message
-                await self.get_embed(ctx, title=t, description=field, footer=footer, **kwargs)
-                if text_fields[-1] == field else
-                # No footer or header on middle message(s)
-                await self.get_embed(ctx, title=t, description=field, footer=False, **kwargs)
-                for field in text_fields
-            ]
-        else:
-            # Create normal embed with title and footer if text is not chunked
-            embeds = [
-                await self.get_embed(
-                    ctx,
-                    title=title,
-                    description=text_fields[0],
-                    footer=footer,
-                    **kwargs)
-            ]
-        
-        return embeds  
-
-    async def read_send_file(self, ctx: commands.Context, path: Union[str, Path], *, encoding: str="utf-8") -> None:
-        """Reads local text file and sends contents to `ctx.channel`"""
+        chunks: Iterator[str] = self._iter_string_by_lines(description, limit)
+        truncated = False
+        if tail:
+            # Keep the last chunks
+            last_chunks = deque(chunks, maxlen=MAX_PAGES + 1)
+            truncated = len(last_chunks) > MAX_PAGES
+            if truncated:
+                last_chunks.popleft()
+            chunks = iter(last_chunks)
+
+        # Look one chunk ahead to find the last page.
+        # Splitting stops once there are more chunks than pages.
+        chunk = next(chunks)
+        for page in range(MAX_PAGES):
+            next_chunk = next(chunks, None)
+            last = next_chunk is None or page == MAX_PAGES - 1
+            if code_block:
+                chunk = f"```\n{chunk}\n```"
+            if truncated and page == 0:
+                chunk = f"*Output truncated*\n{chunk}"
+            elif last and next_chunk is not None:
+                chunk += "\n*Output truncated*"
+            yield await self.get_embed(ctx, title=title, description=chunk, footer=footer, **kwargs)
+            if last:
+                return
+            chunk = next_chunk
+
+    async def read_send_file(self,
+                             ctx: commands.Context,
+                             path: Union[str, Path],
+                             *,
+                             encoding: str="utf-8",
+                             tail: bool=False) -> None:
+        """Reads local text file and sends contents to `ctx.channel`
+        as pages of a single message. If the file does not fit,
+        its end is sent if `tail` is True, otherwise its start."""
         async with AIOFile(path, "r", encoding=encoding) as f:
-            await self.send_text_message(await f.read(), ctx)
+            contents = await f.read()
+        if not contents:
+            raise CommandError(f"`{Path(path).name}` is empty!")
+        pages = await self._make_embed_pages(ctx, Path(path).name, contents, code_block=True, tail=tail)
+        await Paginator(pages, user_id=ctx.message.author.id).start(self.bot, ctx)
 
     def generate_hex_color_code(self, phrase: str, *, as_int: bool=True) -> Union[str, int]:
         """Generates a 24 bit hex color code from a user-defined phrase."""
@@ -987,7 +1236,7 @@ class BaseCog(commands.Cog):
 
     async def get_embed_from_img_upload(self,
                                         ctx: commands.Context,
-                                        to_upload: Union[io.BytesIO, str],
+                                        to_upload: Union[BinaryIO, str],
                                         filename: Optional[str]=None
                                         ) -> discord.Embed:
         """Uploads an image to Discord from a URL or a file-like object 
@@ -997,7 +1246,7 @@ class BaseCog(commands.Cog):
         ----------
         ctx : `commands.Context`
             Discord context
-        to_upload : `Union[io.BytesIO, str]`
+        to_upload : `Union[BinaryIO, str]`
             Image to upload
         filename : `Optional[str]`, optional
             Filename + extension of image. 
@@ -1013,7 +1262,7 @@ class BaseCog(commands.Cog):
         `ValueError`
             Raised if `filename` does not contain a file extension.
         `TypeError`
-            Raised if `to_upload` is neither type `str` nor `io.BytesIO`.
+            Raised if `to_upload` is neither type `str` nor a file-like object.
         
         Returns
         -------
@@ -1022,14 +1271,13 @@ class BaseCog(commands.Cog):
         """
         if isinstance(to_upload, str):
             # String must be an image URL
-            if not self.is_img_url(to_upload):
+            if not await self.is_img_url(to_upload):
                 raise ValueError("String must be URL to an image file!")
 
             # Upload image to bot's image rehosting channel
-            msg = await self.rehost_image_to_discord(ctx, to_upload)
-            url = msg.attachments[0].url
+            url = await self.get_rehosted_image_url(ctx, to_upload)
 
-        elif isinstance(to_upload, io.BytesIO):
+        elif hasattr(to_upload, "read"):
             # Check if filename is passed in
             if not filename:
                 raise TypeError(
@@ -1044,11 +1292,10 @@ class BaseCog(commands.Cog):
                     )
 
             # Upload image and get URL from resulting bot message
-            msg = await self.upload_bytes_obj_to_discord(to_upload, filename)
-            url = msg.attachments[0].url
+            url = await self.get_uploaded_image_url(to_upload, filename)
 
         else:
-            raise TypeError('Argument "to_upload" must be type <io.BytesIO> or <str>')
+            raise TypeError('Argument "to_upload" must be a file-like object or type <str>')
 
         # Create discord Embed object using obtained URL of image
         return await self.get_embed(ctx, image_url=url)
@@ -1063,12 +1310,13 @@ class BaseCog(commands.Cog):
         return ctx
 
     async def get_invokable_commands(self, ctx) -> List[commands.Command]:
+        """Returns the cog's commands that are visible to and can be run by
+        the invoker of `ctx`. Check results are cached, see `utils.checkcache`."""
         return [
-            command for command in self.bot.commands
-            if command.cog == self
-            and not command.hidden 
+            command for command in self.bot.get_cog_commands(self)
+            if not command.hidden 
             and command.enabled
-            and await command.can_run(ctx)
+            and await can_run(command, ctx)
         ]
 
     async def filter_user_mapping(self, 
@@ -1095,11 +1343,9 @@ class BaseCog(commands.Cog):
         
         # Get discord.User objects if keys are int or str
         if any(isinstance(first_key, t) for t in [int, str]):
-            mapping = [
-                # Try to retrieve users from bot's cache, otherwise fetch from API
-                (await get_user(self.bot, int(k)), v) 
-                for k, v in mapping
-            ] 
+            # Try to retrieve users from bot's cache, otherwise fetch from API
+            users = await resolve_users(self.bot, (k for k, _ in mapping))
+            mapping = [(users[int(k)], v) for k, v in mapping]
         # Filter users who cannot be found
         l = list(filter(lambda m: None.__ne__(m[0]), mapping))
         
@@ -4,12 +4,12 @@ from typing import Optional, Any
 import discord
 from discord.ext import commands
 import mcstatus
-import httpx
 from httpcore._exceptions import ConnectError, ConnectTimeout
 
 from .base_cog import BaseCog
 from ..utils.converters import IPAddressConverter
 from ..utils.exceptions import CommandError
+from ..utils.http import get
 from ..utils.serialize import dump_json, load_json
 
 
@@ -35,7 +35,7 @@ class MinecraftCog(BaseCog):
         
     async def _get_ip(self) -> Optional[str]:
         try:
-            r = httpx.get("http://mcserver:4040/api/tunnels")
+            r = await get("http://mcserver:4040/api/tunnels", cache=True)
             d = r.json()
             url = d["tunnels"][0]["public_url"].split("tcp://")[1]   
         except (ConnectError, ConnectTimeout):
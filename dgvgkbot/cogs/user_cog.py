@@ -8,6 +8,7 @@ from discord.ext import commands
 
 from .base_cog import BaseCog, EmbedField
 from ..utils.converters import BoolConverter
+from ..utils.downloads import get_governor
 from ..utils.exceptions import CategoryError, CogError, CommandError
 
 
@@ -29,19 +30,29 @@ class UserCog(BaseCog):
                 f"`{self.bot.command_prefix}categories` to get a list of categories."
                 )
         
-        # Check if cmd_or_category is a command
-        try:
-            await ctx.invoke(self.help_command, cmd_or_category)
-        except CommandError:
-            pass
+        # Commands take precedence over categories with the same name
+        entry = self.bot.help_index.get(cmd_or_category)
+        if not entry:
+            raise CommandError(
+                f"No command or category named `{cmd_or_category}`."
+                f"{self._get_suggestions(cmd_or_category)}"
+            )
+
+        if entry.command:
+            await ctx.invoke(self.help_command, entry.name)
         else:
-            return
-
-        # Check if cmd_or_category is a category if previous attempt failed
-        try:
-            await ctx.invoke(self.help_category, cmd_or_category, advanced)
-        except CommandError:
-            raise CommandError(f"No command or category named `{cmd_or_category}`")
+            await ctx.invoke(self.help_category, entry.name, advanced)
+
+    def _get_suggestions(self, query: str) -> str:
+        """Returns a "did you mean" string of commands and categories resembling `query`."""
+        suggestions = self.bot.help_index.suggest(query)
+        if not suggestions:
+            return ""
+        names = ", ".join(
+            f"`{self.bot.command_prefix}{entry.name}`" if entry.command else f"`{entry.name}`"
+            for entry in suggestions
+        )
+        return f" Did you mean {names}?"
 
     @commands.command(name="category")
     async def help_category(self, ctx: commands.Context, cog_name: str=None, advanced: BoolConverter(["advanced"])=False):
@@ -49,8 +60,8 @@ class UserCog(BaseCog):
         # We refer to cogs as categories to users 
         for cog in await self.get_cogs():
             if cog_name.lower() == cog.cog_name.lower():
-                cmds = await cog.get_invokable_commands(ctx)
-                if not cmds:
+                # Listing is cached, so send_cog_commands() does not render it again
+                if not await cog._get_cog_commands(ctx, advanced):
                     raise CommandError("Category has no associated commands!")
                 return await cog.send_cog_commands(ctx, advanced)
         
@@ -76,7 +87,14 @@ class UserCog(BaseCog):
         cmd = self.bot.get_command(command)
 
         if not cmd:
-            raise CommandError(f"`{self.bot.command_prefix}{command}` not found!")
+            # Fall back on case-insensitive lookup
+            entry = self.bot.help_index.get(command)
+            if not entry or not entry.command:
+                raise CommandError(
+                    f"`{self.bot.command_prefix}{command}` not found!"
+                    f"{self._get_suggestions(command)}"
+                )
+            cmd = entry.command
 
         _cmd_name = f"{self.bot.command_prefix}{cmd.qualified_name}"
 
@@ -98,10 +116,10 @@ class UserCog(BaseCog):
             description.append(subcommands)
 
         # Number of times the command has been used in the guild
-        description.append(f"**Times used:** {self.get_command_usage(ctx, command)}")
+        description.append(f"**Times used:** {self.get_command_usage(ctx, cmd.name)}")
 
         # Top user of the command
-        top_users = self.bot.get_cog("StatsCog").get_top_command_users(ctx.guild.id, command, limit=10)
+        top_users = self.bot.get_cog("StatsCog").get_top_command_users(ctx.guild.id, cmd.name, limit=10)
         if top_users:
             # Iterate until a valid user is found (our top user might have left the server)
             for user_id, n_used in top_users.items():
@@ -124,6 +142,13 @@ class UserCog(BaseCog):
                             advanced: BoolConverter(["advanced", "y", "args"])=False
                             ) -> None:
         """Display all bot commands."""
+        out = await self._render_commands(ctx, advanced)
+        if not out:
+            raise CommandError("No commands are available!")
+
+        await self.send_embed_message(ctx, "Commands", out, color="red")
+
+    async def _render_commands(self, ctx: commands.Context, advanced: bool) -> str:
         l = []
         for cog in await self.get_cogs():
             # Ignore cogs returning no commands due to failed checks or lack of commands
@@ -133,14 +158,13 @@ class UserCog(BaseCog):
                 l.append(f"{cog.EMOJI} **{cog.cog_name}**\n_{cog.__doc__}_\n{cmds}\n")
 
         if not l:
-            raise CommandError("No commands are available!")
+            return ""
 
         out = "\n".join(l)
         if advanced:
             # Add command signature legend to top of embed if advanced output is enabled
             out = self.SIGNATURE_HELP + out
-
-        await self.send_embed_message(ctx, "Commands", out, color="red")
+        return out
 
 
     @commands.command(name="invite", aliases=["get_invite"])
@@ -178,6 +202,9 @@ class UserCog(BaseCog):
         mem_total_mb = round(mem.total / 1000000)
         mem_used_mb = round(mem.used / 1000000)
 
+        # Downloads
+        dls = get_governor().stats
+
 
         p = self.bot.command_prefix
         fields = [
@@ -187,6 +214,7 @@ class UserCog(BaseCog):
             EmbedField(name="Useful commands", value=f"`{p}help`, `{p}commands`, `{p}categories`, `{p}changelog`"),
             EmbedField(name="Memory usage", value=f"{mem_used_mb} / {mem_total_mb} MB"),
             EmbedField(name="CPU Usage", value=f"{psutil.cpu_percent()}%"),
+            EmbedField(name="Downloads", value=f"{dls.active} active, {dls.queued} queued, {dls.rejected} rejected"),
             EmbedField(name="Uptime", value=self.bot.get_cog("StatsCog").get_bot_uptime(type=str)),
         ]
 
@@ -6,6 +6,7 @@ from __future__ import annotations
 import asyncio
 import random
 import sqlite3
+import time
 from typing import Tuple, List, Dict, Callable, Any, Iterable, Optional
 from dataclasses import dataclass
 
@@ -97,4 +98,148 @@ class DatabaseConnection:
             WHERE name==?
             """, ("home")
         )
-        return self.cursor.fetchone()
\ No newline at end of file
+        return self.cursor.fetchone()
+
+    # Rehosted files
+    #
+    # Files uploaded to the images channel are stored by the hash of their
+    # contents. Source URLs point to a hash, so identical files downloaded
+    # from different URLs are only uploaded (and stored) once.
+
+    async def get_rehost_by_url(self, url: str, max_age: float) -> Optional[str]:
+        """Returns the attachment URL of a file previously rehosted from `url`,
+        if rehosted less than `max_age` seconds ago."""
+        return await self.write(self._get_rehost, """
+            SELECT r.hash, r.attachment_url
+            FROM `rehost_url` u
+            JOIN `rehost` r ON r.hash == u.hash
+            WHERE u.url == ? AND r.created >= ?
+            """, url, max_age
+        )
+
+    async def get_rehost_by_hash(self, digest: str, max_age: float) -> Optional[str]:
+        """Returns the attachment URL of a previously uploaded file with
+        the content hash `digest`, if uploaded less than `max_age` seconds ago."""
+        return await self.write(self._get_rehost, """
+            SELECT hash, attachment_url
+            FROM `rehost`
+            WHERE hash == ? AND created >= ?
+            """, digest, max_age
+        )
+
+    def _get_rehost(self, query: str, key: str, max_age: float) -> Optional[str]:
+        now = time.time()
+        self.cursor.execute(query, (key, now - max_age))
+        r = self.cursor.fetchone()
+        if not r:
+            return None
+        self.cursor.execute("UPDATE `rehost` SET last_used = ? WHERE hash == ?", (now, r[0]))
+        return r[1]
+
+    async def save_rehost(self,
+                          digest: str,
+                          attachment_url: str,
+                          size: int,
+                          url: Optional[str]=None) -> None:
+        """Saves the attachment URL of an uploaded file with content hash
+        `digest`, and optionally the source URL it was downloaded from."""
+        return await self.write(self._save_rehost, digest, attachment_url, size, url)
+
+    def _save_rehost(self, digest: str, attachment_url: str, size: int, url: Optional[str]) -> None:
+        now = time.time()
+        self.cursor.execute("""
+            INSERT OR REPLACE INTO `rehost` (hash, attachment_url, size, created, last_used)
+            VALUES (?, ?, ?, ?, ?)
+            """, (digest, attachment_url, size, now, now)
+        )
+        self._add_rehost_url(url, digest)
+
+    async def add_rehost_url(self, url: str, digest: str) -> None:
+        """Points source URL `url` to an already uploaded file."""
+        return await self.write(self._add_rehost_url, url, digest)
+
+    def _add_rehost_url(self, url: Optional[str], digest: str) -> None:
+        if url:
+            self.cursor.execute(
+                "INSERT OR REPLACE INTO `rehost_url` (url, hash) VALUES (?, ?)",
+                (url, digest)
+            )
+
+    async def prune_rehosts(self, max_age: float, max_entries: int) -> None:
+        """Removes rehosted files older than `max_age` seconds, then the least
+        recently used files until at most `max_entries` remain."""
+        return await self.write(self._prune_rehosts, max_age, max_entries)
+
+    def _prune_rehosts(self, max_age: float, max_entries: int) -> None:
+        self.cursor.execute("DELETE FROM `rehost` WHERE created < ?", (time.time() - max_age,))
+        self.cursor.execute("""
+            DELETE FROM `rehost`
+            WHERE hash NOT IN (
+                SELECT hash FROM `rehost` ORDER BY last_used DESC LIMIT ?
+            )
+            """, (max_entries,)
+        )
+        self.cursor.execute("""
+            DELETE FROM `rehost_url`
+            WHERE hash NOT IN (SELECT hash FROM `rehost`)
+            """
+        )
+
+    # Cached users
+    #
+    # Users fetched from the API are stored with the time they were fetched.
+    # Users that do not exist are stored with a NULL name, so they are not
+    # fetched again either.
+
+    async def get_users(self,
+                        user_ids: List[int],
+                        max_age: float,
+                        not_found_max_age: float
+                        ) -> List[Tuple[int, Optional[str], Optional[str], Optional[str], bool]]:
+        """Returns `(id, name, discriminator, avatar, bot)` rows of cached users
+        fetched less than `max_age` seconds ago. Users that were not found
+        are returned with name None if looked up less than
+        `not_found_max_age` seconds ago."""
+        return await self.read(self._get_users, user_ids, max_age, not_found_max_age)
+
+    def _get_users(self,
+                   user_ids: List[int],
+                   max_age: float,
+                   not_found_max_age: float
+                   ) -> List[Tuple[int, Optional[str], Optional[str], Optional[str], bool]]:
+        now = time.time()
+        rows = []
+        # Stay below SQLite's limit on the number of query parameters
+        for i in range(0, len(user_ids), 500):
+            chunk = user_ids[i:i+500]
+            self.cursor.execute(f"""
+                SELECT id, name, discriminator, avatar, bot
+                FROM `user`
+                WHERE id IN ({", ".join("?" * len(chunk))})
+                AND fetched >= CASE WHEN name IS NULL THEN ? ELSE ? END
+                """, (*chunk, now - not_found_max_age, now - max_age)
+            )
+            rows.extend((r[0], r[1], r[2], r[3], bool(r[4])) for r in self.cursor.fetchall())
+        return rows
+
+    async def save_users(self,
+                         users: Iterable[Tuple[int, Optional[str], Optional[str], Optional[str], bool]]
+                         ) -> None:
+        """Saves `(id, name, discriminator, avatar, bot)` rows of fetched users.
+        Users that were not found are saved with name None."""
+        return await self.write(self._save_users, list(users))
+
+    def _save_users(self, users: List[Tuple[int, Optional[str], Optional[str], Optional[str], bool]]) -> None:
+        now = time.time()
+        self.cursor.executemany("""
+            INSERT OR REPLACE INTO `user` (id, name, discriminator, avatar, bot, fetched)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, [(*user, now) for user in users]
+        )
+
+    async def prune_users(self, max_age: float) -> None:
+        """Removes users fetched more than `max_age` seconds ago."""
+        return await self.write(self._prune_users, max_age)
+
+    def _prune_users(self, max_age: float) -> None:
+        self.cursor.execute("DELETE FROM `user` WHERE fetched < ?", (time.time() - max_age,))
\ No newline at end of file
@@ -1,42 +1,114 @@
 from collections import defaultdict
 from enum import Enum
 from functools import partial
-from typing import DefaultDict, Optional, Union
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Union
 
-from .caching import get_cached
-from .json import dump_json_blocking
+import discord
+
+from .caching import FileIndex
 
 DEFAULT = list
 
-TRUSTED_PATH = "NYI"
+TRUSTED_PATH = "NYI" # Replaced by the `paths.trustedfile` config value in `setup()`
 
 class Categories(Enum):
     MEMBER = "members"
     ROLE = "roles"
 
 
+class GuildTrust(NamedTuple):
+    """Trusted member and role IDs of a single guild."""
+    members: FrozenSet[int]
+    roles: FrozenSet[int]
+
+
+_NO_TRUST = GuildTrust(frozenset(), frozenset())
+
+
+def _build_index(trusted: dict) -> Dict[int, GuildTrust]:
+    return {
+        int(guild_id): GuildTrust(
+            members=frozenset(map(int, categories.get(Categories.MEMBER.value, ()))),
+            roles=frozenset(map(int, categories.get(Categories.ROLE.value, ()))),
+        )
+        for guild_id, categories in trusted.items()
+    }
+
+
+# Per-guild index of the trusted store
+_TRUSTED: FileIndex[Dict[int, GuildTrust]] = FileIndex(TRUSTED_PATH, _build_index)
+
+
+def setup(path: Union[str, Path]) -> None:
+    """Sets the location of the trusted store."""
+    _TRUSTED.set_path(path)
+
+
+def _get_index() -> Dict[int, GuildTrust]:
+    return _TRUSTED.get()
+
+
+def get_guild_trust(guild_id: int) -> GuildTrust:
+    """Get trusted members and roles for a guild."""
+    return _get_index().get(guild_id, _NO_TRUST)
+
+
+def is_trusted(guild_id: int, user_id: Optional[int]=None, role_ids: Iterable[int]=()) -> bool:
+    """Checks if a user, or any of the roles in `role_ids`, is trusted in a guild.
+
+    Parameters
+    ----------
+    guild_id : `int`
+        ID of guild
+    user_id : `Optional[int]`, optional
+        ID of user to check
+    role_ids : `Iterable[int]`, optional
+        IDs of roles to check, e.g. the roles of the user.
+    """
+    trust = get_guild_trust(guild_id)
+    if user_id is not None and user_id in trust.members:
+        return True
+    return not trust.roles.isdisjoint(role_ids)
+
+
+def get_member_role_ids(member: discord.Member) -> FrozenSet[int]:
+    """Get the role IDs of a guild member.
+
+    Read from `member.roles` on every call. The roles are already in memory,
+    and a cache would go stale whenever a member update is missed.
+    """
+    return frozenset(role.id for role in member.roles)
+
+
+def is_member_trusted(member: Union[discord.Member, discord.User]) -> bool:
+    """Checks if a guild member is trusted, either directly or through one of its roles."""
+    if not isinstance(member, discord.Member):
+        return False
+    return is_trusted(member.guild.id, member.id, get_member_role_ids(member))
+
+
 def _get_trusted() -> dict:
-    return defaultdict(partial(defaultdict, DEFAULT), get_cached(TRUSTED_PATH))
+    """Returns a copy of the trusted store that is safe to modify."""
+    trusted = defaultdict(partial(defaultdict, DEFAULT))
+    for guild_id, categories in _TRUSTED.load().items():
+        for category, ids in categories.items():
+            trusted[guild_id][category] = list(ids)
+    return trusted
 
 
 def _dump_trusted(trusted: dict) -> None:
-    dump_json_blocking(TRUSTED_PATH, trusted)
-
-def _get_trusted_guild_category(guild_id: int, category: Categories) -> list:
-    try:
-        return _get_trusted()[str(guild_id)][category.value]
-    except KeyError:
-        return DEFAULT()    
+    _TRUSTED.save(trusted)
 
 
-def get_trusted_members(guild_id: int) -> list:
-    """Get a list of trusted members for a guild."""
-    return _get_trusted_guild_category(guild_id, Categories.MEMBER)
+def get_trusted_members(guild_id: int) -> FrozenSet[int]:
+    """Get a set of trusted members for a guild."""
+    return get_guild_trust(guild_id).members
 
 
-def get_trusted_roles(guild_id: int) -> list:
-    """Get a list of trusted roles for a guild."""
-    return _get_trusted_guild_category(guild_id, Categories.ROLE)
+def get_trusted_roles(guild_id: int) -> FrozenSet[int]:
+    """Get a set of trusted roles for a guild."""
+    return get_guild_trust(guild_id).roles
 
 
 def add_trusted_member(guild_id: int, user_id: int) -> None:
@@ -49,19 +121,14 @@ def add_trusted_role(guild_id: int, role_id: int) -> None:
     _add_trusted(guild_id, role_id, category=Categories.ROLE)
 
 
-def _add_trusted(guild_id: int, id_: int, category: str=Categories.MEMBER, *, exist_ok: bool=True) -> None:
-    trusted = _get_trusted()
-    
-    try:
-        if id_ in trusted[str(guild_id)][category.value]:
-            if not exist_ok:
-                raise ValueError(f"{id_} has already been added!")
-            return
-    except KeyError:
-        trusted[str(guild_id)][category.value] = DEFAULT()
-    finally:
-        trusted[str(guild_id)][category.value].append(id_)
+def _add_trusted(guild_id: int, id_: int, category: Categories=Categories.MEMBER, *, exist_ok: bool=True) -> None:
+    if id_ in getattr(get_guild_trust(guild_id), category.value):
+        if not exist_ok:
+            raise ValueError(f"{id_} has already been added!")
+        return
 
+    trusted = _get_trusted()
+    trusted[str(guild_id)][category.value].append(id_)
     _dump_trusted(trusted)
 
 
@@ -75,7 +142,7 @@ def remove_trusted_role(guild_id: int, role_id: int, **kwargs) -> None:
     _remove_trusted(guild_id, role_id, category=Categories.ROLE, **kwargs)
 
 
-def _remove_trusted(guild_id: int, user_id: int, category: str=Categories.MEMBER, *, exist_ok: bool=False) -> None:
+def _remove_trusted(guild_id: int, user_id: int, category: Categories=Categories.MEMBER, *, exist_ok: bool=False) -> None:
     trusted = _get_trusted()
     try:
         trusted[str(guild_id)][category.value].remove(user_id)
@@ -84,4 +151,3 @@ def _remove_trusted(guild_id: int, user_id: int, category: str=Categories.MEMBER
             raise
     else:
         _dump_trusted(trusted)
-
@@ -0,0 +1,68 @@
+from enum import Enum
+from pathlib import Path
+from typing import FrozenSet, NamedTuple, Optional, Union
+
+from .caching import FileIndex
+
+BLACKLIST_PATH = "NYI" # Replaced by the `paths.blacklistfile` config value in `setup()`
+
+class Categories(Enum):
+    USER = "users"
+    GUILD = "guilds"
+
+
+class Blacklist(NamedTuple):
+    """Blacklisted user and guild IDs."""
+    users: FrozenSet[int]
+    guilds: FrozenSet[int]
+
+
+def _build_index(blacklist: Union[dict, list]) -> Blacklist:
+    # Old blacklist files are a flat list of user IDs
+    if isinstance(blacklist, list):
+        blacklist = {Categories.USER.value: blacklist}
+    return Blacklist(
+        users=frozenset(map(int, blacklist.get(Categories.USER.value, ()))),
+        guilds=frozenset(map(int, blacklist.get(Categories.GUILD.value, ()))),
+    )
+
+
+_BLACKLIST: FileIndex[Blacklist] = FileIndex(BLACKLIST_PATH, _build_index, "blacklist")
+
+
+def setup(path: Union[str, Path]) -> None:
+    """Sets the location of the blacklist file."""
+    _BLACKLIST.set_path(path)
+
+
+def get_blacklist() -> Blacklist:
+    return _BLACKLIST.get()
+
+
+def is_blacklisted(user_id: int, guild_id: Optional[int]=None) -> bool:
+    """Checks if a user, or the guild a command is invoked in, is blacklisted."""
+    blacklist = get_blacklist()
+    return user_id in blacklist.users or guild_id in blacklist.guilds
+
+
+def add_blacklisted(id_: int, category: Categories=Categories.USER) -> None:
+    """Add a user or guild to the blacklist."""
+    blacklist = get_blacklist()
+    if id_ in getattr(blacklist, category.value):
+        return
+    _save_index(blacklist._replace(**{category.value: getattr(blacklist, category.value) | {id_}}))
+
+
+def remove_blacklisted(id_: int, category: Categories=Categories.USER) -> None:
+    """Remove a user or guild from the blacklist."""
+    blacklist = get_blacklist()
+    if id_ not in getattr(blacklist, category.value):
+        raise ValueError(f"{id_} is not blacklisted!")
+    _save_index(blacklist._replace(**{category.value: getattr(blacklist, category.value) - {id_}}))
+
+
+def _save_index(blacklist: Blacklist) -> None:
+    _BLACKLIST.save({
+        Categories.USER.value: sorted(blacklist.users),
+        Categories.GUILD.value: sorted(blacklist.guilds),
+    })
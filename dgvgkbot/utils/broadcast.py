@@ -0,0 +1,137 @@
+"""
+Announcements sent to every guild the bot is a member of.
+
+Messages are sent to several guilds at once, but at most `MAX_CONCURRENCY` at
+a time. Every message goes through the outbox, so a broadcast is bounded by the
+global rate limit and cannot starve replies to commands.
+
+The channel of each guild is chosen without any API calls, from the
+permissions the bot has in its cached channels. The guild's system channel is
+preferred, followed by its text channels in the order they are listed.
+Guilds without a channel the bot can send messages to are skipped.
+"""
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+import discord
+
+from .outbox import Priority, send
+
+MAX_CONCURRENCY = 10
+PROGRESS_INTERVAL = 5.0 # Seconds between progress reports
+
+
+def get_writable_channel(guild: discord.Guild) -> Optional[discord.TextChannel]:
+    """Returns the first channel in `guild` the bot can send messages to,
+    or None if there is none. Uses cached permission data only."""
+    if guild.unavailable or guild.me is None:
+        return None
+    channels = sorted(guild.text_channels, key=lambda c: c.position)
+    if guild.system_channel:
+        channels.insert(0, guild.system_channel)
+    for channel in channels:
+        permissions = channel.permissions_for(guild.me)
+        if permissions.send_messages and permissions.read_messages:
+            return channel
+    return None
+
+
+class Broadcast:
+    """Sends a message to a number of guilds.
+
+    Parameters
+    ----------
+    guilds : `Iterable[discord.Guild]`
+        Guilds to send message to
+    content : `str`
+        Message text
+    concurrency : `int`, optional
+        Maximum number of messages being sent at once.
+    """
+
+    def __init__(self,
+                 guilds: Iterable[discord.Guild],
+                 content: str,
+                 *,
+                 concurrency: int=MAX_CONCURRENCY) -> None:
+        self.guilds = list(guilds)
+        self.content = content
+        self.concurrency = concurrency
+
+        self.delivered: List[discord.Guild] = []
+        self.failed: List[Tuple[discord.Guild, str]] = [] # Guild, reason
+        self.skipped: List[discord.Guild] = []
+
+    @property
+    def total(self) -> int:
+        return len(self.guilds)
+
+    @property
+    def completed(self) -> int:
+        return len(self.delivered) + len(self.failed) + len(self.skipped)
+
+    def format_progress(self) -> str:
+        return (
+            f"Broadcasting to {self.total} guilds: {self.completed}/{self.total} done "
+            f"({len(self.delivered)} delivered, {len(self.failed)} failed, "
+            f"{len(self.skipped)} skipped)"
+        )
+
+    def format_summary(self) -> str:
+        """Lists failed and skipped guilds."""
+        lines = [
+            f"**Delivered:** {len(self.delivered)}",
+            f"**Failed:** {len(self.failed)}",
+            f"**Skipped:** {len(self.skipped)} (no writable channel)",
+        ]
+        if self.failed:
+            lines.append("\n**Failed guilds**")
+            lines.extend(f"{guild.name} ({guild.id}): {reason}" for guild, reason in self.failed)
+        if self.skipped:
+            lines.append("\n**Skipped guilds**")
+            lines.extend(f"{guild.name} ({guild.id})" for guild in self.skipped)
+        return "\n".join(lines)
+
+    async def run(self,
+                  on_progress: Optional[Callable[["Broadcast"], Awaitable[None]]]=None,
+                  interval: float=PROGRESS_INTERVAL) -> None:
+        """Sends the message to every guild.
+
+        Parameters
+        ----------
+        on_progress : `Optional[Callable[[Broadcast], Awaitable[None]]]`, optional
+            Coroutine function called every `interval` seconds while
+            the broadcast is running, and once when it is finished.
+        interval : `float`, optional
+            Seconds between calls to `on_progress`.
+        """
+        guilds = iter(self.guilds)
+        workers = asyncio.gather(*(self._worker(guilds) for _ in range(self.concurrency)))
+        try:
+            while on_progress:
+                done, _ = await asyncio.wait({workers}, timeout=interval)
+                if done:
+                    break
+                await on_progress(self)
+            await workers
+        except BaseException:
+            workers.cancel()
+            raise
+        if on_progress:
+            await on_progress(self)
+
+    async def _worker(self, guilds: Iterable[discord.Guild]) -> None:
+        # Workers share the iterator, so each guild is only sent to once
+        for guild in guilds:
+            channel = get_writable_channel(guild)
+            if channel is None:
+                self.skipped.append(guild)
+                continue
+            try:
+                await send(channel, self.content, priority=Priority.NORMAL)
+            except discord.Forbidden:
+                self.failed.append((guild, "Missing permissions"))
+            except discord.HTTPException as e:
+                self.failed.append((guild, f"HTTP {e.status}"))
+            else:
+                self.delivered.append(guild)
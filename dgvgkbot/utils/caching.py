@@ -1,13 +1,18 @@
-import json
 import os
 import time
-from typing import Any, Dict, Union, Tuple
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar, Union, Tuple
 from collections import deque, defaultdict, OrderedDict
 from functools import partial
 
 from recordclass import recordclass
 from recordclass.recordobject import recordclasstype
 
+from . import jsoncodec
+from .json import dump_json_blocking
+
+T = TypeVar("T")
+
 
 class CacheError(Exception):
     """Exceptions stemming from operations 
@@ -79,10 +84,12 @@ def get_cached(path: str, category: str=None) -> Union[str, dict, list]:
 
 def _get_file_contents(path: str, category: str, is_json: bool) -> CachedContent:
     """Retrieves content of a file and returns `CachedContent` object."""
-    with open(path, "r") as f:
-        if is_json:
-            contents = json.load(f)
-        else:
+    if is_json:
+        # Let the JSON backend decode the raw bytes itself
+        with open(path, "rb") as f:
+            contents = jsoncodec.load(f)
+    else:
+        with open(path, "r") as f:
             contents = f.read()
     modified = os.path.getmtime(path)
     content_type = "json" if is_json else "text"
@@ -139,4 +146,58 @@ def flush_cache() -> None:
 
 def _do_create_cache() -> None:
     global CACHE
-    CACHE = defaultdict(OrderedDict)
+    CACHE = defaultdict(OrderedDict)
+
+
+class FileIndex(Generic[T]):
+    """Lookup structure built from the contents of a JSON file.
+
+    The file is read with `get_cached()`, which returns the same object
+    until the file is modified, so the index is only rebuilt when the file
+    changes. A missing file is treated as an empty dict.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the file
+    build : `Callable[[Union[dict, list]], T]`
+        Builds the index from the file contents.
+    category : `str`, optional
+        Cache category of the file
+    """
+
+    def __init__(self, path: str, build: Callable[[Union[dict, list]], T], category: str=None) -> None:
+        self.path = path
+        self.build = build
+        self.category = category
+        self._index: Optional[T] = None
+        self._source: Any = None # Cached contents the index was built from
+        self._empty: dict = {}
+
+    def set_path(self, path: Union[str, Path]) -> None:
+        self.path = str(path)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Forces the index to be rebuilt on next lookup."""
+        self._source = None
+
+    def load(self) -> Union[dict, list]:
+        """Returns the cached file contents. Must not be modified."""
+        try:
+            return get_cached(self.path, self.category)
+        except FileNotFoundError:
+            return self._empty
+
+    def get(self) -> T:
+        contents = self.load()
+        if contents is not self._source:
+            self._index = self.build(contents)
+            self._source = contents
+        return self._index
+
+    def save(self, contents: Union[dict, list]) -> None:
+        """Writes `contents` to the file."""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        dump_json_blocking(self.path, contents, compact=True)
+        self.invalidate()
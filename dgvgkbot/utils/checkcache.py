@@ -0,0 +1,82 @@
+"""
+Memoization of `Command.can_run()` results.
+
+Command listings evaluate the checks of every single command, often several
+times per invocation. Results are cached per command and permission state
+of the invoker for a few seconds, so repeated listings are served from the
+cache. Once the cache holds `MAX_SIZE` results, the least recently used
+result is evicted to make room for a new one.
+"""
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Tuple
+from weakref import WeakKeyDictionary
+
+from discord.ext import commands
+
+TTL = 10.0 # Seconds
+MAX_SIZE = 10_000
+
+# (author ID, channel ID, channel permissions, role IDs)
+# Role IDs are read from the member when the key is made, so a member
+# gaining or losing a role gets a new key right away.
+PermissionKey = Tuple[int, int, int, FrozenSet[int]]
+
+_CACHE: "OrderedDict[Tuple[str, PermissionKey], Tuple[float, bool]]" = OrderedDict()
+
+# Permission keys are only computed once per invocation
+_CONTEXT_KEYS: "WeakKeyDictionary[commands.Context, PermissionKey]" = WeakKeyDictionary()
+
+
+def _get_permission_key(ctx: commands.Context) -> PermissionKey:
+    try:
+        return _CONTEXT_KEYS[ctx]
+    except KeyError:
+        pass
+
+    author = ctx.message.author
+    if ctx.guild and hasattr(author, "roles"):
+        permissions = ctx.channel.permissions_for(author).value
+        roles = frozenset(role.id for role in author.roles)
+    else:
+        permissions = 0
+        roles = frozenset()
+    key = (author.id, ctx.channel.id, permissions, roles)
+    _CONTEXT_KEYS[ctx] = key
+    return key
+
+
+def _evict() -> None:
+    """Evicts least recently used results until there is room for another."""
+    while len(_CACHE) >= MAX_SIZE:
+        _CACHE.popitem(last=False)
+
+
+async def can_run(command: commands.Command, ctx: commands.Context) -> bool:
+    """Cached version of `command.can_run(ctx)`.
+
+    Unlike `Command.can_run()`, a check raising `commands.CommandError`
+    is treated as a failed check rather than propagating the exception.
+    """
+    key = (command.qualified_name, _get_permission_key(ctx))
+    now = time.monotonic()
+
+    cached = _CACHE.get(key)
+    if cached:
+        if cached[0] > now:
+            _CACHE.move_to_end(key)
+            return cached[1]
+        del _CACHE[key] # Expired
+
+    try:
+        result = await command.can_run(ctx)
+    except commands.CommandError:
+        result = False
+
+    _evict()
+    _CACHE[key] = (now + TTL, result)
+    return result
+
+
+def flush_cache() -> None:
+    _CACHE.clear()
@@ -1,23 +1,19 @@
-import json
-
 from discord.ext import commands
 
-from .access_control import get_trusted_members
-from .caching import get_cached
-from .json import dump_json_blocking
+from .access_control import is_member_trusted
+from .blacklist import is_blacklisted
 
 
 def get_server_id(ctx: commands.Context, server: str) -> int:
     return ctx.bot.config["servers"][server]
 
 
-# Blacklist serialization functions
-def load_blacklist() -> list:
-    return get_cached(BLACKLIST_PATH, "blacklist")
-
-
-def save_blacklist(blacklist: list) -> None:
-    dump_json_blocking(BLACKLIST_PATH, blacklist)
+# Global check
+def not_blacklisted(ctx: commands.Context) -> bool:
+    """Bot-wide check rejecting blacklisted users and guilds.
+    Runs before any argument conversion takes place."""
+    guild_id = ctx.guild.id if ctx.guild else None
+    return not is_blacklisted(ctx.message.author.id, guild_id)
 
 
 # Decorator check
@@ -81,9 +77,9 @@ def disabled_cmd():
 
 
 def trusted():
-    """Adds check that allows trusted users only."""
+    """Adds check that allows trusted users and members with trusted roles only."""
     def predicate(ctx):
         if ctx.guild:
-            return ctx.message.author.id in get_trusted_members(ctx.guild.id)
+            return is_member_trusted(ctx.message.author)
         return False
     return commands.check(predicate)
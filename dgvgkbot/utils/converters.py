@@ -11,6 +11,7 @@ from discord.ext import commands
 from discord.ext.commands.converter import IDConverter, _get_from_guilds
 from discord.ext.commands.errors import BadArgument
 
+from . import members
 from .exceptions import CommandError
 from .messaging import fetch_message
 from ..utils.http import post
@@ -74,32 +75,49 @@ class NonCaseSensMemberConverter(IDConverter):
     3. Lookup by name#discrim
     4. Lookup by name (Case insensitive)
     5. Lookup by nickname (Case insensitive)
+    6. Lookup by approximate name or nickname (Case insensitive)
+
+    Steps 3-6 use the guild's member name index (see `utils.members`).
+    If several members match, none of them is chosen.
+
+    Parameters
+    ----------
+    fuzzy : `bool`, optional
+        Choose the best approximate match in step 6 if it is clearly
+        better than the rest. Otherwise approximate matches are only
+        suggested in the error message. By default True.
     """
 
+    def __init__(self, *, fuzzy: bool=True) -> None:
+        super().__init__()
+        self.fuzzy = fuzzy
+
     async def convert(self, ctx, argument):
         bot = ctx.bot
         match = self._get_id_match(argument) or re.match(r'<@!?([0-9]+)>$', argument)
         guild = ctx.guild
         result = None
-        argument = argument.lower()
-
-        def get_from_guild(guild: discord.Guild, argument: Union[str, int]) -> Optional[discord.Member]:
-            for member in guild.members:
-                if (
-                    member.name.lower() == argument or 
-                    member.nick and member.nick.lower() == argument
-                ):
-                    return member
-    
+
         # This is a really ugly re-purposing of the original MemberConverter
         if match is None:
-            if guild:
-                result = get_from_guild(guild, argument)
+            guilds = [guild] if guild else bot.guilds
+            found = members.find_members(guilds, argument)
+            if len(found) > 1:
+                names = ", ".join(f"{m}" for m in found[:10])
+                more = f" (+{len(found) - 10} more)" if len(found) > 10 else ""
+                raise BadArgument(
+                    f"Multiple members match '{argument}': {names}{more}. "
+                    "Use a mention or name#discriminator instead."
+                )
+            if found:
+                result = found[0]
             else:
-                for guild in bot.guilds:
-                    result = get_from_guild(guild, argument)
-                    if result:
-                        break
+                matches = members.search_members(guilds, argument)
+                if self.fuzzy:
+                    result = members.get_best_match(matches, argument)
+                if result is None and matches:
+                    names = ", ".join(f"{m.member}" for m in matches)
+                    raise BadArgument(f"No member named '{argument}'. Did you mean: {names}?")
         else:
             user_id = int(match.group(1))
             if guild:
@@ -0,0 +1,499 @@
+"""
+Streaming downloads with a hard size limit.
+
+Response bodies are read in chunks and written to a `SpooledTemporaryFile`,
+which keeps small downloads in memory and moves larger ones to disk once they
+exceed `SPOOL_SIZE`. The size limit is enforced on the bytes actually received,
+so a missing or incorrect `Content-Length` header cannot be used to sneak a
+larger file past it.
+
+The returned file object can be passed directly to `discord.File`, but must
+be closed by the caller. `discord.File` only closes files it opened itself.
+Once a download has been moved to disk, chunks are written to it in the
+default executor, so disk writes do not block the event loop.
+
+All downloads go through a bot-wide `DownloadGovernor`, which reserves the
+size of each download from a shared byte budget and caps the number of
+concurrent downloads per guild and per user. Downloads that cannot start right
+away are queued in the order they arrived, and rejected if they have not
+started within `QUEUE_TIMEOUT` seconds.
+
+A download starts out reserving `SPOOL_SIZE` bytes, or its `Content-Length` if
+the server sends one. A download growing past its reservation has it doubled
+(up to the maximum size) before writing more, waiting ahead of queued downloads
+if the budget is used up. Downloads therefore only reserve about as much as
+they actually use, rather than the maximum size of every download.
+
+Downloads can be restricted to a MIME type category (e.g. "image"). The type
+is sniffed from the first `SNIFF_SIZE` bytes of the stream, and downloads of
+any other type are aborted before the rest of the file is transferred.
+
+Concurrent downloads of the same URL with the same size limit are coalesced
+into a single transfer. Each caller receives its own read-only view of the
+downloaded file, with its own position. Views of a download kept in memory
+share its contents. Views of a download on disk share the file, which is
+closed (and deleted) once every view has been closed. The transfer is governed by the limits of the caller that
+started it. Callers that joined it start their own download if it is rejected
+by the governor, since the rejection may be down to the other caller's limits.
+"""
+import asyncio
+import io
+import threading
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Awaitable, BinaryIO, Deque, NamedTuple, Optional
+
+from .exceptions import DownloadLimitError, FileSizeError, FileTypeError
+from .filetypes import get_file_mimetype
+from .http import SingleFlight, stream
+
+SPOOL_SIZE = 2 * 1024 * 1024 # 2 MB
+SNIFF_SIZE = 4096
+
+# Default governor settings. Overridden by the `downloads.governor` section of the config.
+BUDGET = 200_000_000 # 200 MB
+MAX_PER_GUILD = 3
+MAX_PER_USER = 1
+QUEUE_TIMEOUT = 30.0 # Seconds
+
+
+class GovernorStats(NamedTuple):
+    queued: int
+    active: int
+    rejected: int
+    reserved: int # Bytes
+    budget: int # Bytes
+
+
+class _Waiter(NamedTuple):
+    size: int
+    guild_id: Optional[int]
+    user_id: Optional[int]
+    future: asyncio.Future
+    started: bool # Waiting to extend the reservation of a started download
+
+
+class DownloadGovernor:
+    """Limits the total size and number of concurrent downloads.
+
+    Parameters
+    ----------
+    budget : `int`
+        Maximum number of bytes reserved by active downloads.
+    max_per_guild : `int`
+        Maximum number of concurrent downloads per guild.
+    max_per_user : `int`
+        Maximum number of concurrent downloads per user.
+    queue_timeout : `float`
+        Seconds a download can wait in the queue before being rejected.
+    """
+
+    def __init__(self,
+                 budget: int=BUDGET,
+                 max_per_guild: int=MAX_PER_GUILD,
+                 max_per_user: int=MAX_PER_USER,
+                 queue_timeout: float=QUEUE_TIMEOUT) -> None:
+        self.budget = budget
+        self.max_per_guild = max_per_guild
+        self.max_per_user = max_per_user
+        self.queue_timeout = queue_timeout
+
+        self.reserved = 0
+        self.active = 0
+        self.rejected = 0
+        self._guilds: Counter = Counter()
+        self._users: Counter = Counter()
+        self._queue: Deque[_Waiter] = deque()
+
+    @property
+    def stats(self) -> GovernorStats:
+        return GovernorStats(
+            queued=len(self._queue),
+            active=self.active,
+            rejected=self.rejected,
+            reserved=self.reserved,
+            budget=self.budget,
+        )
+
+    def _is_capped(self, guild_id: Optional[int], user_id: Optional[int]) -> bool:
+        return (
+            (guild_id is not None and self._guilds[guild_id] >= self.max_per_guild)
+            or (user_id is not None and self._users[user_id] >= self.max_per_user)
+        )
+
+    def _start(self, size: int, guild_id: Optional[int], user_id: Optional[int]) -> None:
+        self.reserved += size
+        self.active += 1
+        if guild_id is not None:
+            self._guilds[guild_id] += 1
+        if user_id is not None:
+            self._users[user_id] += 1
+
+    def _finish(self, size: int, guild_id: Optional[int], user_id: Optional[int]) -> None:
+        self.reserved -= size
+        self.active -= 1
+        if guild_id is not None:
+            self._guilds[guild_id] -= 1
+            if not self._guilds[guild_id]:
+                del self._guilds[guild_id]
+        if user_id is not None:
+            self._users[user_id] -= 1
+            if not self._users[user_id]:
+                del self._users[user_id]
+        self._wake()
+
+    def _wake(self) -> None:
+        """Starts queued downloads in the order they arrived.
+
+        Downloads blocked by their guild or user cap are skipped, so they
+        do not hold up everyone else. A download blocked by the byte budget
+        is not skipped, so that large downloads are not starved by a
+        steady stream of smaller ones. Extensions of started downloads
+        are queued first, and are never capped.
+        """
+        for waiter in list(self._queue):
+            if waiter.future.done():
+                self._queue.remove(waiter)
+                continue
+            if not waiter.started and self._is_capped(waiter.guild_id, waiter.user_id):
+                continue
+            if self.reserved + waiter.size > self.budget:
+                break
+            self._queue.remove(waiter)
+            if waiter.started:
+                self.reserved += waiter.size
+            else:
+                self._start(waiter.size, waiter.guild_id, waiter.user_id)
+            waiter.future.set_result(None)
+
+    async def _acquire(self,
+                       size: int,
+                       guild_id: Optional[int],
+                       user_id: Optional[int],
+                       started: bool=False) -> None:
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(size, guild_id, user_id, future, started)
+        if started:
+            self._queue.appendleft(waiter)
+        else:
+            self._queue.append(waiter)
+        self._wake()
+        if future.done():
+            return
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Started just as we timed out or were cancelled
+                if started:
+                    self.reserved -= size
+                    self._wake()
+                else:
+                    self._finish(size, guild_id, user_id)
+            else:
+                future.cancel()
+                if waiter in self._queue:
+                    self._queue.remove(waiter)
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise DownloadLimitError(
+                    "Too many downloads in progress. Try again later."
+                )
+            raise
+
+    @asynccontextmanager
+    async def reserve(self,
+                      size: int,
+                      guild_id: Optional[int]=None,
+                      user_id: Optional[int]=None) -> AsyncIterator["Reservation"]:
+        """Waits until a download of `size` bytes can be started,
+        and reserves it for the duration of the `async with` block.
+        The reservation can be extended with `Reservation.extend()`.
+
+        Raises
+        ------
+        `DownloadLimitError`
+            Raised if `size` exceeds the budget, or if the download
+            has not started within `queue_timeout` seconds.
+        """
+        if size > self.budget:
+            self.rejected += 1
+            raise DownloadLimitError("Download is too large to ever be started.")
+        await self._acquire(size, guild_id, user_id)
+        reservation = Reservation(self, size, guild_id, user_id)
+        try:
+            yield reservation
+        finally:
+            self._finish(reservation.size, guild_id, user_id)
+
+
+class Reservation:
+    """Bytes reserved from a `DownloadGovernor`'s budget by a started download."""
+
+    def __init__(self,
+                 governor: DownloadGovernor,
+                 size: int,
+                 guild_id: Optional[int],
+                 user_id: Optional[int]) -> None:
+        self.governor = governor
+        self.size = size
+        self.guild_id = guild_id
+        self.user_id = user_id
+
+    async def extend(self, size: int) -> None:
+        """Waits until the reservation can be extended to `size` bytes.
+        Does nothing if at least `size` bytes are already reserved.
+
+        Raises
+        ------
+        `DownloadLimitError`
+            Raised if `size` exceeds the budget, or if the reservation
+            could not be extended within `queue_timeout` seconds.
+        """
+        if size <= self.size:
+            return
+        if size > self.governor.budget:
+            self.governor.rejected += 1
+            raise DownloadLimitError("Download is too large to ever be finished.")
+        await self.governor._acquire(size - self.size, self.guild_id, self.user_id, started=True)
+        self.size = size
+
+
+_GOVERNOR = DownloadGovernor()
+
+
+def setup(*,
+          budget: int=BUDGET,
+          max_per_guild: int=MAX_PER_GUILD,
+          max_per_user: int=MAX_PER_USER,
+          queue_timeout: float=QUEUE_TIMEOUT) -> None:
+    """Replaces the download governor with one using the given settings.
+    See `DownloadGovernor` for a description of the parameters."""
+    global _GOVERNOR
+    if _GOVERNOR.active or _GOVERNOR.stats.queued:
+        raise RuntimeError("Cannot change download governor settings while downloads are in progress.")
+    _GOVERNOR = DownloadGovernor(budget, max_per_guild, max_per_user, queue_timeout)
+
+
+def get_governor() -> DownloadGovernor:
+    return _GOVERNOR
+
+
+class _DownloadFile(SpooledTemporaryFile):
+    """File a download is written to. Once the download is finished,
+    it can be shared with other callers through views (see `open_view()`).
+
+    The file is closed once the last reference to it is released.
+    The download holds one reference until every caller has a view,
+    and every view of a file on disk holds another.
+    """
+
+    def __init__(self, spool_size: int) -> None:
+        super().__init__(max_size=spool_size)
+        self.on_disk = False
+        self.lock = threading.Lock() # Held while a view reads from the file
+        self._contents: Optional[bytes] = None # Shared by views of a file in memory
+        self._refs = 1
+
+    def rollover(self) -> None:
+        super().rollover()
+        self.on_disk = True
+
+    def open_view(self) -> BinaryIO:
+        """Returns a read-only view of the file, with its own position."""
+        if not self.on_disk:
+            # Views of a file in memory share its contents, not the file
+            if self._contents is None:
+                self.seek(0)
+                self._contents = self.read()
+            return io.BytesIO(self._contents)
+        with self.lock:
+            self._refs += 1
+        return FileView(self)
+
+    def release(self) -> None:
+        """Releases a reference to the file, closing it if it was the last."""
+        with self.lock:
+            self._refs -= 1
+            last = not self._refs
+        if last:
+            self.close()
+
+
+class FileView(io.RawIOBase):
+    """Read-only view of a download on disk shared with other views.
+
+    Every view has its own position. Reads seek the shared file while
+    holding its lock, so views can be read concurrently from different
+    threads. Closing the view releases its reference to the shared file.
+    """
+
+    def __init__(self, f: _DownloadFile) -> None:
+        self._file = f
+        with f.lock:
+            f.seek(0, io.SEEK_END)
+            self._size = f.tell()
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        with self._file.lock:
+            self._file.seek(self._pos)
+            data = self._file.read(len(b))
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int=io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError(f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.release()
+        super().close()
+
+
+_DOWNLOADS: SingleFlight[BinaryIO] = SingleFlight(_DownloadFile.open_view, _DownloadFile.release)
+
+
+async def download(url: str,
+                   max_size: int,
+                   *,
+                   guild_id: Optional[int]=None,
+                   user_id: Optional[int]=None,
+                   category: Optional[str]=None,
+                   spool_size: int=SPOOL_SIZE
+                   ) -> BinaryIO:
+    """Downloads the contents of URL `url` chunk by chunk as it arrives.
+
+    If a download of the same URL with the same `max_size` is already
+    in progress, waits for it to finish instead of starting a new one.
+    The download is then counted against the limits of the caller that
+    started it. If the governor rejects it, a download counted against
+    the caller's own limits is started instead.
+
+    Parameters
+    ----------
+    url : `str`
+        URL to download
+    max_size : `int`
+        Maximum size of the download in bytes.
+        Reserved from the download governor's budget until
+        the download is finished.
+    guild_id : `Optional[int]`, optional
+        ID of guild the download is started from.
+    user_id : `Optional[int]`, optional
+        ID of user starting the download.
+    category : `Optional[str]`, optional
+        Expected MIME type category of the download,
+        e.g. "image", "audio" or "video".
+    spool_size : `int`, optional
+        Size in bytes at which the download is moved from memory to disk.
+
+    Raises
+    ------
+    `FileSizeError`
+        Raised if the advertised or actual size of the download
+        exceeds `max_size`. The download is aborted immediately.
+    `FileTypeError`
+        Raised if the download is not of MIME type category `category`.
+        The download is aborted as soon as its type is known.
+    `DownloadLimitError`
+        Raised if the download governor rejects the download.
+
+    Returns
+    -------
+    `BinaryIO`
+        File object containing the downloaded contents,
+        positioned at the start of the file.
+    """
+    started = False
+
+    def start() -> Awaitable[_DownloadFile]:
+        nonlocal started
+        started = True
+        return _download(url, max_size, guild_id, user_id, category, spool_size)
+
+    try:
+        return await _DOWNLOADS.run(("GET", url, category, max_size), start)
+    except DownloadLimitError:
+        if started:
+            raise
+    # Joined a download rejected because of the limits of the caller that started it
+    return await _download(url, max_size, guild_id, user_id, category, spool_size)
+
+
+async def _download(url: str,
+                    max_size: int,
+                    guild_id: Optional[int],
+                    user_id: Optional[int],
+                    category: Optional[str],
+                    spool_size: int
+                    ) -> _DownloadFile:
+    loop = asyncio.get_running_loop()
+    async with _GOVERNOR.reserve(min(spool_size, max_size), guild_id, user_id) as reservation:
+        async with stream("GET", url) as resp:
+            # Reject early if the server is honest about the size,
+            # but never rely on it.
+            content_length = resp.headers.get("Content-Length")
+            if content_length and content_length.isdigit():
+                if int(content_length) > max_size:
+                    raise FileSizeError(f"File size exceeds maximum limit of {max_size} bytes")
+                await reservation.extend(int(content_length))
+
+            f = _DownloadFile(spool_size)
+            try:
+                size = 0
+                head = b"" if category else None # Bytes not yet sniffed
+                async for chunk in resp.aiter_bytes():
+                    size += len(chunk)
+                    if size > max_size:
+                        raise FileSizeError(f"File size exceeds maximum limit of {max_size} bytes")
+                    if size > reservation.size:
+                        await reservation.extend(min(max(size, 2 * reservation.size), max_size))
+                    if size > spool_size: # On disk, or moved to disk by this write
+                        await loop.run_in_executor(None, f.write, chunk)
+                    else:
+                        f.write(chunk)
+                    if head is not None:
+                        head += chunk[:SNIFF_SIZE - len(head)]
+                        if len(head) >= SNIFF_SIZE:
+                            _check_category(head, category)
+                            head = None
+                if head is not None: # Smaller than SNIFF_SIZE
+                    _check_category(head, category)
+            except BaseException:
+                f.close()
+                raise
+
+    f.seek(0)
+    return f
+
+
+def _check_category(head: bytes, category: str) -> None:
+    mimetype = get_file_mimetype(head, bufsize=len(head))
+    if not mimetype.startswith(f"{category}/"):
+        raise FileTypeError(f"Expected {category} file, got {mimetype}")
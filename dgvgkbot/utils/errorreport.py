@@ -0,0 +1,255 @@
+"""
+Batched, deduplicated error reporting.
+
+Tracebacks are not sent to the errors channel as they happen. They are
+fingerprinted and collected by an `ErrorReporter`, which counts how often each
+unique error occurs and sends a summary of every error at most once per
+`INTERVAL` seconds, so a command failing in a loop results in one message per
+interval instead of one message per failure. An error occurring after a quiet
+interval is reported right away.
+
+A fingerprint is made from the exception type and the file, line and function
+of every frame in the traceback. Exception messages are left out, since they
+often contain IDs, names or addresses that differ between otherwise identical
+errors.
+
+Each summary message names the exception, how many times it occurred and the
+message that last caused it. The most recent full traceback is attached as a
+text file instead of being split across several messages.
+"""
+import asyncio
+import hashlib
+import io
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+
+from .outbox import Priority, send
+
+# Default reporter settings. Overridden by the `errors` section of the config.
+INTERVAL = 60.0 # Seconds between summaries
+MAX_ENTRIES = 20 # Unique errors per summary. Further errors are only counted.
+
+SUMMARY_LENGTH = 300 # Characters of exception message and cause shown
+TRACEBACK_FILENAME = "traceback.txt"
+
+_FRAME_RE = re.compile(r'^\s*File "(.+)", line (\d+), in (.+)$')
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _get_exception_line(trace: str) -> str:
+    """Returns the last line of a traceback, e.g. "ValueError: message"."""
+    for line in reversed(trace.splitlines()):
+        if line.strip():
+            return line.strip()
+    return ""
+
+
+def fingerprint(trace: str) -> str:
+    """Returns a fingerprint identifying the error in a formatted traceback.
+
+    Tracebacks of the same exception type raised from the same lines
+    have the same fingerprint, regardless of the exception message.
+    Text that is not a traceback is fingerprinted with numbers removed.
+    """
+    frames = []
+    for line in trace.splitlines():
+        match = _FRAME_RE.match(line)
+        if match:
+            frames.append("{}:{}:{}".format(*match.groups()))
+
+    exc_line = _get_exception_line(trace)
+    if frames:
+        key = "\n".join(frames + [exc_line.split(":", 1)[0]])
+    else:
+        key = _DIGITS_RE.sub("#", exc_line)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class ErrorEntry:
+    """Occurrences of a single unique error."""
+
+    __slots__ = ("exception", "trace", "cause", "count", "first_seen", "last_seen")
+
+    def __init__(self, trace: str, cause: Optional[str]) -> None:
+        self.exception = _get_exception_line(trace)
+        self.trace = trace
+        self.cause = cause
+        self.count = 1
+        self.first_seen = self.last_seen = time.time()
+
+    def add(self, trace: str, cause: Optional[str]) -> None:
+        # Keep the most recent occurrence
+        self.exception = _get_exception_line(trace)
+        self.trace = trace
+        self.cause = cause or self.cause
+        self.count += 1
+        self.last_seen = time.time()
+
+    def format_summary(self) -> str:
+        first = datetime.fromtimestamp(self.first_seen).strftime("%H:%M:%S")
+        last = datetime.fromtimestamp(self.last_seen).strftime("%H:%M:%S")
+        if self.count == 1:
+            lines = [f"**Error** at {last}"]
+        else:
+            lines = [f"**Error** ×{self.count} between {first} and {last}"]
+        lines.append(f"```{self.exception[:SUMMARY_LENGTH]}```")
+        if self.cause:
+            lines.append(f"Last caused by: {self.cause[:SUMMARY_LENGTH]}")
+        return "\n".join(lines)
+
+
+class ErrorReporter:
+    """Collects errors and periodically sends a summary of them.
+
+    Parameters
+    ----------
+    interval : `float`
+        Seconds between summaries.
+    max_entries : `int`
+        Maximum number of unique errors per channel in a single summary.
+        Occurrences of further errors are counted, but not reported
+        individually.
+    """
+
+    def __init__(self, interval: float=INTERVAL, max_entries: int=MAX_ENTRIES) -> None:
+        self.interval = interval
+        self.max_entries = max_entries
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._entries: Dict[int, "OrderedDict[str, ErrorEntry]"] = {}
+        self._dropped: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._sending: Set[asyncio.Future] = set() # Summaries being sent
+
+    @property
+    def pending(self) -> int:
+        """Number of unique errors not yet reported."""
+        return sum(len(entries) for entries in self._entries.values())
+
+    def report(self,
+               channel: discord.abc.Messageable,
+               trace: str,
+               cause: Optional[str]=None) -> None:
+        """Records an error to be reported in channel `channel`.
+        Must be called from a coroutine.
+
+        Parameters
+        ----------
+        channel : `discord.abc.Messageable`
+            Channel to send the summary to
+        trace : `str`
+            Formatted traceback
+        cause : `Optional[str]`, optional
+            Description of what caused the error, e.g. the message
+            that invoked the failing command.
+        """
+        self._channels[channel.id] = channel
+        entries = self._entries.setdefault(channel.id, OrderedDict())
+        fp = fingerprint(trace)
+        if fp in entries:
+            entries[fp].add(trace, cause)
+        elif len(entries) < self.max_entries:
+            entries[fp] = ErrorEntry(trace, cause)
+        else:
+            self._dropped[channel.id] = self._dropped.get(channel.id, 0) + 1
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        # The first error is sent right away, and errors occurring
+        # after it are collected until the interval has passed.
+        try:
+            while self._entries:
+                await self.flush()
+                await asyncio.sleep(self.interval)
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+
+    async def flush(self) -> None:
+        """Sends a summary of all errors recorded since the last flush.
+
+        Errors are removed from the reporter as soon as the flush starts.
+        Cancelling the flush does not stop their summaries from being sent,
+        so they are never lost."""
+        if not self._entries:
+            return
+        pending: List[Tuple[discord.abc.Messageable, List[ErrorEntry], int]] = [
+            (self._channels[channel_id], list(entries.values()), self._dropped.get(channel_id, 0))
+            for channel_id, entries in self._entries.items()
+        ]
+        self._channels.clear()
+        self._entries.clear()
+        self._dropped.clear()
+
+        sending = asyncio.ensure_future(asyncio.gather(*(
+            self._send_summary(channel, entries, dropped)
+            for channel, entries, dropped in pending
+        )))
+        self._sending.add(sending)
+        sending.add_done_callback(self._sending.discard)
+        await asyncio.shield(sending)
+
+    async def _send_summary(self,
+                            channel: discord.abc.Messageable,
+                            entries: List[ErrorEntry],
+                            dropped: int) -> None:
+        try:
+            for entry in entries:
+                trace = io.BytesIO(entry.trace.encode("utf-8"))
+                await send(
+                    channel,
+                    entry.format_summary(),
+                    priority=Priority.LOG,
+                    file=discord.File(trace, filename=TRACEBACK_FILENAME),
+                )
+            if dropped:
+                await send(
+                    channel,
+                    f"Other errors occurred {dropped} more time(s) and were not reported individually.",
+                    priority=Priority.LOG,
+                )
+        except discord.Forbidden:
+            print(f"Insufficient permissions for channel {channel.id}.")
+        except discord.HTTPException:
+            print(f"Failed to send error report to channel {channel.id}.")
+
+    async def close(self) -> None:
+        """Sends errors not yet reported, waits for summaries
+        being sent, and stops the reporter."""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+
+_REPORTER = ErrorReporter()
+
+
+def setup(*, interval: float=INTERVAL, max_entries: int=MAX_ENTRIES) -> None:
+    """Replaces the error reporter with one using the given settings.
+    See `ErrorReporter` for a description of the parameters."""
+    global _REPORTER
+    if _REPORTER.pending:
+        raise RuntimeError("Cannot change error reporter settings while errors are pending.")
+    _REPORTER = ErrorReporter(interval, max_entries)
+
+
+def get_reporter() -> ErrorReporter:
+    return _REPORTER
+
+
+def report(channel: discord.abc.Messageable, trace: str, cause: Optional[str]=None) -> None:
+    """Records an error with the shared reporter. See `ErrorReporter.report()`."""
+    _REPORTER.report(channel, trace, cause)
+
+
+async def close() -> None:
+    await _REPORTER.close()
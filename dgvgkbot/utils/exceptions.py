@@ -31,6 +31,9 @@ class FileTypeError(Exception):
 class FileSizeError(Exception):
     """File Size too small or too large"""
 
+class DownloadLimitError(Exception):
+    """Download rejected by the download governor"""
+
 class BotPermissionError(Exception):
     """Bot lacks permissions to perform action"""
 
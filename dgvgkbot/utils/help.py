@@ -0,0 +1,123 @@
+"""
+Cache of rendered help listings.
+
+Rendering a command listing requires formatting signatures, padding and
+docstrings for every command. Listings are rendered once for every command,
+regardless of who can run them, and served from the cache until commands are
+added or removed. Commands the invoker cannot run are left out each time a
+listing is served, using the cached check results of `utils.checkcache`, so
+a cached listing never shows one invoker the commands of another.
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, List, NamedTuple, Optional, TypeVar
+
+from discord.ext import commands
+
+from .trie import Trie
+
+T = TypeVar("T")
+
+
+class HelpCache:
+    """LRU cache of rendered help listings, keyed by an arbitrary page key.
+    Listings must not depend on the invoker."""
+
+    def __init__(self, max_size: int=512) -> None:
+        self.max_size = max_size
+        self._pages: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    async def get_or_render(self, page: Hashable, render: Callable[[], Awaitable[T]]) -> T:
+        """Returns a cached listing, or renders and caches it using `render`.
+
+        Parameters
+        ----------
+        page : `Hashable`
+            Key identifying the listing, e.g. `("cog", cog_name, advanced)`
+        render : `Callable[[], Awaitable[T]]`
+            Coroutine function rendering the listing
+        """
+        try:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+        except KeyError:
+            pass
+
+        rendered = await render()
+        self._pages[page] = rendered
+        if len(self._pages) > self.max_size:
+            self._pages.popitem(last=False) # Pop least recently used page
+        return rendered
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+
+class HelpEntry(NamedTuple):
+    """A command or a category (cog) that help can be shown for."""
+    name: str
+    command: Optional[commands.Command] = None
+    cog: Optional[commands.Cog] = None
+
+
+def _get_command_names(command: commands.Command) -> List[str]:
+    """Returns every name a command can be invoked by, including
+    qualified names of subcommands, e.g. `["poi remove", "poi del"]`."""
+    names = [command.name, *command.aliases]
+    if command.parent is None:
+        return names
+    return [
+        f"{parent} {name}"
+        for parent in _get_command_names(command.parent)
+        for name in names
+    ]
+
+
+class HelpIndex:
+    """Case-insensitive index of command names, aliases, qualified
+    subcommand names and category names.
+
+    Commands take precedence over categories sharing the same name.
+    """
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self._trie: Trie[HelpEntry] = Trie()
+
+        for cog in bot.cogs.values():
+            # Same rules as `BaseCog.get_cogs()`
+            if getattr(cog, "DISABLE_HELP", True) or cog.cog_name == "BotSetup":
+                continue
+            self._trie[cog.cog_name.lower()] = HelpEntry(cog.cog_name, cog=cog)
+
+        for command in bot.walk_commands():
+            if command.hidden:
+                continue
+            entry = HelpEntry(command.qualified_name, command=command)
+            for name in _get_command_names(command):
+                self._trie[name.lower()] = entry
+
+    def get(self, query: str) -> Optional[HelpEntry]:
+        """Exact, case-insensitive lookup."""
+        return self._trie.get(query.lower())
+
+    def suggest(self, query: str, limit: int=5) -> List[HelpEntry]:
+        """Returns up to `limit` entries resembling `query`.
+
+        Entries within a small edit distance of `query` come first,
+        followed by entries whose names start with `query`.
+        """
+        query = query.lower()
+        max_distance = 1 if len(query) <= 4 else 2
+
+        candidates = [entry for _, _, entry in self._trie.search(query, max_distance)]
+        candidates.extend(entry for _, entry in self._trie.startswith(query, limit))
+
+        suggestions: List[HelpEntry] = []
+        for entry in candidates:
+            if entry not in suggestions:
+                suggestions.append(entry)
+            if len(suggestions) == limit:
+                break
+        return suggestions
@@ -4,20 +4,334 @@ Module intended to abstract away the underlying networking library that is used.
 If, in the future, a better alternative to httpx becomes available, only the
 functions defined in this module have to be modified, as opposed to modifying
 every single call to httpx in every cog.
+
+All requests share a single long-lived `httpx.AsyncClient`, so that connections
+(and their TCP/TLS handshakes) are reused between requests. The client is
+configured by `setup()` on bot startup and closed by `close()` on shutdown.
+
+Identical GET requests made while one is already in flight are coalesced
+(see `SingleFlight`): only the first request is sent, and every caller
+receives its own copy of the response.
+
+GET requests can also be served from an optional on-disk cache revalidated
+with conditional requests (see `utils.httpcache`). The cache is enabled by
+passing a `cache` configuration to `setup()`, and is used for requests made
+with `get(url, cache=True)`, as well as for every request to a host with
+its own cache policy.
+
+NOTE
+----
+httpx does not support DNS caching. Hostnames are only resolved when a new
+connection is opened, however, so pooled keep-alive connections
+spare us most lookups.
 """
-from typing import Any
+import asyncio
+import time
+from typing import (Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional,
+                    TypeVar)
 
 import httpx
 from httpx import Response
 
+from .httpcache import MAX_SIZE as CACHE_MAX_SIZE
+from .httpcache import CachedResponse, CachePolicy, HTTPCache
+
+try:
+    import h2
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+
+# Default client settings. Overridden by the `http` section of the config.
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE = 20
+TIMEOUT = 10.0 # Seconds
+CONNECT_TIMEOUT = 5.0 # Seconds
+HTTP2 = True
+
+_CLIENT: Optional[httpx.AsyncClient] = None
+_CACHE: Optional[HTTPCache] = None
+
+# Not stored in the cache, since cached bodies are already decoded
+_UNCACHED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    __slots__ = ("task", "joined", "waiting")
+
+    def __init__(self, task: "asyncio.Future[T]") -> None:
+        self.task = task
+        self.joined = 0 # Total number of callers
+        self.waiting = 0 # Callers still awaiting the result
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls sharing the same key into a single call.
+
+    The first caller of a key starts the call, and callers arriving while
+    it is in flight wait for its result instead of starting their own.
+    The call is cancelled if every caller waiting for it is cancelled.
+
+    Parameters
+    ----------
+    share : `Callable[[T], T]`
+        Returns a copy of a result for a single caller.
+        Only used if a result has more than one caller, in which case
+        every caller receives a copy.
+    release : `Optional[Callable[[T], None]]`, optional
+        Called with a result that has been copied for more than one
+        caller, once every caller has received its copy.
+    """
+
+    def __init__(self,
+                 share: Callable[[T], T],
+                 release: Optional[Callable[[T], None]]=None) -> None:
+        self.share = share
+        self.release = release
+        self._flights: Dict[Hashable, _Flight[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            # Runs before any caller resumes, so no one joins a finished flight
+            flight.task.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        flight.joined += 1
+        flight.waiting += 1
+        try:
+            result = await asyncio.shield(flight.task)
+            if flight.joined == 1:
+                return result
+            return self.share(result)
+        except asyncio.CancelledError:
+            if flight.waiting == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiting -= 1
+            if not flight.waiting and flight.joined > 1:
+                self._release(flight)
+
+    def _release(self, flight: _Flight[T]) -> None:
+        task = flight.task
+        if self.release and task.done() and not task.cancelled() and task.exception() is None:
+            self.release(task.result())
+
+
+def _copy_response(resp: Response) -> Response:
+    # The body is immutable bytes, and is not copied
+    return Response(
+        resp.status_code,
+        request=resp.request,
+        http_version=resp.http_version,
+        headers=resp.headers.copy(),
+        content=resp.content,
+        history=list(resp.history),
+    )
+
+
+_GETS: SingleFlight[Response] = SingleFlight(_copy_response)
+
+
+def setup(*,
+          max_connections: int=MAX_CONNECTIONS,
+          max_keepalive: int=MAX_KEEPALIVE,
+          timeout: float=TIMEOUT,
+          connect_timeout: float=CONNECT_TIMEOUT,
+          http2: bool=HTTP2,
+          cache: Optional[dict]=None) -> None:
+    """Configures the shared client. Must be called before the first request.
+
+    Parameters
+    ----------
+    max_connections : `int`, optional
+        Maximum number of open connections.
+    max_keepalive : `int`, optional
+        Maximum number of idle connections kept alive for reuse.
+    timeout : `float`, optional
+        Read, write and pool timeout in seconds.
+    connect_timeout : `float`, optional
+        Connection timeout in seconds.
+    http2 : `bool`, optional
+        Use HTTP/2 where supported by the server. Ignored if the
+        `h2` package is not installed.
+    cache : `Optional[dict]`, optional
+        Enables the on-disk response cache. Mapping with the keys
+        `path` (cache directory), `max_size` (bytes, optional) and
+        `hosts` (optional mapping of hostnames to `CachePolicy` fields).
+    """
+    global MAX_CONNECTIONS, MAX_KEEPALIVE, TIMEOUT, CONNECT_TIMEOUT, HTTP2, _CACHE
+
+    if _CLIENT is not None:
+        raise RuntimeError("HTTP client is already in use. Close it before changing its settings.")
 
-async def get(url, *args, **kwargs) -> Response:
-    """Wrapper around the async httpx.get() function"""
-    async with httpx.AsyncClient() as client:
-        return await client.get(url, *args, **kwargs)
+    MAX_CONNECTIONS = max_connections
+    MAX_KEEPALIVE = max_keepalive
+    TIMEOUT = timeout
+    CONNECT_TIMEOUT = connect_timeout
+    HTTP2 = http2
+
+    if cache:
+        _CACHE = HTTPCache(
+            cache["path"],
+            cache.get("max_size", CACHE_MAX_SIZE),
+            {
+                host: CachePolicy(**policy)
+                for host, policy in cache.get("hosts", {}).items()
+            }
+        )
+    else:
+        _CACHE = None
+
+
+def get_cache() -> Optional[HTTPCache]:
+    return _CACHE
+
+
+def get_client() -> httpx.AsyncClient:
+    """Returns the shared client, creating it if it does not exist."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.AsyncClient(
+            http2=HTTP2 and HTTP2_AVAILABLE,
+            pool_limits=httpx.PoolLimits(max_keepalive=MAX_KEEPALIVE,
+                                         max_connections=MAX_CONNECTIONS),
+            timeout=httpx.Timeout(TIMEOUT, connect_timeout=CONNECT_TIMEOUT),
+        )
+    return _CLIENT
+
+
+async def close() -> None:
+    """Closes the shared client and all its connections."""
+    global _CLIENT
+    if _CLIENT is not None:
+        client, _CLIENT = _CLIENT, None
+        await client.aclose()
+
+
+def _get_request_key(method: str, url, kwargs: dict) -> Optional[Hashable]:
+    """Returns the key identifying a request for coalescing, or None if
+    the request has arguments other than headers or query parameters."""
+    if not set(kwargs) <= {"headers", "params"}:
+        return None
+    headers = httpx.Headers(kwargs.get("headers") or {})
+    params = httpx.QueryParams(kwargs.get("params") or {})
+    return (
+        method,
+        str(url),
+        tuple(sorted(headers.items())), # Names are lowercased by httpx
+        str(params),
+    )
+
+
+async def get(url, *args, cache: bool=False, **kwargs) -> Response:
+    """Wrapper around the async httpx.get() function.
+
+    Concurrent identical requests are coalesced into a single request.
+    Responses are cached on disk if `cache` is True or the host of `url`
+    has a cache policy, and the cache is enabled in `setup()`."""
+    key = None if args else _get_request_key("GET", url, kwargs)
+    if key is None:
+        return await get_client().get(url, *args, **kwargs)
+
+    policy = None
+    if _CACHE is not None:
+        host = httpx.URL(url).host
+        if cache or host in _CACHE.policies:
+            policy = _CACHE.get_policy(host)
+    if policy is None or not policy.enabled:
+        return await _GETS.run(key, lambda: get_client().get(url, **kwargs))
+    return await _GETS.run(key, lambda: _get_cached(url, key, policy, kwargs))
+
+
+async def _get_cached(url, key: Hashable, policy: CachePolicy, kwargs: dict) -> Response:
+    client = get_client()
+    # Headers the client actually sends, including its default headers
+    request = client.build_request("GET", url, params=kwargs.get("params"), headers=kwargs.get("headers"))
+
+    cached = await _CACHE.get(key)
+    if cached and not cached.matches(request.headers):
+        cached = None # Stored for a request with different `Vary` headers
+    if cached and time.time() - cached.stored < policy.max_age:
+        return _from_cached(cached, url, kwargs)
+
+    if cached:
+        request.headers.update(cached.get_validators())
+    resp = await client.send(request)
+
+    if resp.status_code == 304 and cached:
+        return _from_cached(await _CACHE.refresh(key, cached), url, kwargs)
+
+    if resp.status_code == 200 and _is_storable(resp, policy):
+        await _CACHE.put(key, CachedResponse(
+            url=str(resp.url),
+            status_code=resp.status_code,
+            headers=[
+                (k, v) for k, v in resp.headers.items()
+                if k not in _UNCACHED_HEADERS
+            ],
+            stored=time.time(),
+            content=resp.content,
+            vary=tuple(
+                (name, request.headers.get(name, ""))
+                for name in _get_vary(resp)
+            ),
+        ))
+    return resp
+
+
+def _get_vary(resp: Response) -> List[str]:
+    """Returns the lowercased request header names of the `Vary` header of `resp`."""
+    return [
+        name.strip().lower()
+        for value in resp.headers.getlist("vary")
+        for name in value.split(",")
+        if name.strip()
+    ]
+
+
+def _is_storable(resp: Response, policy: CachePolicy) -> bool:
+    if "no-store" in resp.headers.get("cache-control", ""):
+        return False
+    if "*" in _get_vary(resp): # Varies on more than request headers
+        return False
+    has_validators = "etag" in resp.headers or "last-modified" in resp.headers
+    return has_validators or policy.max_age > 0
+
+
+def _from_cached(cached: CachedResponse, url, kwargs: dict) -> Response:
+    return Response(
+        cached.status_code,
+        request=httpx.Request("GET", url, **kwargs),
+        headers=cached.headers,
+        content=cached.content,
+    )
 
 
 async def post(url, *args, **kwargs) -> Response:
-    """Wrapper around the async httpx.get() function"""
-    async with httpx.AsyncClient() as client:
-        return await client.post(url, *args, **kwargs)
\ No newline at end of file
+    """Wrapper around the async httpx.post() function"""
+    return await get_client().post(url, *args, **kwargs)
+
+
+def stream(method: str, url, *args, **kwargs):
+    """Wrapper around the async httpx.stream() function.
+
+    Returns an async context manager yielding a response whose body
+    has not been read yet.
+
+    Example
+    -------
+    >>> async with stream("GET", url) as resp:
+    ...     async for chunk in resp.aiter_bytes():
+    ...         ...
+    """
+    return get_client().stream(method, url, *args, **kwargs)
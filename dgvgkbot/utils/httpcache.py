@@ -0,0 +1,253 @@
+"""
+On-disk cache of HTTP responses, revalidated with conditional requests.
+
+Responses carrying an `ETag` or `Last-Modified` validator are stored on disk.
+When the same request is made again, the stored validators are sent as
+`If-None-Match` and `If-Modified-Since`, and a `304 Not Modified` response is
+answered with the stored body. Unchanged resources therefore only cost a
+header exchange.
+
+Each host can have its own `CachePolicy`. A policy can disable caching for a
+host entirely, or allow stored responses to be served without revalidation
+for up to `max_age` seconds.
+
+Responses with a `Vary` header are stored along with the values of the request
+headers it names, and only used for requests with the same values. Responses
+with `Vary: *` are never stored.
+
+The total size of the cache directory is bounded. The least recently used
+entries are deleted first.
+
+The cache's methods are coroutines. Files are read and written in the default
+executor, so disk I/O never blocks the event loop.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from . import jsoncodec
+
+MAX_SIZE = 50_000_000 # 50 MB
+
+
+class CachePolicy(NamedTuple):
+    enabled: bool = True
+    max_age: float = 0 # Seconds a response is served without revalidation
+
+
+class CachedResponse(NamedTuple):
+    url: str
+    status_code: int
+    headers: List[Tuple[str, str]]
+    stored: float # UNIX timestamp
+    content: bytes
+    vary: Tuple[Tuple[str, str], ...] = () # Request headers named by `Vary` and their values
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self._get_header("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self._get_header("last-modified")
+
+    def _get_header(self, name: str) -> Optional[str]:
+        for k, v in self.headers:
+            if k.lower() == name:
+                return v
+        return None
+
+    def matches(self, request_headers: Mapping[str, str]) -> bool:
+        """Checks if this response can answer a request with headers
+        `request_headers`. Header names must be looked up case-insensitively."""
+        return all(request_headers.get(name, "") == value for name, value in self.vary)
+
+    def get_validators(self) -> Dict[str, str]:
+        """Returns headers making a request conditional on the resource
+        having changed since this response was stored."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """Size-bounded on-disk store of `CachedResponse` objects.
+
+    Each response is stored as a metadata file (`<key hash>.json`)
+    and a body file (`<key hash>.body`). Public methods run their
+    blocking counterparts in the default executor, one at a time.
+
+    Parameters
+    ----------
+    path : `Union[str, Path]`
+        Cache directory. Created if it does not exist.
+    max_size : `int`, optional
+        Maximum total size of stored responses in bytes.
+    policies : `Optional[Dict[str, CachePolicy]]`, optional
+        Caching policies by hostname.
+    default_policy : `CachePolicy`, optional
+        Policy of hosts without their own policy.
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 max_size: int=MAX_SIZE,
+                 policies: Optional[Dict[str, CachePolicy]]=None,
+                 default_policy: CachePolicy=CachePolicy()) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+        self.policies = policies or {}
+        self.default_policy = default_policy
+        self._index: Optional["OrderedDict[str, int]"] = None # Least recently used first
+        self._size = 0
+        self._lock = threading.RLock() # Executor threads share the index
+
+    @property
+    def size(self) -> int:
+        """Total size of stored responses. Blocks if the index is not loaded."""
+        with self._lock:
+            self._load_index()
+            return self._size
+
+    async def _run(self, meth: Callable[..., Any], *args) -> Any:
+        def to_run():
+            with self._lock:
+                return meth(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, to_run)
+
+    async def get(self, key: Hashable) -> Optional[CachedResponse]:
+        return await self._run(self._get, key)
+
+    async def put(self, key: Hashable, response: CachedResponse) -> None:
+        return await self._run(self._put, key, response)
+
+    async def refresh(self, key: Hashable, response: CachedResponse) -> CachedResponse:
+        """Marks a stored response as revalidated.
+        Only the metadata file is rewritten."""
+        return await self._run(self._refresh, key, response)
+
+    async def clear(self) -> None:
+        return await self._run(self._clear)
+
+    def get_policy(self, host: str) -> CachePolicy:
+        return self.policies.get(host, self.default_policy)
+
+    def _get_name(self, key: Hashable) -> str:
+        return hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        if self._index is not None:
+            return self._index
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        entries = []
+        for meta in self.path.glob("*.json"):
+            body = meta.with_suffix(".body")
+            try:
+                stat = meta.stat()
+                size = stat.st_size + body.stat().st_size
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, meta.stem, size))
+
+        self._index = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self._size = sum(self._index.values())
+        return self._index
+
+    def _get(self, key: Hashable) -> Optional[CachedResponse]:
+        index = self._load_index()
+        name = self._get_name(key)
+        if name not in index:
+            return None
+
+        meta_path = self.path / f"{name}.json"
+        try:
+            with open(meta_path, "rb") as f:
+                meta = jsoncodec.load(f)
+            with open(self.path / f"{name}.body", "rb") as f:
+                content = f.read()
+        except (FileNotFoundError, ValueError):
+            self._remove(name)
+            return None
+
+        index.move_to_end(name)
+        os.utime(meta_path) # Recency survives restarts
+        return CachedResponse(
+            url=meta["url"],
+            status_code=meta["status_code"],
+            headers=[tuple(h) for h in meta["headers"]],
+            stored=meta["stored"],
+            content=content,
+            vary=tuple(tuple(h) for h in meta.get("vary", ())),
+        )
+
+    def _dump_meta(self, response: CachedResponse) -> bytes:
+        return jsoncodec.dumpb({
+            "url": response.url,
+            "status_code": response.status_code,
+            "headers": response.headers,
+            "stored": response.stored,
+            "vary": response.vary,
+        }, compact=True)
+
+    def _put(self, key: Hashable, response: CachedResponse) -> None:
+        index = self._load_index()
+        name = self._get_name(key)
+        meta = self._dump_meta(response)
+
+        size = len(meta) + len(response.content)
+        if size > self.max_size:
+            return
+
+        self._remove(name)
+        with open(self.path / f"{name}.body", "wb") as f:
+            f.write(response.content)
+        # Metadata is written last, so an entry is never indexed without a body
+        with open(self.path / f"{name}.json", "wb") as f:
+            f.write(meta)
+        index[name] = size
+        self._size += size
+        self._evict()
+
+    def _refresh(self, key: Hashable, response: CachedResponse) -> CachedResponse:
+        refreshed = response._replace(stored=time.time())
+        index = self._load_index()
+        name = self._get_name(key)
+        if name not in index:
+            self._put(key, refreshed)
+            return refreshed
+
+        meta = self._dump_meta(refreshed)
+        with open(self.path / f"{name}.json", "wb") as f:
+            f.write(meta)
+        size = len(meta) + len(refreshed.content)
+        self._size += size - index[name]
+        index[name] = size
+        index.move_to_end(name)
+        return refreshed
+
+    def _remove(self, name: str) -> None:
+        index = self._load_index()
+        self._size -= index.pop(name, 0)
+        for suffix in (".json", ".body"):
+            try:
+                (self.path / f"{name}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        index = self._load_index()
+        while self._size > self.max_size and index:
+            self._remove(next(iter(index)))
+
+    def _clear(self) -> None:
+        for name in list(self._load_index()):
+            self._remove(name)
@@ -1,28 +1,28 @@
-import json
 from typing import Any, Union
 from pathlib import Path
 
 from aiofile import AIOFile
 
+from . import jsoncodec
 from .wsl import in_wsl
 
 
-async def dump_json(fp: str, obj: Any, default: Any=None) -> None:
-    d = json.dumps(obj, indent=4, default=default)
-    async with AIOFile(fp, "w") as f:
+async def dump_json(fp: str, obj: Any, default: Any=None, *, compact: bool=False) -> None:
+    d = jsoncodec.dumpb(obj, compact=compact, default=default)
+    async with AIOFile(fp, "wb") as f:
         await f.write(d)
 
 
-def dump_json_blocking(fp: str, obj: Any, default: Any=None) -> None:
+def dump_json_blocking(fp: str, obj: Any, default: Any=None, *, compact: bool=False) -> None:
     """Blocking fallback."""
-    d = json.dumps(obj, indent=4, default=default)
-    with open(fp, "w") as f:
+    d = jsoncodec.dumpb(obj, compact=compact, default=default)
+    with open(fp, "wb") as f:
         f.write(d)
 
 
 if in_wsl():
     # AIOFile doesn't seem to work on Microsoft's 4.4.0-18362 Linux kernel
     # Warning received on startup: <frozen importlib._bootstrap>:219: RuntimeWarning: Linux supports fsync/fdsync with io_submit since 4.18 but current kernel 4.4.0-18362-Microsoft doesn't support it. Related calls will have no effect.
-    async def blocking_dump(fp: str, obj: Any, default: Any=None) -> None:
-        return dump_json_blocking(fp, obj, default)
+    async def blocking_dump(fp: str, obj: Any, default: Any=None, *, compact: bool=False) -> None:
+        return dump_json_blocking(fp, obj, default, compact=compact)
     dump_json = blocking_dump
@@ -0,0 +1,114 @@
+"""
+JSON codec used for every JSON file the bot reads or writes.
+
+Uses `orjson` or `ujson` if either of them is installed, and falls back on
+the standard library `json` module otherwise. The rest of the bot should
+never import a JSON library directly, but go through `loads()`/`dumps()`
+defined here instead.
+
+Files are written in one of two modes:
+    - Indented (default): For files that humans are expected to read or edit.
+    - Compact: No whitespace at all. Used for files that are only ever read
+      and written by the bot itself, e.g. the access control files.
+
+NOTE
+----
+`orjson` only supports 2-space indentation, so indented files written with
+the `orjson` backend are indented by 2 spaces rather than 4.
+"""
+import json
+from contextlib import suppress
+from typing import Any, Callable, Dict, IO, List, NamedTuple, Optional, Union
+
+
+class Backend(NamedTuple):
+    name: str
+    loads: Callable[[Union[str, bytes]], Any]
+    dumpb: Callable[[Any, bool, Optional[Callable[[Any], Any]]], bytes]
+
+
+# Every backend raises a subclass of ValueError on malformed input
+JSONDecodeError = ValueError
+
+
+def _json_dumpb(obj: Any, compact: bool, default: Optional[Callable[[Any], Any]]) -> bytes:
+    if compact:
+        s = json.dumps(obj, separators=(",", ":"), default=default)
+    else:
+        s = json.dumps(obj, indent=4, default=default)
+    return s.encode("utf-8")
+
+
+# Ordered by preference. Fastest first.
+BACKENDS: Dict[str, Backend] = {}
+
+with suppress(ImportError):
+    import orjson
+
+    def _orjson_dumpb(obj: Any, compact: bool, default: Optional[Callable[[Any], Any]]) -> bytes:
+        # OPT_NON_STR_KEYS mirrors the stdlib behavior of coercing int keys to str
+        opts = orjson.OPT_NON_STR_KEYS
+        if not compact:
+            opts |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=opts)
+
+    BACKENDS["orjson"] = Backend("orjson", orjson.loads, _orjson_dumpb)
+
+with suppress(ImportError):
+    import ujson
+
+    def _ujson_dumpb(obj: Any, compact: bool, default: Optional[Callable[[Any], Any]]) -> bytes:
+        # Older versions of ujson have no `default` parameter
+        if default is not None:
+            return _json_dumpb(obj, compact, default)
+        return ujson.dumps(obj, indent=0 if compact else 4).encode("utf-8")
+
+    BACKENDS["ujson"] = Backend("ujson", ujson.loads, _ujson_dumpb)
+
+BACKENDS["json"] = Backend("json", json.loads, _json_dumpb)
+
+BACKEND: Backend = next(iter(BACKENDS.values()))
+
+
+def set_backend(name: str) -> None:
+    """Selects the JSON library to use by name.
+
+    Mainly useful for benchmarks and tests, as the fastest available
+    backend is selected automatically on import.
+    """
+    global BACKEND
+    try:
+        BACKEND = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"JSON backend '{name}' is not available. "
+                         f"Available backends: {', '.join(BACKENDS)}")
+
+
+def get_backend() -> str:
+    """Returns name of the JSON backend in use."""
+    return BACKEND.name
+
+
+def available_backends() -> List[str]:
+    return list(BACKENDS)
+
+
+def loads(s: Union[str, bytes]) -> Any:
+    """Deserializes a JSON document. Accepts both `str` and `bytes`."""
+    return BACKEND.loads(s)
+
+
+def load(fp: IO) -> Any:
+    """Deserializes a JSON document from a file-like object
+    opened in either text or binary mode."""
+    return BACKEND.loads(fp.read())
+
+
+def dumpb(obj: Any, *, compact: bool=False, default: Optional[Callable[[Any], Any]]=None) -> bytes:
+    """Serializes `obj` to UTF-8 encoded JSON."""
+    return BACKEND.dumpb(obj, compact, default)
+
+
+def dumps(obj: Any, *, compact: bool=False, default: Optional[Callable[[Any], Any]]=None) -> str:
+    """Serializes `obj` to a JSON formatted `str`."""
+    return BACKEND.dumpb(obj, compact, default).decode("utf-8")
@@ -0,0 +1,263 @@
+"""
+Per-guild indexes of member names.
+
+Looking up a member by name used to compare the name and nickname of every
+member of a guild. A `MemberIndex` maps the normalized name, nickname and
+`name#discriminator` of each member of a guild to their IDs, so a lookup is a
+single dictionary access.
+
+Members can also be searched for by approximate name (see `search_members()`),
+e.g. "vjem" or "vjemmei" finds "vjemmie". Every index also maps the trigrams
+(three-character substrings) of each name and nickname to the members having
+them. Only members sharing trigrams with the search term are scored, so a
+search does not compare the term against every member of the guild.
+
+Indexes are built the first time a guild is looked up, and are kept up to date
+by the member event handlers of `DiscordBot`. An index is rebuilt if its size
+no longer matches the guild's member cache, which happens if members are loaded
+into the cache without an event being dispatched, e.g. when a guild is chunked.
+
+Without the members intent (see `discord.members_intent` in the config), member
+events are not received and the member cache only holds members the bot has
+seen, e.g. message authors. Lookups then only find those members, and members
+can still be found by mention or ID.
+
+Names can still change without an event being received, e.g. while the bot is
+disconnected. Every member found through an index is therefore checked against
+their current name and nickname, and re-indexed if they have changed, so
+a lookup never returns a member by a name they no longer have.
+"""
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+import discord
+
+
+def normalize(name: str) -> str:
+    """Normalizes a name for case-insensitive comparison."""
+    return unicodedata.normalize("NFKC", name).casefold()
+
+
+# Fuzzy search settings
+MAX_CANDIDATES = 50 # Members sharing the most trigrams with a search term are scored
+MIN_SCORE = 0.4 # Minimum score of search results
+PREFIX_SCORE = 0.8 # Names starting with the search term score between this and 1.0
+ACCEPT_SCORE = 0.6 # Minimum score of a match chosen without asking
+MIN_LEAD = 0.1 # Minimum lead of a chosen match over the next best match
+MIN_ACCEPT_LENGTH = 3 # Shorter search terms are never matched without asking
+
+
+class MemberMatch(NamedTuple):
+    score: float # 1.0 is an exact match
+    member: discord.Member
+
+
+def _get_names(member: Union[discord.Member, discord.User]) -> Tuple[str, ...]:
+    """Returns the normalized name and nickname of a member."""
+    names = [normalize(member.name)]
+    nick = getattr(member, "nick", None)
+    if nick:
+        names.append(normalize(nick))
+    return tuple(dict.fromkeys(names)) # Name and nick can be identical
+
+
+def _get_trigrams(name: str) -> Set[str]:
+    # Padding makes the start of a name weigh more, which favours prefixes
+    padded = f"  {name} "
+    return {padded[i:i+3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance, counting transposed adjacent characters
+    (a common typo) as a single edit."""
+    before_previous_row: List[int] = []
+    previous_row = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        row = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(
+                row[j - 1] + 1, # Insertion
+                previous_row[j] + 1, # Deletion
+                previous_row[j - 1] + (char_a != char_b), # Substitution
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before_previous_row[j - 2] + 1) # Transposition
+            row.append(distance)
+        before_previous_row, previous_row = previous_row, row
+    return previous_row[-1]
+
+
+def _score(term: str, name: str) -> float:
+    """Scores how well `name` matches search term `term`.
+    Exact matches score 1.0, followed by prefix matches,
+    then names with the fewest typos."""
+    if name == term:
+        return 1.0
+    if name.startswith(term):
+        return PREFIX_SCORE + (1.0 - PREFIX_SCORE) * len(term) / len(name)
+    similarity = 1.0 - _edit_distance(term, name) / max(len(term), len(name))
+    return PREFIX_SCORE * similarity
+
+
+class MemberIndex:
+    """Maps normalized names, nicknames and `name#discriminator`s
+    of a guild's members to their IDs."""
+
+    def __init__(self, guild: discord.Guild) -> None:
+        self.guild = guild
+        self._ids: Dict[str, Set[int]] = {}
+        self._keys: Dict[int, Tuple[str, ...]] = {} # Member ID: keys
+        self._names: Dict[int, Tuple[str, ...]] = {} # Member ID: name and nickname
+        self._trigrams: Dict[str, Set[int]] = {} # Trigram: member IDs
+        for member in guild.members:
+            self.add(member)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, member: Union[discord.Member, discord.User]) -> Tuple[str, ...]:
+        """Adds a member, or updates a member's names if already added.
+        Returns the member's keys."""
+        names = _get_names(member)
+        keys = names + (normalize(f"{member.name}#{member.discriminator}"),)
+        if self._keys.get(member.id) == keys:
+            return keys
+        self.remove(member.id)
+        self._keys[member.id] = keys
+        self._names[member.id] = names
+        for key in keys:
+            self._ids.setdefault(key, set()).add(member.id)
+        for trigram in set().union(*map(_get_trigrams, names)):
+            self._trigrams.setdefault(trigram, set()).add(member.id)
+        return keys
+
+    def remove(self, member_id: int) -> None:
+        for key in self._keys.pop(member_id, ()):
+            self._discard(self._ids, key, member_id)
+        for trigram in set().union(*map(_get_trigrams, self._names.pop(member_id, ()))):
+            self._discard(self._trigrams, trigram, member_id)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[int]], key: str, member_id: int) -> None:
+        ids = index[key]
+        ids.discard(member_id)
+        if not ids:
+            del index[key]
+
+    def get_ids(self, name: str) -> Set[int]:
+        """Returns IDs of members whose name, nickname or
+        `name#discriminator` is `name`, ignoring case.
+        The names are not checked against the members' current names."""
+        return self._ids.get(normalize(name), set())
+
+    def find(self, name: str) -> List[discord.Member]:
+        """Returns members whose name, nickname or `name#discriminator`
+        is `name`, ignoring case."""
+        key = normalize(name)
+        found = []
+        for member_id in list(self._ids.get(key, ())):
+            member = self.guild.get_member(member_id)
+            # Re-indexed if renamed without an event being received
+            if member is not None and key in self.add(member):
+                found.append(member)
+        return found
+
+    def search(self, term: str, limit: int=5) -> List[MemberMatch]:
+        """Returns up to `limit` members whose name or nickname
+        approximately matches `term`, best matches first."""
+        term = normalize(term)
+        if not term:
+            return []
+
+        # Members sharing the most trigrams with the term are the likeliest matches
+        shared: Counter = Counter()
+        for trigram in _get_trigrams(term):
+            shared.update(self._trigrams.get(trigram, ()))
+
+        matches = []
+        for member_id, _ in shared.most_common(MAX_CANDIDATES):
+            member = self.guild.get_member(member_id)
+            if member is None:
+                continue
+            self.add(member) # Scored by current names
+            score = max(_score(term, name) for name in self._names[member_id])
+            if score >= MIN_SCORE:
+                matches.append(MemberMatch(score, member))
+        matches.sort(key=lambda m: (-m.score, m.member.name))
+        return matches[:limit]
+
+
+_INDEXES: Dict[int, MemberIndex] = {} # Guild ID: MemberIndex
+
+
+def get_index(guild: discord.Guild) -> MemberIndex:
+    """Returns the member index of `guild`, building it if necessary."""
+    index = _INDEXES.get(guild.id)
+    if index is None or len(index) != len(guild.members):
+        index = _INDEXES[guild.id] = MemberIndex(guild)
+    return index
+
+
+def find_members(guilds: Iterable[discord.Guild], name: str) -> List[discord.Member]:
+    """Returns members of `guilds` whose name, nickname or
+    `name#discriminator` is `name`, ignoring case.
+    Users that are members of several of the guilds are only returned once."""
+    members: Dict[int, discord.Member] = {}
+    for guild in guilds:
+        for member in get_index(guild).find(name):
+            members.setdefault(member.id, member)
+    return list(members.values())
+
+
+def search_members(guilds: Iterable[discord.Guild], term: str, limit: int=5) -> List[MemberMatch]:
+    """Returns up to `limit` members of `guilds` whose name or nickname
+    approximately matches `term`, best matches first.
+    Users that are members of several of the guilds are only returned once."""
+    matches: Dict[int, MemberMatch] = {}
+    for guild in guilds:
+        for match in get_index(guild).search(term, limit):
+            if match.member.id not in matches or match.score > matches[match.member.id].score:
+                matches[match.member.id] = match
+    return sorted(matches.values(), key=lambda m: (-m.score, m.member.name))[:limit]
+
+
+# Called by the event handlers of `DiscordBot`.
+# Guilds that have not been indexed yet are left alone.
+
+def add_member(member: discord.Member) -> None:
+    index = _INDEXES.get(member.guild.id)
+    if index is not None:
+        index.add(member)
+
+
+def remove_member(member: discord.Member) -> None:
+    index = _INDEXES.get(member.guild.id)
+    if index is not None:
+        index.remove(member.id)
+
+
+def update_user(user: discord.User) -> None:
+    """Updates the name of user `user` in every guild they are a member of."""
+    for index in _INDEXES.values():
+        member = index.guild.get_member(user.id)
+        if member is not None:
+            index.add(member)
+
+
+def remove_guild(guild: discord.Guild) -> None:
+    _INDEXES.pop(guild.id, None)
+
+
+def get_best_match(matches: List[MemberMatch], term: str) -> Optional[discord.Member]:
+    """Returns the member of the best match in `matches` of search term `term`,
+    if it scores at least `ACCEPT_SCORE` and is clearly better than the next
+    best match. Terms shorter than `MIN_ACCEPT_LENGTH` are too ambiguous
+    (e.g. "a" is a prefix of "alice"), and only exact matches are accepted."""
+    if not matches or matches[0].score < ACCEPT_SCORE:
+        return None
+    if len(normalize(term)) < MIN_ACCEPT_LENGTH and matches[0].score < 1.0:
+        return None
+    if len(matches) > 1 and matches[0].score - matches[1].score < MIN_LEAD:
+        return None
+    return matches[0].member
@@ -0,0 +1,256 @@
+"""
+Rate-limit aware outbound message scheduler.
+
+Messages are sent through a per-channel queue instead of calling
+`channel.send()` directly. Each channel's queue is drained by its own worker,
+which keeps track of the channel's rate limit bucket and waits for it to
+refill instead of running into 429 responses.
+
+Messages are sent in order of priority, so replies to users are sent before
+queued log messages. Sends across all channels additionally share a global
+bucket, whose slots are handed out by priority as well, so bursts of log
+messages in one channel do not delay replies in another.
+
+Adjacent small text messages to the same channel with the same priority
+are merged into a single message, up to `MAX_LENGTH` characters.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+# Discord allows 5 messages per 5 seconds per channel
+CHANNEL_RATE = 5
+CHANNEL_PER = 5.0 # Seconds
+
+# Discord allows 50 requests per second globally.
+# Some headroom is left for requests not sent through the outbox.
+GLOBAL_RATE = 40
+GLOBAL_PER = 1.0 # Seconds
+
+MAX_LENGTH = 2000 # Characters
+SEPARATOR = "\n"
+
+
+class Priority(IntEnum):
+    REPLY = 0
+    NORMAL = 1
+    LOG = 2
+
+
+class _Bucket:
+    """Sliding window rate limit bucket."""
+
+    def __init__(self, rate: int, per: float) -> None:
+        self.rate = rate
+        self.per = per
+        self._sent: Deque[float] = deque()
+
+    def get_delay(self) -> float:
+        """Returns seconds until a message can be sent."""
+        now = time.monotonic()
+        while self._sent and now - self._sent[0] >= self.per:
+            self._sent.popleft()
+        if len(self._sent) < self.rate:
+            return 0.0
+        return self.per - (now - self._sent[0])
+
+    def consume(self) -> None:
+        self._sent.append(time.monotonic())
+
+
+class _GlobalBucket(_Bucket):
+    """Rate limit bucket whose slots are handed out by priority."""
+
+    def __init__(self, rate: int, per: float) -> None:
+        super().__init__(rate, per)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._waking = False
+
+    async def acquire(self, priority: int) -> None:
+        if not self._waiters and not self.get_delay():
+            self.consume()
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        if not self._waking:
+            self._waking = True
+            asyncio.ensure_future(self._wake())
+        await future
+
+    async def _wake(self) -> None:
+        try:
+            while self._waiters:
+                delay = self.get_delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                    continue
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done(): # Skip cancelled waiters
+                    self.consume()
+                    future.set_result(None)
+        finally:
+            self._waking = False
+
+
+class _Message:
+    __slots__ = ("content", "kwargs", "coalesce", "futures")
+
+    def __init__(self, content: Optional[str], kwargs: Dict[str, Any], coalesce: bool) -> None:
+        self.content = content
+        self.kwargs = kwargs
+        self.coalesce = coalesce and not kwargs and bool(content)
+        self.futures: List[asyncio.Future] = [asyncio.get_running_loop().create_future()]
+
+
+class _ChannelQueue:
+    def __init__(self) -> None:
+        self.heap: List[Tuple[int, int, _Message]] = []
+        self.bucket = _Bucket(CHANNEL_RATE, CHANNEL_PER)
+        self.worker: Optional[asyncio.Task] = None
+
+
+class Outbox:
+    """Per-channel outbound message queues."""
+
+    def __init__(self) -> None:
+        self._queues: Dict[int, _ChannelQueue] = {}
+        self._global = _GlobalBucket(GLOBAL_RATE, GLOBAL_PER)
+        self._counter = itertools.count()
+
+    async def send(self,
+                   channel: discord.abc.Messageable,
+                   content: Optional[str]=None,
+                   *,
+                   priority: Priority=Priority.NORMAL,
+                   coalesce: bool=False,
+                   **kwargs) -> discord.Message:
+        """Queues a message and waits until it is sent.
+
+        Parameters
+        ----------
+        channel : `discord.abc.Messageable`
+            Channel (or context) to send message to
+        content : `Optional[str]`, optional
+            Message text
+        priority : `Priority`, optional
+            Messages with lower values are sent first
+        coalesce : `bool`, optional
+            Allow merging this message with adjacent messages. Only text
+            messages without any other keyword arguments are merged.
+        **kwargs
+            Passed to `channel.send()`
+
+        Returns
+        -------
+        `discord.Message`
+            Sent message. Merged messages share the same message.
+        """
+        target = await channel._get_channel()
+        msg = _Message(content, kwargs, coalesce)
+
+        queue = self._queues.get(target.id)
+        if queue is None:
+            queue = self._queues[target.id] = _ChannelQueue()
+        heapq.heappush(queue.heap, (priority, next(self._counter), msg))
+        if queue.worker is None:
+            queue.worker = asyncio.ensure_future(self._drain(target, queue))
+
+        return await msg.futures[0]
+
+    def _pop(self, queue: _ChannelQueue) -> Tuple[int, _Message]:
+        """Pops the next message, merged with messages queued after it."""
+        priority, _, msg = heapq.heappop(queue.heap)
+        if not msg.coalesce:
+            return priority, msg
+
+        parts = [msg.content]
+        length = len(msg.content)
+        while queue.heap:
+            next_priority, _, next_msg = queue.heap[0]
+            if next_priority != priority or not next_msg.coalesce:
+                break
+            new_length = length + len(SEPARATOR) + len(next_msg.content)
+            if new_length > MAX_LENGTH:
+                break
+            heapq.heappop(queue.heap)
+            parts.append(next_msg.content)
+            msg.futures.extend(next_msg.futures)
+            length = new_length
+
+        msg.content = SEPARATOR.join(parts)
+        return priority, msg
+
+    async def _drain(self, channel: discord.abc.Messageable, queue: _ChannelQueue) -> None:
+        try:
+            while queue.heap:
+                delay = queue.bucket.get_delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                priority, msg = self._pop(queue)
+                try:
+                    await self._global.acquire(priority)
+                    queue.bucket.consume()
+                    result = await channel.send(msg.content, **msg.kwargs)
+                except asyncio.CancelledError:
+                    for future in msg.futures:
+                        future.cancel()
+                    raise
+                except Exception as e:
+                    for future in msg.futures:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for future in msg.futures:
+                        if not future.done():
+                            future.set_result(result)
+        finally:
+            # Reap idle queues
+            queue.worker = None
+            if not queue.heap:
+                self._queues.pop(channel.id, None)
+
+    async def close(self) -> None:
+        """Cancels all queued messages."""
+        workers = [q.worker for q in self._queues.values() if q.worker]
+        for queue in self._queues.values():
+            for _, _, msg in queue.heap:
+                for future in msg.futures:
+                    future.cancel()
+            queue.heap.clear()
+        for worker in workers:
+            worker.cancel()
+        self._queues.clear()
+
+
+_OUTBOX: Optional[Outbox] = None
+
+
+def get_outbox() -> Outbox:
+    global _OUTBOX
+    if _OUTBOX is None:
+        _OUTBOX = Outbox()
+    return _OUTBOX
+
+
+async def send(channel: discord.abc.Messageable,
+               content: Optional[str]=None,
+               *,
+               priority: Priority=Priority.NORMAL,
+               coalesce: bool=False,
+               **kwargs) -> discord.Message:
+    """Sends a message through the shared outbox. See `Outbox.send()`."""
+    return await get_outbox().send(channel, content, priority=priority, coalesce=coalesce, **kwargs)
+
+
+async def close() -> None:
+    global _OUTBOX
+    if _OUTBOX is not None:
+        outbox, _OUTBOX = _OUTBOX, None
+        await outbox.close()
@@ -0,0 +1,237 @@
+"""
+Reaction-controlled embed pagination.
+
+Long output is sent as a single message showing one page at a time, instead of
+one message per page. The message is edited in place when the user who
+requested it reacts with one of the arrow emojis. Only added reactions turn the
+page, since reaction removals are only received for members in the member cache.
+If the bot can manage messages in the channel, it removes the user's reaction
+after turning the page, so the same arrow can be clicked again right away.
+
+Pages can also be added while the first page is being sent, so long output
+starts appearing before all of it is formatted. The first page is numbered
+once the last page has been added.
+
+A paginator stops listening for reactions after `TIMEOUT` seconds without
+input. Each paginator holds at most `MAX_PAGES` pages, and at most
+`MAX_ACTIVE` paginators are active at once. When the limit is reached,
+the oldest paginator is stopped.
+"""
+import asyncio
+from collections import OrderedDict
+from contextlib import suppress
+from typing import AsyncIterator, List, Optional, Tuple
+
+import discord
+from discord.ext import commands
+
+from .outbox import Priority, send
+
+TIMEOUT = 120.0 # Seconds without reactions before a paginator stops
+MAX_PAGES = 50
+MAX_ACTIVE = 100
+
+FIRST = "\N{BLACK LEFT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}\ufe0f"
+PREVIOUS = "\N{BLACK LEFT-POINTING TRIANGLE}\ufe0f"
+NEXT = "\N{BLACK RIGHT-POINTING TRIANGLE}\ufe0f"
+LAST = "\N{BLACK RIGHT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}\ufe0f"
+
+_ACTIVE: "OrderedDict[int, Paginator]" = OrderedDict() # Message ID: Paginator
+
+
+class Paginator:
+    """Shows a list of embeds one page at a time.
+
+    Parameters
+    ----------
+    pages : `List[discord.Embed]`
+        Pages to show. Pages beyond `MAX_PAGES` are discarded.
+        A page number is added to the footer of every page,
+        unless there is only one. More pages can be added
+        when starting the paginator.
+    user_id : `Optional[int]`, optional
+        ID of user allowed to turn the pages.
+        Anyone but bots can turn the pages if None.
+    timeout : `float`, optional
+        Seconds without reactions before the paginator stops.
+    """
+
+    def __init__(self,
+                 pages: List[discord.Embed],
+                 *,
+                 user_id: Optional[int]=None,
+                 timeout: float=TIMEOUT) -> None:
+        if not pages:
+            raise ValueError("Paginator must have at least one page.")
+        self.pages = pages[:MAX_PAGES]
+        self.user_id = user_id
+        self.timeout = timeout
+        self.index = 0
+        self.message: Optional[discord.Message] = None
+        self.emojis: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _prepare_pages(self) -> None:
+        """Picks the reactions and numbers the pages.
+        Called once all pages have been added."""
+        if len(self.pages) > 2:
+            self.emojis = [FIRST, PREVIOUS, NEXT, LAST]
+        else:
+            self.emojis = [PREVIOUS, NEXT]
+
+        if len(self.pages) == 1:
+            return
+        for i, page in enumerate(self.pages, start=1):
+            text = f"Page {i}/{len(self.pages)}"
+            if page.footer.text:
+                text = f"{page.footer.text} • {text}"
+            page.set_footer(text=text, icon_url=page.footer.icon_url)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self,
+                    bot: commands.Bot,
+                    destination: discord.abc.Messageable,
+                    content: Optional[str]=None,
+                    more: Optional[AsyncIterator[discord.Embed]]=None) -> discord.Message:
+        """Sends the first page and starts listening for reactions
+        in the background. Single pages are sent without reactions.
+
+        Parameters
+        ----------
+        bot : `commands.Bot`
+            Bot to receive reaction events from
+        destination : `discord.abc.Messageable`
+            Channel (or context) to send message to
+        content : `Optional[str]`, optional
+            Message text displayed above the embed.
+        more : `Optional[AsyncIterator[discord.Embed]]`, optional
+            Pages still being built. They are added while the first
+            page is being sent, up to `MAX_PAGES` pages in total.
+
+        Returns
+        -------
+        `discord.Message`
+            The paginated message
+        """
+        if more is None:
+            self._prepare_pages()
+            self.message = await send(destination, content, embed=self.pages[0], priority=Priority.REPLY)
+        else:
+            self.message = await self._send_streamed(destination, content, more)
+        if len(self.pages) == 1:
+            return self.message
+
+        try:
+            if more is not None:
+                await self.message.edit(embed=self.pages[0]) # Add page number
+            for emoji in self.emojis:
+                await self.message.add_reaction(emoji)
+        except discord.HTTPException:
+            return self.message # Missing permissions. Only the first page is shown.
+
+        _ACTIVE[self.message.id] = self
+        while len(_ACTIVE) > MAX_ACTIVE:
+            _, oldest = _ACTIVE.popitem(last=False)
+            oldest.stop()
+        self._task = asyncio.ensure_future(self._run(bot))
+        return self.message
+
+    async def _send_streamed(self,
+                             destination: discord.abc.Messageable,
+                             content: Optional[str],
+                             more: AsyncIterator[discord.Embed]) -> discord.Message:
+        """Sends the first page while the rest are added from `more`."""
+        sending = asyncio.ensure_future(
+            send(destination, content, embed=self.pages[0], priority=Priority.REPLY)
+        )
+        try:
+            async for page in more:
+                if len(self.pages) >= MAX_PAGES:
+                    break
+                self.pages.append(page)
+                await asyncio.sleep(0) # Let the first page be sent
+        except BaseException:
+            sending.cancel()
+            raise
+        message = await sending
+        self._prepare_pages()
+        return message
+
+    def stop(self) -> None:
+        """Stops listening for reactions."""
+        if self.running:
+            self._task.cancel()
+            asyncio.ensure_future(self._clear_reactions())
+
+    async def _run(self, bot: commands.Bot) -> None:
+        can_remove = _can_manage_messages(self.message)
+        try:
+            while True:
+                reaction, user = await self._wait_for_reaction(bot)
+                await self.show_page(self._get_index(str(reaction.emoji)))
+                if can_remove:
+                    with suppress(discord.Forbidden):
+                        await self.message.remove_reaction(reaction.emoji, user)
+        except asyncio.TimeoutError:
+            await self._clear_reactions()
+        except discord.HTTPException: # Message was deleted
+            pass
+        finally:
+            _ACTIVE.pop(self.message.id, None)
+            self.pages = [] # Free pages right away. Paginators can outlive their messages.
+
+    async def _wait_for_reaction(self, bot: commands.Bot) -> Tuple[discord.Reaction, discord.User]:
+        def check(reaction: discord.Reaction, user: discord.User) -> bool:
+            return (
+                reaction.message.id == self.message.id
+                and str(reaction.emoji) in self.emojis
+                and not user.bot
+                and (self.user_id is None or user.id == self.user_id)
+            )
+
+        return await bot.wait_for("reaction_add", check=check, timeout=self.timeout)
+
+    def _get_index(self, emoji: str) -> int:
+        index = {
+            FIRST: 0,
+            PREVIOUS: self.index - 1,
+            NEXT: self.index + 1,
+            LAST: len(self.pages) - 1,
+        }[emoji]
+        return max(0, min(index, len(self.pages) - 1))
+
+    async def show_page(self, index: int) -> None:
+        """Edits the message to show page number `index` (zero-indexed)."""
+        if index == self.index:
+            return
+        self.index = index
+        await self.message.edit(embed=self.pages[index])
+
+    async def _clear_reactions(self) -> None:
+        try:
+            await self.message.clear_reactions()
+        except discord.Forbidden: # Can only remove our own reactions
+            for emoji in self.emojis:
+                with suppress(discord.HTTPException):
+                    await self.message.remove_reaction(emoji, self.message.author)
+        except discord.HTTPException:
+            pass
+
+
+def _can_manage_messages(message: discord.Message) -> bool:
+    """Checks if the bot can remove other users' reactions to `message`."""
+    guild = getattr(message.channel, "guild", None)
+    if guild is None: # Private channel
+        return False
+    return message.channel.permissions_for(guild.me).manage_messages
+
+
+def close() -> None:
+    """Stops all active paginators."""
+    for paginator in list(_ACTIVE.values()):
+        if paginator.running:
+            paginator._task.cancel()
+    _ACTIVE.clear()
@@ -1,9 +1,30 @@
+from weakref import WeakKeyDictionary
+
 from discord.ext.commands import converter as converters
 from discord.ext.commands import Command
 
+# Signatures and help docs are computed once per command.
+# Cleared by `clear_signature_cache()` whenever commands are added or removed.
+_SIGNATURES: "WeakKeyDictionary[Command, str]" = WeakKeyDictionary()
+_HELP_DOCS: "WeakKeyDictionary[Command, str]" = WeakKeyDictionary()
+
+
+def clear_signature_cache() -> None:
+    _SIGNATURES.clear()
+    _HELP_DOCS.clear()
+
+
 @property
 def signature(self):
     """Returns a POSIX-like signature useful for help command output."""
+    try:
+        return _SIGNATURES[self]
+    except KeyError:
+        sig = _SIGNATURES[self] = _get_signature(self)
+        return sig
+
+
+def _get_signature(self):
     if self.usage is not None:
         return self.usage
 
@@ -44,11 +65,15 @@ def signature(self):
 
 def patch_command_signature(cmd: Command) -> Command:
     """Patches `discord.ext.commands.Command`'s `signature` method to ignore
-    keyword-only parameters."""
+    keyword-only parameters and cache its result."""
     cmd.signature = signature
     setattr(cmd, "help_doc", help_doc)
 
 @property
 def help_doc(instance) -> str:
-    # Only show up to method param list if it exists
-    return instance.help.split("\nParameters")[0] if instance.help else ""
+    try:
+        return _HELP_DOCS[instance]
+    except KeyError:
+        # Only show up to method param list if it exists
+        doc = _HELP_DOCS[instance] = instance.help.split("\nParameters")[0] if instance.help else ""
+        return doc
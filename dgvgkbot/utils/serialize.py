@@ -1,18 +1,18 @@
-import json
 from typing import Any, Union
 
+from . import jsoncodec
+
 
 def load_json(fp: str, default_factory:Union[list, dict]=dict, encoding="utf-8") -> Union[list, dict]:
     with open(fp, "r", encoding=encoding) as f:
         try:
-            r = json.load(f)
-        except json.JSONDecodeError:
+            r = jsoncodec.load(f)
+        except jsoncodec.JSONDecodeError:
             return default_factory()
         else:
             return r
 
-def dump_json(fp: str, obj: Any, default: Any=None, encoding="utf-8") -> None:
-    d = json.dumps(obj, indent=4, default=default)
-    with open(fp, "w", encoding="utf-8") as f:
+def dump_json(fp: str, obj: Any, default: Any=None, encoding="utf-8", *, compact: bool=False) -> None:
+    d = jsoncodec.dumps(obj, compact=compact, default=default)
+    with open(fp, "w", encoding=encoding) as f:
         f.write(d)
-
@@ -0,0 +1,139 @@
+"""
+Shared aiohttp session.
+
+Every cog shares a single `aiohttp.ClientSession` whose connector bounds the
+total number of open connections, as well as the number of connections
+to any single host. Idle keep-alive connections are closed after
+`KEEPALIVE_TIMEOUT` seconds, and the session is closed by `close()` on shutdown.
+
+Requests made on behalf of a guild are made through `guild_session()`, which
+holds one of the guild's request slots (see `guild_slot()`) while the session
+is in use. This caps the number of concurrent requests per guild, so that
+a single busy guild cannot occupy the entire connection pool.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import aiohttp
+
+# Default session settings. Overridden by the `sessions` section of the config.
+LIMIT = 100
+LIMIT_PER_HOST = 10
+LIMIT_PER_GUILD = 5
+KEEPALIVE_TIMEOUT = 30.0 # Seconds
+DNS_CACHE_TTL = 300 # Seconds
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+class _GuildSlots:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int) -> None:
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0 # Holders and waiters
+
+
+_GUILD_SLOTS: Dict[int, _GuildSlots] = {}
+
+
+def setup(*,
+          limit: int=LIMIT,
+          limit_per_host: int=LIMIT_PER_HOST,
+          limit_per_guild: int=LIMIT_PER_GUILD,
+          keepalive_timeout: float=KEEPALIVE_TIMEOUT,
+          dns_cache_ttl: int=DNS_CACHE_TTL) -> None:
+    """Configures the shared session. Must be called before it is first used.
+
+    Parameters
+    ----------
+    limit : `int`, optional
+        Maximum number of open connections.
+    limit_per_host : `int`, optional
+        Maximum number of open connections to a single host.
+    limit_per_guild : `int`, optional
+        Maximum number of concurrent requests per guild (see `guild_slot()`).
+    keepalive_timeout : `float`, optional
+        Seconds before an idle connection is closed.
+    dns_cache_ttl : `int`, optional
+        Seconds to cache resolved hostnames.
+    """
+    global LIMIT, LIMIT_PER_HOST, LIMIT_PER_GUILD, KEEPALIVE_TIMEOUT, DNS_CACHE_TTL
+
+    if _SESSION is not None:
+        raise RuntimeError("Session is already in use. Close it before changing its settings.")
+
+    LIMIT = limit
+    LIMIT_PER_HOST = limit_per_host
+    LIMIT_PER_GUILD = limit_per_guild
+    KEEPALIVE_TIMEOUT = keepalive_timeout
+    DNS_CACHE_TTL = dns_cache_ttl
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Returns the shared session, creating it if it does not exist.
+    Must be called from a coroutine."""
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        connector = aiohttp.TCPConnector(
+            limit=LIMIT,
+            limit_per_host=LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            enable_cleanup_closed=True,
+        )
+        _SESSION = aiohttp.ClientSession(connector=connector)
+    return _SESSION
+
+
+@asynccontextmanager
+async def guild_slot(guild_id: Optional[int]) -> AsyncIterator[None]:
+    """Waits until guild `guild_id` has fewer than `LIMIT_PER_GUILD`
+    requests in progress. Does nothing if `guild_id` is None.
+
+    Example
+    -------
+    >>> async with guild_slot(ctx.guild.id):
+    ...     async with get_session().get(url) as resp:
+    ...         ...
+    """
+    if guild_id is None:
+        yield
+        return
+
+    slots = _GUILD_SLOTS.get(guild_id)
+    if slots is None:
+        slots = _GUILD_SLOTS[guild_id] = _GuildSlots(LIMIT_PER_GUILD)
+    slots.users += 1
+    try:
+        async with slots.semaphore:
+            yield
+    finally:
+        slots.users -= 1
+        # Reap semaphores of guilds with no requests in progress
+        if not slots.users:
+            del _GUILD_SLOTS[guild_id]
+
+
+@asynccontextmanager
+async def guild_session(guild_id: Optional[int]) -> AsyncIterator[aiohttp.ClientSession]:
+    """Returns the shared session once guild `guild_id` has a free request
+    slot, and holds the slot for the duration of the `async with` block.
+
+    Example
+    -------
+    >>> async with guild_session(ctx.guild.id) as session:
+    ...     async with session.get(url) as resp:
+    ...         ...
+    """
+    async with guild_slot(guild_id):
+        yield get_session()
+
+
+async def close() -> None:
+    """Closes the shared session and all its connections."""
+    global _SESSION
+    if _SESSION is not None:
+        session, _SESSION = _SESSION, None
+        await session.close()
@@ -0,0 +1,126 @@
+"""
+Prefix tree supporting exact, prefix and bounded edit distance lookups.
+"""
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Node(Generic[T]):
+    __slots__ = ("children", "value", "terminal")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_Node[T]"] = {}
+        self.value: Optional[T] = None
+        self.terminal = False
+
+
+class Trie(Generic[T]):
+    """Maps string keys to values.
+
+    Example
+    -------
+    >>> t = Trie()
+    >>> t["help"] = 1
+    >>> t["hello"] = 2
+    >>> t.startswith("hel")
+    [('hello', 2), ('help', 1)]
+    >>> t.search("halp", max_distance=1)
+    [(1, 'help', 1)]
+    """
+
+    def __init__(self) -> None:
+        self._root: _Node[T] = _Node()
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __setitem__(self, key: str, value: T) -> None:
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+        if not node.terminal:
+            self._len += 1
+        node.value = value
+        node.terminal = True
+
+    def __getitem__(self, key: str) -> T:
+        node = self._find(key)
+        if node is None or not node.terminal:
+            raise KeyError(key)
+        return node.value
+
+    def __contains__(self, key: str) -> bool:
+        node = self._find(key)
+        return node is not None and node.terminal
+
+    def get(self, key: str, default: Optional[T]=None) -> Optional[T]:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def _find(self, key: str) -> Optional[_Node[T]]:
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _walk(self, node: _Node[T], prefix: str) -> Iterator[Tuple[str, T]]:
+        if node.terminal:
+            yield prefix, node.value
+        for char in sorted(node.children):
+            yield from self._walk(node.children[char], prefix + char)
+
+    def startswith(self, prefix: str, limit: Optional[int]=None) -> List[Tuple[str, T]]:
+        """Returns up to `limit` (key, value) pairs whose keys start
+        with `prefix`, in lexicographical order."""
+        node = self._find(prefix)
+        if node is None:
+            return []
+        results = []
+        for item in self._walk(node, prefix):
+            results.append(item)
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str, T]]:
+        """Returns (distance, key, value) for every key within Levenshtein
+        distance `max_distance` of `word`, sorted by distance.
+
+        Computes one row of the edit distance matrix per trie node,
+        and skips subtrees that cannot contain a match.
+        """
+        results: List[Tuple[int, str, T]] = []
+        first_row = list(range(len(word) + 1))
+        for char, child in self._root.children.items():
+            self._search(child, char, char, word, first_row, max_distance, results)
+        results.sort(key=lambda r: (r[0], r[1]))
+        return results
+
+    def _search(self,
+                node: _Node[T],
+                char: str,
+                prefix: str,
+                word: str,
+                previous_row: List[int],
+                max_distance: int,
+                results: List[Tuple[int, str, T]]) -> None:
+        row = [previous_row[0] + 1]
+        for i, word_char in enumerate(word, 1):
+            row.append(min(
+                row[i - 1] + 1, # Insertion
+                previous_row[i] + 1, # Deletion
+                previous_row[i - 1] + (word_char != char), # Substitution
+            ))
+
+        if node.terminal and row[-1] <= max_distance:
+            results.append((row[-1], prefix, node.value))
+
+        if min(row) <= max_distance:
+            for next_char, child in node.children.items():
+                self._search(child, next_char, prefix + next_char, word, row, max_distance, results)
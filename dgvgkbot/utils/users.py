@@ -1,18 +1,209 @@
-from typing import Iterable, List, Optional
+"""
+Resolution of user IDs to `discord.User` objects.
+
+Users not in the bot's member cache are resolved by a `UserResolver`, which
+looks them up in an in-memory LRU cache, then in the database, and only then
+fetches them from the API. IDs are deduplicated, and the remaining users are
+fetched concurrently, with at most `MAX_CONCURRENCY` requests at a time.
+
+Fetched users are stored in the database for `USER_TTL` seconds. IDs that do
+not belong to any user are remembered for `NOT_FOUND_TTL` seconds, so they are
+not fetched again every time they appear in a leaderboard.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import discord
 from discord.ext.commands import Bot
 from discord.errors import NotFound
 
+from .http import SingleFlight
+
+# Default resolver settings. Overridden by the `user_cache` section of the config.
+USER_TTL = 86400.0 # Seconds
+NOT_FOUND_TTL = 3600.0 # Seconds
+CACHE_SIZE = 1000
+MAX_CONCURRENCY = 5
+
+PRUNE_INTERVAL = 3600.0 # Seconds between removing expired users from the database
+
+_UserRow = Tuple[int, Optional[str], Optional[str], Optional[str], bool]
+
+
+class UserResolver:
+    """Resolves user IDs using the member cache, an LRU cache,
+    the database and the API, in that order.
+
+    Parameters
+    ----------
+    bot : `Bot`
+        Bot to look up and fetch users with. Its `db` attribute
+        is used as the persistent cache.
+    ttl : `float`, optional
+        Seconds a fetched user is cached.
+    not_found_ttl : `float`, optional
+        Seconds an ID that does not belong to a user is cached.
+    cache_size : `int`, optional
+        Maximum number of users kept in memory.
+    concurrency : `int`, optional
+        Maximum number of users fetched from the API at once.
+    """
+
+    def __init__(self,
+                 bot: Bot,
+                 *,
+                 ttl: float=USER_TTL,
+                 not_found_ttl: float=NOT_FOUND_TTL,
+                 cache_size: int=CACHE_SIZE,
+                 concurrency: int=MAX_CONCURRENCY) -> None:
+        self.bot = bot
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        self.cache_size = cache_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # User ID: (expiry time, user or None if not found)
+        self._cache: "OrderedDict[int, Tuple[float, Optional[discord.User]]]" = OrderedDict()
+        self._fetches: SingleFlight[Optional[_UserRow]] = SingleFlight(lambda row: row)
+        self._last_prune = 0.0
+
+    async def resolve(self, user_ids: Iterable[Union[int, str]]) -> Dict[int, Optional[discord.User]]:
+        """Resolves user IDs to users.
+
+        Returns
+        -------
+        `Dict[int, Optional[discord.User]]`
+            Users by ID, in the order the IDs were first given.
+            IDs that could not be resolved map to None.
+        """
+        users: Dict[int, Optional[discord.User]] = {}
+        misses = []
+        for user_id in dict.fromkeys(int(i) for i in user_ids):
+            user = self.bot.get_user(user_id)
+            if user is None:
+                cached = self._get_cached(user_id)
+                if cached is not None:
+                    user = cached[1]
+                else:
+                    misses.append(user_id)
+            users[user_id] = user
+
+        if misses:
+            misses = await self._resolve_from_db(misses, users)
+        if misses:
+            await self._resolve_from_api(misses, users)
+        return users
+
+    def _get_cached(self, user_id: int) -> Optional[Tuple[float, Optional[discord.User]]]:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[user_id]
+            return None
+        self._cache.move_to_end(user_id)
+        return entry
+
+    def _add_cached(self, row: _UserRow) -> Optional[discord.User]:
+        user_id, name, discriminator, avatar, bot = row
+        if name is None:
+            user = None
+            ttl = self.not_found_ttl
+        else:
+            user = discord.User(state=self.bot._connection, data={
+                "id": user_id,
+                "username": name,
+                "discriminator": discriminator,
+                "avatar": avatar,
+                "bot": bot,
+            })
+            ttl = self.ttl
+        self._cache[user_id] = (time.monotonic() + ttl, user)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return user
+
+    async def _resolve_from_db(self,
+                               user_ids: List[int],
+                               users: Dict[int, Optional[discord.User]]) -> List[int]:
+        """Resolves users from the database. Returns IDs not found."""
+        rows = await self.bot.db.get_users(user_ids, self.ttl, self.not_found_ttl)
+        for row in rows:
+            users[row[0]] = self._add_cached(row)
+        found = {row[0] for row in rows}
+        return [user_id for user_id in user_ids if user_id not in found]
+
+    async def _resolve_from_api(self,
+                                user_ids: List[int],
+                                users: Dict[int, Optional[discord.User]]) -> None:
+        rows = await asyncio.gather(*(
+            self._fetches.run(user_id, lambda user_id=user_id: self._fetch(user_id))
+            for user_id in user_ids
+        ))
+        fetched = [row for row in rows if row is not None]
+        for row in fetched:
+            users[row[0]] = self._add_cached(row)
+
+        if fetched:
+            await self.bot.db.save_users(fetched)
+        if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+            self._last_prune = time.monotonic()
+            await self.bot.db.prune_users(max(self.ttl, self.not_found_ttl))
+
+    async def _fetch(self, user_id: int) -> Optional[_UserRow]:
+        """Fetches a user from the API. Returns a row with name None
+        if the user does not exist, or None if the request failed."""
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except NotFound:
+                return (user_id, None, None, None, False)
+            except discord.HTTPException:
+                return None # Not cached. Try again next time.
+        return (user.id, user.name, user.discriminator, user.avatar, user.bot)
+
+
+_RESOLVER: Optional[UserResolver] = None
+_SETTINGS: Dict[str, float] = {}
+
+
+def setup(*,
+          ttl: float=USER_TTL,
+          not_found_ttl: float=NOT_FOUND_TTL,
+          cache_size: int=CACHE_SIZE,
+          concurrency: int=MAX_CONCURRENCY) -> None:
+    """Configures the shared resolver. See `UserResolver` for
+    a description of the parameters."""
+    global _RESOLVER
+    _RESOLVER = None
+    _SETTINGS.update(ttl=ttl, not_found_ttl=not_found_ttl, cache_size=cache_size, concurrency=concurrency)
+
+
+def get_resolver(bot: Bot) -> UserResolver:
+    """Returns the shared resolver, creating it if it does not exist."""
+    global _RESOLVER
+    if _RESOLVER is None or _RESOLVER.bot is not bot:
+        _RESOLVER = UserResolver(bot, **_SETTINGS)
+    return _RESOLVER
+
+
+async def resolve_users(bot: Bot, user_ids: Iterable[Union[int, str]]) -> Dict[int, Optional[discord.User]]:
+    """Resolves user IDs with the shared resolver. See `UserResolver.resolve()`."""
+    return await get_resolver(bot).resolve(user_ids)
+
+
 async def get_user(bot: Bot, user_id: int) -> Optional[discord.User]:
-    """Attempts to get user from bot's own member cache, 
-    falls back on fetching from API if user is not cached."""
-    try:
-        return bot.get_user(user_id) or await bot.fetch_user(user_id)
-    except NotFound:
-        return None
+    """Attempts to get user from bot's own member cache,
+    falls back on the user cache and fetching from API if user is not cached."""
+    user = bot.get_user(user_id)
+    if user is not None:
+        return user
+    return (await resolve_users(bot, [user_id]))[int(user_id)]
 
 
 async def get_users_from_ids(bot: Bot, users: Iterable[int]) -> List[discord.User]:
-    """Takes an iterable of user IDs and returns list of `discord.User` objects."""
-    return list(filter(None.__ne__, [await get_user(bot, user_id) for user_id in users]))
+    """Takes an iterable of user IDs and returns list of `discord.User` objects.
+    Duplicate IDs and IDs that cannot be resolved are left out."""
+    return [user for user in (await resolve_users(bot, users)).values() if user is not None]
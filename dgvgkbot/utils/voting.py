@@ -204,7 +204,8 @@ async def get_str_topic(ctx: commands.Context, topic: TopicType) -> str:
     # "!tt start vjemmie" -> "vjemmie"
     s = ctx.message.content.rsplit(ctx.invoked_with)[-1].strip().lower()
     if topic is TopicType.member:
-        member = await NonCaseSensMemberConverter().convert(ctx, s)
+        # Never vote on a member the invoker did not name exactly
+        member = await NonCaseSensMemberConverter(fuzzy=False).convert(ctx, s)
         return member.name # member.id instead? Could run into users with identical names
     return s # fall back on s no matter what
 
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from dgvgkbot.db.db import DatabaseConnection
+
+SCHEMA = Path(__file__).parent.parent / "db" / "dgvgkbot.sql"
+
+
+@contextmanager
+def _serve(handler):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_port}"
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+@pytest.fixture(scope="session")
+def serve_http():
+    """Context manager serving requests with handler class `handler`
+    in a background thread. Yields the server's URL."""
+    return _serve
+
+
+@pytest.fixture
+def run_with_db(tmp_path):
+    """Runs coroutine function `test` with a bot whose database is created
+    from the schema in a temporary directory. The bot (a `SimpleNamespace`
+    if not given) is given `loop` and `db` attributes."""
+    def run(test, bot=None):
+        async def main():
+            nonlocal bot
+            if bot is None:
+                bot = SimpleNamespace()
+            bot.loop = asyncio.get_running_loop()
+            bot.db = DatabaseConnection(str(tmp_path / "test.db"), bot)
+            bot.db.cursor.executescript(SCHEMA.read_text())
+            await test(bot)
+        asyncio.run(main())
+    return run
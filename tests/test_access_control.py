@@ -0,0 +1,58 @@
+import pytest
+
+from dgvgkbot.utils import access_control
+from dgvgkbot.utils.caching import flush_cache
+
+
+@pytest.fixture
+def store(tmp_path):
+    flush_cache()
+    path = tmp_path / "trusted.json"
+    path.write_text('{"1": {"members": [10, 11], "roles": [20]}}')
+    access_control.setup(path)
+    return path
+
+
+def test_is_trusted(store):
+    assert access_control.is_trusted(1, 10)
+    assert access_control.is_trusted(1, 99, role_ids=[5, 20])
+    assert not access_control.is_trusted(1, 99, role_ids=[5])
+    assert not access_control.is_trusted(2, 10)
+
+
+def test_index_is_reused_until_store_changes(store):
+    index = access_control._get_index()
+    assert access_control._get_index() is index
+
+    access_control.add_trusted_member(1, 12)
+    assert access_control._get_index() is not index
+    assert access_control.get_trusted_members(1) == {10, 11, 12}
+
+
+def test_add_remove(store):
+    access_control.add_trusted_role(3, 30)
+    access_control.add_trusted_role(3, 30)
+    assert access_control.get_trusted_roles(3) == {30}
+    with pytest.raises(ValueError):
+        access_control._add_trusted(3, 30, access_control.Categories.ROLE, exist_ok=False)
+
+    access_control.remove_trusted_role(3, 30)
+    assert not access_control.is_trusted(3, role_ids=[30])
+    with pytest.raises(ValueError):
+        access_control.remove_trusted_member(3, 10)
+
+
+def test_missing_store(tmp_path):
+    access_control.setup(tmp_path / "nope.json")
+    assert not access_control.is_trusted(1, 10)
+
+
+def test_member_role_ids_are_not_cached():
+    from types import SimpleNamespace
+    role = lambda id_: SimpleNamespace(id=id_)
+    member = SimpleNamespace(id=10, guild=SimpleNamespace(id=1), roles=[role(1), role(20)])
+
+    assert access_control.get_member_role_ids(member) == {1, 20}
+    # Losing a role takes effect immediately
+    member.roles.pop()
+    assert access_control.get_member_role_ids(member) == {1}
@@ -0,0 +1,41 @@
+import pytest
+
+from dgvgkbot.utils import blacklist
+from dgvgkbot.utils.caching import flush_cache
+
+
+@pytest.fixture
+def path(tmp_path):
+    flush_cache()
+    path = tmp_path / "blacklist.json"
+    blacklist.setup(path)
+    return path
+
+
+def test_is_blacklisted(path):
+    path.write_text('{"users": [1], "guilds": [2]}')
+    assert blacklist.is_blacklisted(1)
+    assert blacklist.is_blacklisted(3, guild_id=2)
+    assert not blacklist.is_blacklisted(3, guild_id=4)
+    assert not blacklist.is_blacklisted(3)
+
+
+def test_legacy_list(path):
+    path.write_text("[1, 2]")
+    assert blacklist.is_blacklisted(2)
+
+
+def test_add_remove(path):
+    assert not blacklist.is_blacklisted(1)
+    blacklist.add_blacklisted(1)
+    blacklist.add_blacklisted(2, blacklist.Categories.GUILD)
+    assert blacklist.is_blacklisted(1)
+    assert blacklist.is_blacklisted(3, guild_id=2)
+
+    index = blacklist.get_blacklist()
+    assert blacklist.get_blacklist() is index
+
+    blacklist.remove_blacklisted(1)
+    assert not blacklist.is_blacklisted(1)
+    with pytest.raises(ValueError):
+        blacklist.remove_blacklisted(1)
@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from dgvgkbot.utils import broadcast as broadcast_module
+from dgvgkbot.utils.broadcast import Broadcast, get_writable_channel
+
+
+class Channel:
+    def __init__(self, id_, position, writable=True):
+        self.id = id_
+        self.position = position
+        self.writable = writable
+
+    def permissions_for(self, member):
+        return SimpleNamespace(send_messages=self.writable, read_messages=True)
+
+
+def _guild(id_, channels, system_channel=None):
+    return SimpleNamespace(
+        id=id_,
+        name=f"guild {id_}",
+        unavailable=False,
+        me=object(),
+        text_channels=channels,
+        system_channel=system_channel,
+    )
+
+
+def test_get_writable_channel():
+    first, second = Channel(1, 0, writable=False), Channel(2, 1)
+    assert get_writable_channel(_guild(1, [second, first])) is second
+    system = Channel(3, 5)
+    assert get_writable_channel(_guild(1, [first, second, system], system)) is system
+    assert get_writable_channel(_guild(1, [first])) is None
+
+
+def test_broadcast(monkeypatch):
+    active = 0
+    max_active = 0
+
+    async def send(channel, content, **kwargs):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if channel.id == 13:
+            raise discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "")
+
+    monkeypatch.setattr(broadcast_module, "send", send)
+    guilds = [_guild(i, [Channel(i, 0)]) for i in range(20)]
+    guilds.append(_guild(20, [Channel(20, 0, writable=False)]))
+    progress = []
+
+    async def on_progress(bc):
+        progress.append(bc.completed)
+
+    bc = Broadcast(guilds, "hello", concurrency=4)
+    asyncio.run(bc.run(on_progress, interval=0.015))
+
+    assert max_active == 4
+    assert len(bc.delivered) == 19
+    assert bc.failed == [(guilds[13], "Missing permissions")]
+    assert bc.skipped == [guilds[20]]
+    assert progress[-1] == 21 and len(progress) > 1
+    assert "guild 13 (13): Missing permissions" in bc.format_summary()
@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+from dgvgkbot.utils import checkcache
+
+
+class Command:
+    def __init__(self, name):
+        self.qualified_name = name
+        self.runs = 0
+
+    async def can_run(self, ctx):
+        self.runs += 1
+        return True
+
+
+class Context: # Weakly referenced by the cache
+    def __init__(self, user_id):
+        self.guild = None
+        self.channel = SimpleNamespace(id=1)
+        self.message = SimpleNamespace(author=SimpleNamespace(id=user_id))
+
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr(checkcache, "MAX_SIZE", 2)
+    checkcache.flush_cache()
+    a, b, c = Command("a"), Command("b"), Command("c")
+    ctx = Context(1)
+
+    async def main():
+        await checkcache.can_run(a, ctx)
+        await checkcache.can_run(b, ctx)
+        await checkcache.can_run(a, ctx) # b is now least recently used
+        await checkcache.can_run(c, ctx)
+        await checkcache.can_run(a, ctx)
+        await checkcache.can_run(b, ctx)
+
+    asyncio.run(main())
+    assert (a.runs, b.runs, c.runs) == (1, 2, 1)
+    assert len(checkcache._CACHE) == 2
+    checkcache.flush_cache()
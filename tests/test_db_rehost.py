@@ -0,0 +1,31 @@
+def test_rehost_lookup(run_with_db):
+    async def test(db):
+        assert await db.get_rehost_by_url("http://a/x.png", 60) is None
+        await db.save_rehost("abc", "https://cdn/1.png", 10, "http://a/x.png")
+        # Same contents from another URL
+        await db.add_rehost_url("http://b/y.png", "abc")
+
+        assert await db.get_rehost_by_url("http://a/x.png", 60) == "https://cdn/1.png"
+        assert await db.get_rehost_by_url("http://b/y.png", 60) == "https://cdn/1.png"
+        assert await db.get_rehost_by_hash("abc", 60) == "https://cdn/1.png"
+        # Expired
+        assert await db.get_rehost_by_hash("abc", -1) is None
+    run_with_db(lambda bot: test(bot.db))
+
+
+def test_rehost_prune(run_with_db):
+    async def test(db):
+        for i in range(3):
+            await db.save_rehost(str(i), f"https://cdn/{i}.png", 10, f"http://a/{i}.png")
+        await db.get_rehost_by_hash("0", 60) # Most recently used
+        await db.prune_rehosts(60, 2)
+
+        assert await db.get_rehost_by_hash("0", 60)
+        assert await db.get_rehost_by_hash("2", 60)
+        assert await db.get_rehost_by_hash("1", 60) is None
+        assert await db.get_rehost_by_url("http://a/1.png", 60) is None
+
+        await db.prune_rehosts(-1, 2)
+        db.cursor.execute("SELECT COUNT(*) FROM `rehost_url`")
+        assert db.cursor.fetchone()[0] == 0
+    run_with_db(lambda bot: test(bot.db))
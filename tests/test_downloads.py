@@ -0,0 +1,254 @@
+import asyncio
+import io
+import struct
+import zlib
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from dgvgkbot.utils import downloads, http
+from dgvgkbot.utils.downloads import DownloadGovernor, download
+from dgvgkbot.utils.exceptions import DownloadLimitError, FileSizeError, FileTypeError
+
+BODY = bytes(range(256)) * 400
+REQUESTS = []
+
+_IHDR = struct.pack(">IIBBBBB", 1, 1, 8, 0, 0, 0, 0)
+PNG = (
+    b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + _IHDR
+    + struct.pack(">I", zlib.crc32(b"IHDR" + _IHDR))
+)
+HTML = b"<html><body>" + b"x" * 1_000_000
+BODIES = {"/png": PNG, "/html": HTML}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        REQUESTS.append(self.path)
+        self.send_response(200)
+        # No Content-Length, body is chunked
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        body = BODIES.get(self.path, BODY)
+        try:
+            for i in range(0, len(body), 10_000):
+                chunk = body[i:i + 10_000]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        except ConnectionError: # Client aborted download
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server(serve_http):
+    with serve_http(Handler) as url:
+        yield url
+
+
+def _download(*args, **kwargs):
+    async def main():
+        try:
+            return await download(*args, **kwargs)
+        finally:
+            await http.close()
+    return asyncio.run(main())
+
+
+def test_download_without_content_length(server):
+    f = _download(f"{server}/chunked", max_size=len(BODY), spool_size=1024)
+    assert f._rolled # Spilled to disk
+    assert f.read() == BODY
+
+
+def test_download_in_memory(server):
+    f = _download(f"{server}/chunked", max_size=len(BODY))
+    assert not f._rolled
+    assert f.read() == BODY
+
+
+def test_download_exceeds_max_size(server):
+    with pytest.raises(FileSizeError):
+        _download(f"{server}/chunked", max_size=len(BODY) - 1)
+
+
+def test_governor_budget():
+    gov = DownloadGovernor(budget=100, max_per_guild=10, max_per_user=10, queue_timeout=1)
+    order = []
+
+    async def job(name, size, hold):
+        async with gov.reserve(size):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def main():
+        first = asyncio.create_task(job("a", 60, 0.05))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(job("b", 60, 0))
+        await asyncio.sleep(0.01)
+        assert gov.stats.active == 1 and gov.stats.queued == 1
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    assert order == ["a", "b"]
+    assert gov.stats.active == gov.stats.reserved == 0
+
+
+def test_governor_user_cap_does_not_block_others():
+    gov = DownloadGovernor(budget=100, max_per_guild=10, max_per_user=1, queue_timeout=1)
+    order = []
+
+    async def job(name, user_id, hold):
+        async with gov.reserve(10, guild_id=1, user_id=user_id):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def main():
+        await asyncio.gather(job("a1", 1, 0.05), job("a2", 1, 0), job("b1", 2, 0))
+
+    asyncio.run(main())
+    assert order == ["a1", "b1", "a2"]
+
+
+def test_governor_extend():
+    gov = DownloadGovernor(budget=100, max_per_guild=10, max_per_user=10, queue_timeout=1)
+    order = []
+
+    async def grow():
+        async with gov.reserve(40) as reservation:
+            await asyncio.sleep(0.01)
+            await reservation.extend(70) # Waits for "a", then goes ahead of "c"
+            order.append("b")
+            assert gov.stats.reserved == 70
+            await asyncio.sleep(0.01)
+
+    async def job(name, size, hold):
+        async with gov.reserve(size):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def main():
+        a = asyncio.create_task(job("a", 50, 0.05))
+        await asyncio.sleep(0)
+        b = asyncio.create_task(grow())
+        await asyncio.sleep(0.02)
+        c = asyncio.create_task(job("c", 40, 0))
+        await asyncio.gather(a, b, c)
+        async with gov.reserve(10) as reservation:
+            with pytest.raises(DownloadLimitError):
+                await reservation.extend(101)
+
+    asyncio.run(main())
+    assert order == ["a", "b", "c"]
+    assert gov.stats.active == gov.stats.reserved == 0
+
+
+def test_download_reserves_what_it_uses(server, monkeypatch):
+    gov = DownloadGovernor(budget=len(BODY) + 100_000)
+    monkeypatch.setattr(downloads, "_GOVERNOR", gov)
+    # Fits in the budget, unlike its maximum size
+    f = _download(f"{server}/chunked", max_size=10 * len(BODY), spool_size=1024)
+    assert f.read() == BODY
+    assert gov.stats.reserved == 0
+
+
+def test_governor_rejects():
+    gov = DownloadGovernor(budget=100, queue_timeout=0.01)
+
+    async def main():
+        with pytest.raises(DownloadLimitError):
+            async with gov.reserve(101):
+                pass
+        async with gov.reserve(100):
+            with pytest.raises(DownloadLimitError):
+                async with gov.reserve(1):
+                    pass
+
+    asyncio.run(main())
+    assert gov.stats.rejected == 2
+    assert gov.stats.queued == gov.stats.active == 0
+
+
+@pytest.mark.parametrize("spool_size", [downloads.SPOOL_SIZE, 1024])
+def test_download_coalesced(server, spool_size):
+    url = f"{server}/coalesced/{spool_size}"
+
+    async def main():
+        try:
+            return await asyncio.gather(*(
+                download(url, max_size=len(BODY), spool_size=spool_size) for _ in range(3)
+            ))
+        finally:
+            await http.close()
+
+    files = asyncio.run(main())
+    assert REQUESTS.count(f"/coalesced/{spool_size}") == 1
+    # Views have independent positions
+    assert files[0].read(10) == BODY[:10]
+    assert files[1].read() == BODY
+    assert files[0].read() == BODY[10:]
+    files[0].close()
+    files[1].seek(-10, 2)
+    assert files[1].read() == BODY[-10:]
+    assert files[2].read() == BODY
+
+    if spool_size < len(BODY):
+        # Views of a download on disk share the file until the last one is closed
+        shared = files[2]._file
+        assert shared.on_disk
+        files[1].close()
+        assert not shared.closed
+        files[2].close()
+        assert shared.closed
+    else:
+        assert all(isinstance(f, io.BytesIO) for f in files)
+
+
+def test_download_limit_errors_are_not_shared(server, monkeypatch):
+    gov = DownloadGovernor(max_per_user=1, queue_timeout=0.05)
+    monkeypatch.setattr(downloads, "_GOVERNOR", gov)
+    url = f"{server}/limits"
+
+    async def main():
+        try:
+            async with gov.reserve(1, user_id=1):
+                first = asyncio.ensure_future(download(url, len(BODY), user_id=1))
+                await asyncio.sleep(0)
+                second = asyncio.ensure_future(download(url, len(BODY), user_id=2))
+                with pytest.raises(DownloadLimitError): # User 1 is capped
+                    await first
+                return await second
+        finally:
+            await http.close()
+
+    f = asyncio.run(main())
+    assert f.read() == BODY
+    assert REQUESTS.count("/limits") == 1
+
+
+def test_http_get_coalesced(server):
+    async def main():
+        try:
+            return await asyncio.gather(
+                http.get(f"{server}/get", headers={"A": "1"}),
+                http.get(f"{server}/get", headers={"a": "1"}),
+                http.get(f"{server}/get", headers={"a": "2"}),
+            )
+        finally:
+            await http.close()
+
+    responses = asyncio.run(main())
+    assert REQUESTS.count("/get") == 2
+    assert responses[0] is not responses[1]
+    assert all(r.content == BODY for r in responses)
+
+
+def test_download_category(server):
+    f = _download(f"{server}/png", max_size=len(HTML), category="image")
+    assert f.read() == PNG
+    with pytest.raises(FileTypeError):
+        _download(f"{server}/html", max_size=len(HTML), category="image")
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+from dgvgkbot.cogs.base_cog import BaseCog, EmbedField
+
+COG = BaseCog(SimpleNamespace())
+CTX = SimpleNamespace(guild=None, message=SimpleNamespace(author=SimpleNamespace(name="user", avatar_url="")))
+
+
+def test_split_string_by_lines():
+    text = "\n".join(f"line {i}" for i in range(2000))
+    chunks = asyncio.run(COG._split_string_by_lines(text, 100))
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 100 for chunk in chunks)
+
+
+def test_split_string_by_lines_long_line():
+    text = "a" * 250 + "\nb\n" + "c" * 30
+    chunks = asyncio.run(COG._split_string_by_lines(text, 100))
+    assert chunks == ["a" * 100, "a" * 100, "a" * 50 + "\nb\n" + "c" * 30]
+
+
+def test_get_embed_prototypes():
+    cog = BaseCog(SimpleNamespace())
+
+    async def main():
+        kwargs = dict(title="T", color=0xff0000, fields=[EmbedField("a", "b")], timestamp=False)
+        first = await cog.get_embed(CTX, description="one", **kwargs)
+        second = await cog.get_embed(CTX, description="two", **kwargs)
+        # Only the author and color are part of the prototype
+        other = await cog.get_embed(CTX, title="Other", color=0xff0000, timestamp=False)
+        assert other.title == "Other" and not other.fields
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert len(cog._embed_prototypes) == 1
+    assert first.description == "one" and second.description == "two"
+    assert first.to_dict() == {**second.to_dict(), "description": "one"}
+    # Copies do not share mutable parts
+    first.add_field(name="c", value="d")
+    first.set_footer(text="changed")
+    assert len(second.fields) == 1
+    assert second.footer.text == "Requested by user"
+
+
+def test_embed_pages(monkeypatch):
+    monkeypatch.setattr("dgvgkbot.cogs.base_cog.MAX_PAGES", 3)
+    pages = asyncio.run(COG._make_embed_pages(CTX, "Title", "x\n" * 300, 100))
+    assert len(pages) == 3
+    assert all(page.title == "Title" and page.footer for page in pages)
+    assert pages[-1].description.endswith("*Output truncated*")
+
+
+def test_embed_pages_tail(monkeypatch):
+    monkeypatch.setattr("dgvgkbot.cogs.base_cog.MAX_PAGES", 3)
+    text = "".join(f"{i}\n" for i in range(300))
+    pages = asyncio.run(COG._make_embed_pages(CTX, "Title", text, 100, tail=True))
+    assert len(pages) == 3
+    assert pages[0].description.startswith("*Output truncated*")
+    assert pages[-1].description.endswith("299\n")
+
+
+def test_embed_pages_streamed():
+    async def main():
+        pages = COG._iter_embed_pages(CTX, "Title", "x\n" * 300, 100)
+        first = await pages.__anext__()
+        assert first.title == "Title" and first.description == "x\n" * 50
+        return [first] + [page async for page in pages]
+
+    pages = asyncio.run(main())
+    assert len(pages) == 6
+    assert not any("truncated" in page.description for page in pages)
@@ -0,0 +1,78 @@
+import asyncio
+
+from dgvgkbot.utils import errorreport
+from dgvgkbot.utils.errorreport import ErrorReporter, fingerprint
+
+
+def _trace(line, msg, exc="ValueError"):
+    return (
+        "Traceback (most recent call last):\n"
+        '  File "/bot/cogs/cog.py", line 10, in command\n'
+        "    foo()\n"
+        f'  File "/bot/cogs/cog.py", line {line}, in foo\n'
+        "    raise ValueError(msg)\n"
+        f"{exc}: {msg}\n"
+    )
+
+
+class Channel:
+    def __init__(self, id_, delay=0):
+        self.id = id_
+        self.delay = delay
+        self.sent = []
+
+    async def _get_channel(self):
+        return self
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        file = kwargs.get("file")
+        self.sent.append((content, file.fp.read().decode() if file else None))
+
+
+def test_fingerprint():
+    assert fingerprint(_trace(20, "user 123")) == fingerprint(_trace(20, "user 456"))
+    assert fingerprint(_trace(20, "x")) != fingerprint(_trace(21, "x"))
+    assert fingerprint(_trace(20, "x")) != fingerprint(_trace(20, "x", exc="KeyError"))
+    assert fingerprint("Error 1") == fingerprint("Error 2")
+
+
+def test_report_and_flush(monkeypatch):
+    monkeypatch.setattr(errorreport, "send", lambda channel, content, **kw: channel.send(content, **kw))
+    channel = Channel(1)
+
+    async def main():
+        reporter = ErrorReporter(interval=0.05, max_entries=2)
+        for i in range(5):
+            reporter.report(channel, _trace(20, f"error {i}"), f"user: ?cmd {i}")
+        reporter.report(channel, _trace(30, "other"))
+        reporter.report(channel, _trace(40, "dropped"))
+        assert reporter.pending == 2
+        await asyncio.sleep(0.15)
+        assert reporter._task is None # Stops once nothing is pending
+        assert reporter.pending == 0
+
+    asyncio.run(main())
+    assert len(channel.sent) == 3
+    summary, trace = channel.sent[0]
+    assert "×5" in summary
+    assert "ValueError: error 4" in summary and "user: ?cmd 4" in summary
+    assert trace == _trace(20, "error 4")
+    assert channel.sent[1][1] == _trace(30, "other")
+    assert channel.sent[2] == ("Other errors occurred 1 more time(s) and were not reported individually.", None)
+
+
+def test_first_error_sent_immediately_and_close_loses_nothing(monkeypatch):
+    monkeypatch.setattr(errorreport, "send", lambda channel, content, **kw: channel.send(content, **kw))
+    channel = Channel(1, delay=0.02)
+
+    async def main():
+        reporter = ErrorReporter(interval=60)
+        reporter.report(channel, _trace(20, "first"))
+        await asyncio.sleep(0.01) # First summary is being sent
+        assert reporter.pending == 0
+        reporter.report(channel, _trace(30, "second")) # Waits for the interval
+        await reporter.close()
+
+    asyncio.run(main())
+    assert [trace for _, trace in channel.sent] == [_trace(20, "first"), _trace(30, "second")]
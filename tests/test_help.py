@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+from discord.ext import commands
+
+from dgvgkbot.cogs.base_cog import BaseCog
+from dgvgkbot.utils.help import HelpCache
+
+
+def test_pages_are_cached():
+    cache = HelpCache()
+    renders = []
+
+    async def render(name):
+        renders.append(name)
+        return name
+
+    async def get(page, name):
+        return await cache.get_or_render(page, lambda: render(name))
+
+    async def main():
+        assert await get("page", "first") == "first"
+        assert await get("page", "second") == "first"
+        assert await get("other", "other") == "other"
+        cache.clear()
+        assert await get("page", "third") == "third"
+
+    asyncio.run(main())
+    assert renders == ["first", "other", "third"]
+
+
+def test_lru_eviction():
+    cache = HelpCache(max_size=2)
+
+    async def render():
+        return "x"
+
+    async def main():
+        for page in range(3):
+            await cache.get_or_render(page, render)
+
+    asyncio.run(main())
+    assert len(cache) == 2
+
+
+def _make_command(name):
+    async def callback(ctx):
+        pass
+    callback.__doc__ = f"Command {name}"
+    return commands.Command(callback, name=name)
+
+
+def test_cog_listing_filtered_per_invoker(monkeypatch):
+    allowed = {1: {"a", "b"}, 2: {"b"}} # User ID: commands the user can run
+    cmds = [_make_command(name) for name in "bca"]
+    renders = []
+
+    async def can_run(command, ctx):
+        return command.name in allowed[ctx.message.author.id]
+
+    monkeypatch.setattr("dgvgkbot.cogs.base_cog.can_run", can_run)
+    cog = BaseCog(SimpleNamespace(help_cache=HelpCache(), command_prefix="!", get_cog_commands=lambda cog: cmds))
+    render = cog._render_cog_commands
+
+    async def counting_render(advanced=False):
+        renders.append(advanced)
+        return await render(advanced)
+
+    cog._render_cog_commands = counting_render
+
+    def make_ctx(user_id):
+        return SimpleNamespace(message=SimpleNamespace(author=SimpleNamespace(id=user_id)))
+
+    async def main():
+        return (
+            await cog._get_cog_commands(make_ctx(1)),
+            await cog._get_cog_commands(make_ctx(2)),
+        )
+
+    first, second = asyncio.run(main())
+    assert renders == [False] # Rendered once for both invokers
+    assert "!a" in first and "!b" in first and "!c" not in first
+    assert "!b" in second and "!a" not in second
@@ -0,0 +1,126 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler
+
+import httpx
+import pytest
+
+from dgvgkbot.utils import http
+from dgvgkbot.utils.httpcache import CachedResponse, HTTPCache
+
+BODY = b'{"tunnels": []}'
+ETAG = '"v1"'
+REQUESTS = []
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        REQUESTS.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        if self.path != "/no-etag":
+            self.send_header("ETag", ETAG)
+        if self.path == "/vary":
+            self.send_header("Vary", "X-Lang")
+        if self.path == "/vary-all":
+            self.send_header("Vary", "*")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(serve_http, tmp_path):
+    REQUESTS.clear()
+    http.setup(cache={"path": tmp_path, "hosts": {"localhost": {"enabled": False}}})
+    with serve_http(Handler) as url:
+        yield url
+    http.setup()
+
+
+def _get(*args, **kwargs):
+    async def main():
+        try:
+            return await http.get(*args, **kwargs)
+        finally:
+            await http.close()
+    return asyncio.run(main())
+
+
+def _response(content: bytes, stored: float=0) -> CachedResponse:
+    return CachedResponse("http://a", 200, [("etag", '"x"')], stored, content)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    async def main():
+        cache = HTTPCache(tmp_path, max_size=450)
+        await cache.put("a", _response(b"a" * 100))
+        await cache.put("b", _response(b"b" * 100))
+        assert await cache.get("a") # "b" is now least recently used
+        await cache.put("c", _response(b"c" * 100))
+
+        assert await cache.get("b") is None
+        assert (await cache.get("a")).content == b"a" * 100
+        assert cache.size <= 450
+
+        # Index is rebuilt from disk
+        assert (await HTTPCache(tmp_path).get("c")).content == b"c" * 100
+
+    asyncio.run(main())
+
+
+def test_revalidated_with_etag(server):
+    r = _get(f"{server}/tunnels", cache=True)
+    assert r.json() == {"tunnels": []}
+    r = _get(f"{server}/tunnels", cache=True)
+    assert r.status_code == 200 and r.content == BODY
+    assert REQUESTS == [("/tunnels", None), ("/tunnels", ETAG)]
+
+
+def test_not_cached_without_opt_in(server):
+    _get(f"{server}/tunnels")
+    _get(f"{server}/tunnels")
+    assert REQUESTS == [("/tunnels", None), ("/tunnels", None)]
+
+
+def test_not_cached_without_validators(server):
+    _get(f"{server}/no-etag", cache=True)
+    _get(f"{server}/no-etag", cache=True)
+    assert len(REQUESTS) == 2
+
+
+def test_vary(server, tmp_path):
+    http.setup(cache={"path": tmp_path, "hosts": {"127.0.0.1": {"max_age": 60}}})
+    _get(f"{server}/vary", headers={"X-Lang": "en"})
+    _get(f"{server}/vary", headers={"X-Lang": "en"})
+    assert len(REQUESTS) == 1
+
+    key = http._get_request_key("GET", f"{server}/vary", {"headers": {"X-Lang": "en"}})
+    stored = asyncio.run(http.get_cache().get(key))
+    assert stored.vary == (("x-lang", "en"),)
+    assert stored.matches(httpx.Headers({"x-lang": "en"}))
+    assert not stored.matches(httpx.Headers({"x-lang": "no"}))
+    assert not stored.matches(httpx.Headers())
+
+    _get(f"{server}/vary-all")
+    _get(f"{server}/vary-all")
+    assert REQUESTS.count(("/vary-all", None)) == 2
+
+
+def test_host_policy(server, tmp_path):
+    http.setup(cache={"path": tmp_path, "hosts": {"127.0.0.1": {"max_age": 60}}})
+    # Listed hosts are cached without opting in, and served
+    # from disk without revalidation for `max_age` seconds
+    _get(f"{server}/no-etag")
+    r = _get(f"{server}/no-etag")
+    assert r.content == BODY
+    assert len(REQUESTS) == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from dgvgkbot.utils import jsoncodec
+
+
+@pytest.fixture(params=jsoncodec.available_backends())
+def backend(request):
+    previous = jsoncodec.get_backend()
+    jsoncodec.set_backend(request.param)
+    yield request.param
+    jsoncodec.set_backend(previous)
+
+
+def test_roundtrip(backend):
+    obj = {"123": {"members": [1, 2], "roles": []}, "home": [-600, 80, 650]}
+    for compact in (False, True):
+        assert jsoncodec.loads(jsoncodec.dumps(obj, compact=compact)) == obj
+        assert jsoncodec.loads(jsoncodec.dumpb(obj, compact=compact)) == obj
+
+
+def test_compact_has_no_whitespace(backend):
+    s = jsoncodec.dumps({"a": [1, 2, {"b": None}]}, compact=True)
+    assert s == '{"a":[1,2,{"b":null}]}'
+
+
+def test_int_keys_are_coerced(backend):
+    assert jsoncodec.loads(jsoncodec.dumps({1: 2})) == {"1": 2}
+
+
+def test_default(backend):
+    assert jsoncodec.loads(jsoncodec.dumps({"s": {1}}, default=list)) == {"s": [1]}
+
+
+def test_decode_error(backend):
+    with pytest.raises(jsoncodec.JSONDecodeError):
+        jsoncodec.loads("{not json")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        jsoncodec.set_backend("simplejson")
@@ -0,0 +1,142 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from discord.ext.commands.errors import BadArgument
+
+from dgvgkbot.utils import members
+from dgvgkbot.utils.converters import NonCaseSensMemberConverter
+
+
+class Member(SimpleNamespace):
+    def __str__(self):
+        return f"{self.name}#{self.discriminator}"
+
+
+class Guild:
+    def __init__(self, id_, member_list):
+        self.id = id_
+        self._members = {}
+        for member in member_list:
+            self.add(member)
+
+    def add(self, member):
+        member.guild = self
+        self._members[member.id] = member
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+
+def _member(id_, name, nick=None, discriminator="0001"):
+    return Member(id=id_, name=name, nick=nick, discriminator=discriminator)
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    members._INDEXES.clear()
+
+
+def test_find_members():
+    guild = Guild(1, [_member(1, "Vjemmie"), _member(2, "bob", nick="VJEMMIE"), _member(3, "alice", discriminator="1234")])
+    assert [m.id for m in members.find_members([guild], "alice")] == [3]
+    assert [m.id for m in members.find_members([guild], "ALICE#1234")] == [3]
+    assert sorted(m.id for m in members.find_members([guild], "vjemmie")) == [1, 2]
+    assert members.find_members([guild], "nobody") == []
+
+
+def test_index_sync():
+    guild = Guild(1, [_member(1, "alice")])
+    assert members.find_members([guild], "alice")
+
+    # Join
+    carol = _member(2, "carol")
+    guild.add(carol)
+    members.add_member(carol)
+    index = members._INDEXES[1]
+    assert members.find_members([guild], "carol") == [carol]
+
+    # Nickname change
+    carol.nick = "caz"
+    members.add_member(carol)
+    assert members.find_members([guild], "caz") == [carol]
+
+    # Username change
+    carol.name = "caroline"
+    members.update_user(carol)
+    assert members.find_members([guild], "caroline") == [carol]
+    assert members.find_members([guild], "carol") == []
+
+    # Leave
+    del guild._members[2]
+    members.remove_member(carol)
+    assert members.find_members([guild], "caz") == []
+    assert members._INDEXES[1] is index # Never rebuilt
+
+    # Members cached without an event
+    dave = _member(3, "dave")
+    guild.add(dave)
+    assert members.find_members([guild], "dave")
+
+    # Renamed without an event
+    dave.nick = "david"
+    assert members.find_members([guild], "dave") # Still his username
+    dave.name = "dan"
+    assert members.find_members([guild], "dave") == []
+    assert members.find_members([guild], "dan") == [dave] # Re-indexed
+
+
+def test_converter_ambiguous():
+    guild = Guild(1, [_member(1, "Vjemmie"), _member(2, "bob", nick="vjemmie")])
+    ctx = SimpleNamespace(bot=None, guild=guild)
+    with pytest.raises(BadArgument, match="Multiple members"):
+        asyncio.run(NonCaseSensMemberConverter().convert(ctx, "vjemmie"))
+    assert asyncio.run(NonCaseSensMemberConverter().convert(ctx, "BOB")).id == 2
+    with pytest.raises(BadArgument):
+        asyncio.run(NonCaseSensMemberConverter().convert(ctx, "nobody"))
+
+
+def test_search_members():
+    guild = Guild(1, [
+        _member(1, "vjemmie"),
+        _member(2, "vjemmie2"),
+        _member(3, "bob", nick="Jemima"),
+        _member(4, "alice"),
+    ])
+    matches = members.search_members([guild], "vjem")
+    assert [m.member.id for m in matches] == [1, 2] # Shorter name is the closer prefix match
+    assert matches[0].score > matches[1].score >= members.PREFIX_SCORE
+
+    # Typo
+    assert members.search_members([guild], "vjemmei")[0].member.id == 1
+    # Nickname
+    assert members.search_members([guild], "jemimah")[0].member.id == 3
+    assert members.search_members([guild], "zzzz") == []
+
+    # Trigrams of removed members are dropped
+    members.remove_member(guild._members.pop(4))
+    assert members.search_members([guild], "alice") == []
+    assert not any(4 in ids for ids in members._INDEXES[1]._trigrams.values())
+
+
+def test_converter_fuzzy():
+    guild = Guild(1, [_member(1, "vjemmie"), _member(2, "vjemmie2"), _member(3, "alice")])
+    ctx = SimpleNamespace(bot=None, guild=guild)
+    assert asyncio.run(NonCaseSensMemberConverter().convert(ctx, "alcie")).id == 3
+    assert asyncio.run(NonCaseSensMemberConverter().convert(ctx, "VJEMMIE")).id == 1
+    with pytest.raises(BadArgument, match="Did you mean: vjemmie#0001, vjemmie2#0001"):
+        asyncio.run(NonCaseSensMemberConverter().convert(ctx, "vjem"))
+
+    # Too short to be matched without asking
+    assert members.search_members([guild], "al")[0].score >= members.ACCEPT_SCORE
+    with pytest.raises(BadArgument, match="Did you mean: alice#0001"):
+        asyncio.run(NonCaseSensMemberConverter().convert(ctx, "al"))
+
+    # Approximate matches are only suggested
+    with pytest.raises(BadArgument, match="Did you mean: alice#0001"):
+        asyncio.run(NonCaseSensMemberConverter(fuzzy=False).convert(ctx, "alcie"))
+    assert asyncio.run(NonCaseSensMemberConverter(fuzzy=False).convert(ctx, "alice")).id == 3
@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from dgvgkbot.cogs.base_cog import BaseCog
+from dgvgkbot.utils import outbox as outbox_module
+from dgvgkbot.utils.outbox import Outbox, Priority
+
+
+class Channel:
+    def __init__(self, id_):
+        self.id = id_
+        self.sent = []
+
+    async def _get_channel(self):
+        return self
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(0)
+        self.sent.append(content)
+        return len(self.sent)
+
+
+def test_coalesce_and_priority():
+    channel = Channel(1)
+
+    async def main():
+        outbox = Outbox()
+        # First message occupies the worker while the rest are queued
+        first = asyncio.ensure_future(outbox.send(channel, "first"))
+        await asyncio.sleep(0)
+        results = await asyncio.gather(
+            outbox.send(channel, "log 1", priority=Priority.LOG, coalesce=True),
+            outbox.send(channel, "log 2", priority=Priority.LOG, coalesce=True),
+            outbox.send(channel, "reply", priority=Priority.REPLY, coalesce=True),
+            outbox.send(channel, "x" * 2000, priority=Priority.LOG, coalesce=True),
+        )
+        await first
+        assert not outbox._queues # Idle queues are reaped
+        return results
+
+    results = asyncio.run(main())
+    assert channel.sent == ["first", "reply", "log 1\nlog 2", "x" * 2000]
+    assert results == [3, 3, 2, 4]
+
+
+def test_channel_rate_limit(monkeypatch):
+    monkeypatch.setattr(outbox_module, "CHANNEL_RATE", 2)
+    monkeypatch.setattr(outbox_module, "CHANNEL_PER", 0.2)
+    channel = Channel(1)
+
+    async def main():
+        outbox = Outbox()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(outbox.send(channel, str(i)) for i in range(3)))
+        return loop.time() - start
+
+    elapsed = asyncio.run(main())
+    assert channel.sent == ["0", "1", "2"]
+    assert elapsed >= 0.2
+
+
+def test_send_error():
+    class Forbidden(Channel):
+        async def send(self, content=None, **kwargs):
+            raise PermissionError
+
+    async def main():
+        outbox = Outbox()
+        with pytest.raises(PermissionError):
+            await outbox.send(Forbidden(1), "a")
+
+    asyncio.run(main())
+
+
+def test_split_text_not_merged():
+    channel = Channel(1)
+    text = "".join(chr(ord("a") + i % 26) for i in range(1900))
+
+    async def main():
+        cog = BaseCog(SimpleNamespace())
+        try:
+            # First message occupies the worker while the rest are queued
+            first = asyncio.ensure_future(outbox_module.send(channel, "first"))
+            await asyncio.sleep(0)
+            await asyncio.gather(
+                outbox_module.send(channel, "small", priority=Priority.REPLY, coalesce=True),
+                cog.send_text_message(text, channel),
+            )
+            await first
+        finally:
+            await outbox_module.close()
+
+    asyncio.run(main())
+    assert channel.sent == ["first", "small", text[:1800], text[1800:]]
+    assert "".join(channel.sent[2:]) == text
@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from discord import Embed
+
+from dgvgkbot.utils import paginator as paginator_module
+from dgvgkbot.utils.paginator import NEXT, PREVIOUS, LAST, Paginator
+
+
+class Message:
+    def __init__(self, embed, manage_messages=False):
+        self.id = 1
+        self.author = SimpleNamespace(bot=True)
+        permissions = SimpleNamespace(manage_messages=manage_messages)
+        self.channel = SimpleNamespace(guild=SimpleNamespace(me=None), permissions_for=lambda _: permissions)
+        self.embed = embed
+        self.reactions = []
+        self.removed = []
+        self.edits = 0
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+    async def remove_reaction(self, emoji, user):
+        self.removed.append((emoji, user.id))
+
+    async def clear_reactions(self):
+        self.reactions.clear()
+
+    async def edit(self, *, embed):
+        self.embed = embed
+        self.edits += 1
+
+
+class Bot:
+    """Dispatches queued reactions to `wait_for("reaction_add")`."""
+
+    def __init__(self):
+        self.reactions = asyncio.Queue()
+
+    async def wait_for(self, event, *, check, timeout):
+        assert event == "reaction_add"
+        while True:
+            reaction, user = await asyncio.wait_for(self.reactions.get(), timeout)
+            if check(reaction, user):
+                return reaction, user
+
+    def react(self, message, emoji, user_id=2):
+        reaction = SimpleNamespace(message=message, emoji=emoji)
+        self.reactions.put_nowait((reaction, SimpleNamespace(id=user_id, bot=False)))
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+
+    async def send(destination, content=None, *, embed, priority):
+        messages.append(Message(embed, manage_messages=destination == "managed"))
+        return messages[-1]
+
+    monkeypatch.setattr(paginator_module, "send", send)
+    return messages
+
+
+def _pages(n):
+    return [Embed(description=str(i)) for i in range(n)]
+
+
+def test_paginate(sent):
+    async def main():
+        bot = Bot()
+        paginator = Paginator(_pages(5), user_id=2, timeout=0.1)
+        message = await paginator.start(bot, None)
+        assert message.reactions == paginator.emojis
+        assert message.embed.footer.text == "Page 1/5"
+
+        bot.react(message, PREVIOUS) # Already on first page
+        bot.react(message, NEXT, user_id=3) # Not the requester
+        bot.react(message, NEXT)
+        await asyncio.sleep(0.01)
+        assert message.embed.description == "1" and message.edits == 1
+
+        bot.react(message, LAST)
+        await asyncio.sleep(0.01)
+        assert message.embed.footer.text == "Page 5/5"
+
+        await asyncio.sleep(0.2) # Time out
+        assert not paginator.running and not paginator.pages
+        assert not message.reactions
+        assert not paginator_module._ACTIVE
+
+    asyncio.run(main())
+
+
+def test_removes_reactions_if_permitted(sent):
+    async def main():
+        bot = Bot()
+        unmanaged = await Paginator(_pages(3), timeout=0.1).start(bot, None)
+        bot.react(unmanaged, NEXT)
+        await asyncio.sleep(0.01)
+        assert unmanaged.embed.description == "1" and not unmanaged.removed
+
+        bot = Bot()
+        managed = await Paginator(_pages(3), timeout=0.1).start(bot, "managed")
+        bot.react(managed, NEXT)
+        bot.react(managed, NEXT) # Same arrow clicked again
+        await asyncio.sleep(0.01)
+        assert managed.embed.description == "2"
+        assert managed.removed == [(NEXT, 2), (NEXT, 2)]
+
+    asyncio.run(main())
+
+
+def test_single_page(sent):
+    async def main():
+        message = await Paginator(_pages(1)).start(Bot(), None)
+        assert not message.reactions and not message.embed.footer
+
+    asyncio.run(main())
+
+
+def test_max_pages():
+    assert len(Paginator(_pages(paginator_module.MAX_PAGES + 10)).pages) == paginator_module.MAX_PAGES
+
+
+def test_pages_added_while_sending(sent):
+    built = [] # Number of messages sent when each page was built
+
+    async def more():
+        for page in _pages(4)[1:]:
+            built.append(len(sent))
+            yield page
+
+    async def main():
+        paginator = Paginator(_pages(1), timeout=0.1)
+        message = await paginator.start(Bot(), None, more=more())
+        assert message.edits == 1 # Numbered once all pages were added
+        assert message.embed.footer.text == "Page 1/4"
+        assert message.reactions == paginator.emojis
+        paginator.stop()
+
+    asyncio.run(main())
+    assert built[0] == 0 and built[-1] == 1 # First page sent while building the rest
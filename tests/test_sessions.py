@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from dgvgkbot.cogs.base_cog import BaseCog
+from dgvgkbot.utils import sessions
+
+
+def test_guild_slot_limits_and_reaps():
+    active = []
+    peak = []
+
+    async def job():
+        async with sessions.guild_slot(1):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*(job() for _ in range(sessions.LIMIT_PER_GUILD * 2)))
+
+    asyncio.run(main())
+    assert max(peak) == sessions.LIMIT_PER_GUILD
+    assert not sessions._GUILD_SLOTS
+
+
+def test_guild_session_holds_slot():
+    async def main():
+        async with sessions.guild_session(1) as session:
+            assert session is sessions.get_session()
+            assert sessions._GUILD_SLOTS[1].users == 1
+        assert not sessions._GUILD_SLOTS
+        await sessions.close()
+
+    asyncio.run(main())
+
+
+def test_shared_session():
+    async def main():
+        session = sessions.get_session()
+        assert sessions.get_session() is session
+        await sessions.close()
+        assert session.closed
+
+    asyncio.run(main())
+
+
+def test_cog_session():
+    cog = BaseCog(SimpleNamespace(config={"downloads": {"allowed": True}}))
+    ctx = SimpleNamespace(guild=SimpleNamespace(id=1))
+
+    async def main():
+        # Awaiting the session is still supported
+        assert await cog.get_aiohttp_session(ctx) is sessions.get_session()
+        async with cog.aiohttp_session(ctx) as session:
+            assert session is sessions.get_session()
+            assert sessions._GUILD_SLOTS[1].users == 1
+        await sessions.close()
+
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+from dgvgkbot.utils.trie import Trie
+
+
+def make_trie():
+    t = Trie()
+    for i, key in enumerate(["help", "hello", "helm", "poi", "poi add", "commands"]):
+        t[key] = i
+    return t
+
+
+def test_get():
+    t = make_trie()
+    assert t["poi add"] == 4
+    assert t.get("hel") is None
+    assert "help" in t and "he" not in t
+    assert len(t) == 6
+    t["help"] = 10
+    assert len(t) == 6 and t["help"] == 10
+
+
+def test_startswith():
+    t = make_trie()
+    assert [k for k, _ in t.startswith("hel")] == ["hello", "helm", "help"]
+    assert [k for k, _ in t.startswith("hel", limit=1)] == ["hello"]
+    assert t.startswith("x") == []
+
+
+def test_search():
+    t = make_trie()
+    assert t.search("halp", max_distance=1) == [(1, "help", 0)]
+    assert t.search("comands", max_distance=1) == [(1, "commands", 5)]
+    assert t.search("poi ad", max_distance=0) == []
+    assert [k for _, k, _ in t.search("pio", max_distance=2)][0] == "poi"
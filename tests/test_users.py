@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from dgvgkbot.utils.users import UserResolver
+
+
+class Bot:
+    def __init__(self):
+        self._connection = None
+        self.fetched = []
+        self.active = 0
+        self.max_active = 0
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        self.fetched.append(user_id)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if user_id >= 100:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown User")
+        return SimpleNamespace(id=user_id, name=f"user {user_id}", discriminator="0001", avatar=None, bot=False)
+
+
+def test_resolve(run_with_db):
+    async def test(bot):
+        resolver = UserResolver(bot, concurrency=3)
+        ids = [1, 2, "1", 100, 3, 2, 4, 5, 6]
+        users = await resolver.resolve(ids)
+        assert list(users) == [1, 2, 100, 3, 4, 5, 6]
+        assert users[1].name == "user 1" and users[100] is None
+        assert sorted(bot.fetched) == [1, 2, 3, 4, 5, 6, 100]
+        assert bot.max_active == 3
+
+        # Served from memory, including the user that was not found
+        await resolver.resolve(ids)
+        assert len(bot.fetched) == 7
+
+        # Served from the database
+        users = await UserResolver(bot).resolve([1, 100])
+        assert users[1].name == "user 1" and users[100] is None
+        assert len(bot.fetched) == 7
+
+        # Expired
+        await UserResolver(bot, ttl=-1, not_found_ttl=-1).resolve([1, 100])
+        assert len(bot.fetched) == 9
+    run_with_db(test, Bot())
+
+
+def test_resolve_lru(run_with_db):
+    async def test(bot):
+        resolver = UserResolver(bot, cache_size=2)
+        await resolver.resolve([1, 2, 3])
+        assert list(resolver._cache) == [2, 3]
+    run_with_db(test, Bot())